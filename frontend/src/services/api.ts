@@ -15,7 +15,8 @@ import axios from 'axios';
 import { TripInput, TripPlan, User, ApiResponse, ApiItineraryResponse } from '../types';
 
 // Base API configuration
-const BASE_URL = process.env.REACT_APP_API_URL || 'https://api.smarttravellers.com';
+// Vite only exposes VITE_* variables, on import.meta.env (process.env is undefined in the build)
+const BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 
 const api = axios.create({
   baseURL: BASE_URL,
@@ -123,51 +124,9 @@ export const tripAPI = {
   // Generate AI itinerary
   generateItinerary: async (tripInput: TripInput): Promise<ApiResponse<TripPlan>> => {
     try {
-      // Real API call would be:
-      // const response = await api.post('/trips/generate', tripInput);
-      // Expected response structure:
-      // {
-      //   success: true,
-      //   data: {
-      //     id: string,
-      //     destination: string,
-      //     duration: number,
-      //     totalBudget: number,
-      //     themes: string[],
-      //     itinerary: ItineraryDay[],
-      //     costBreakdown: { accommodation, transport, activities, food, total },
-      //     smartAdjustments: string[]
-      //   }
-      // }
-      
-      // Mock response for demo
-      return new Promise((resolve) => {
-        setTimeout(() => {
-          resolve({
-            success: true,
-            data: {
-              id: `trip_${Date.now()}`,
-              destination: tripInput.destination,
-              duration: tripInput.duration,
-              totalBudget: tripInput.budget,
-              themes: tripInput.themes,
-              itinerary: [], // Would be populated by AI
-              costBreakdown: {
-                accommodation: Math.floor(tripInput.budget * 0.4),
-                transport: Math.floor(tripInput.budget * 0.2),
-                activities: Math.floor(tripInput.budget * 0.25),
-                food: Math.floor(tripInput.budget * 0.15),
-                total: tripInput.budget
-              },
-              smartAdjustments: [
-                '🌧️ Rain expected on Day 2 - Indoor activities recommended',
-                '🎉 Local festival on Day 3 - Special cultural events added',
-                '💡 Peak hours avoided for popular attractions'
-              ]
-            }
-          });
-        }, 2000);
-      });
+      // Served by services/backend/src/api/server.py
+      const response = await api.post('/trips/generate', tripInput);
+      return response.data;
     } catch (error) {
       throw new Error('Failed to generate itinerary');
     }
@@ -200,38 +159,13 @@ export const tripAPI = {
  */
 export const placesAPI = {
   // Get places by destination
-  getPlacesByDestination: async (destinationId: string): Promise<ApiResponse<any[]>> => {
+  getPlacesByDestination: async (destinationId: string, page = 1, pageSize = 20): Promise<ApiResponse<any[]>> => {
     try {
-      // Real API call would be:
-      // const response = await api.get(`/places/destination/${destinationId}`);
-      // Expected response structure:
-      // {
-      //   success: true,
-      //   data: [
-      //     {
-      //       id: string,
-      //       name: string,
-      //       category: 'attraction' | 'hotel' | 'restaurant',
-      //       lat: number,
-      //       lng: number,
-      //       description: string,
-      //       cost?: number,
-      //       image: string,
-      //       rating: number,
-      //       address: string
-      //     }
-      //   ]
-      // }
-      
-      // Mock response for demo
-      return new Promise((resolve) => {
-        setTimeout(() => {
-          resolve({
-            success: true,
-            data: [] // Would contain places data
-          });
-        }, 1000);
+      // Served by services/backend/src/api/server.py; paginated, with ETag revalidation
+      const response = await api.get(`/places/destination/${encodeURIComponent(destinationId)}`, {
+        params: { page, pageSize },
       });
+      return response.data;
     } catch (error) {
       throw new Error('Failed to fetch places');
     }
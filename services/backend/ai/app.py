@@ -1,8 +1,13 @@
+import os
+import sys
 import streamlit as st
 import google.generativeai as genai
-import requests
 from geopy.geocoders import Nominatim
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "shared"))
+from geocode import Geocoder  # noqa: E402
+from weather import WeatherCache, openweather_fetcher  # noqa: E402
+
 # Configure keys
 genai.configure(api_key="")
 OPENWEATHER_API_KEY = ""
@@ -12,22 +17,36 @@ st.set_page_config(page_title="Smart Travellers – AI Travel Assistant", page_i
 st.title("🌍 Smart Travellers – AI Travel Assistant")
 st.markdown("Your personal AI companion for smarter, faster, and more delightful travel planning ✨")
 
+@st.cache_resource
+def get_geocoder():
+    """One Nominatim client and geocode cache per server process, not per rerun."""
+    nominatim = Nominatim(user_agent="smart-travellers")
+
+    def resolve(name):
+        location = nominatim.geocode(name)
+        return (location.latitude, location.longitude, location.address) if location else None
+
+    return Geocoder(resolve)
+
+@st.cache_resource
+def get_weather_cache():
+    """Shared by every session, so a destination costs one OpenWeather call per grid cell per TTL."""
+    return WeatherCache(openweather_fetcher(OPENWEATHER_API_KEY))
+
 def get_weather(city_name):
     try:
-        geolocator = Nominatim(user_agent="smart-travellers")
-        location = geolocator.geocode(city_name)
-        if not location:
+        place = get_geocoder().geocode(city_name)
+        if not place:
             return None, "⚠️ Could not fetch location details."
 
-        lat, lon = location.latitude, location.longitude
-        url = f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={OPENWEATHER_API_KEY}&units=metric"
-        response = requests.get(url).json()
+        lat, lon, address = place
+        response = get_weather_cache().get(lat, lon)
 
         if "main" not in response:
             return None, "⚠️ Weather data not available."
 
         weather_info = {
-            "location": location.address,
+            "location": address,
             "temp": response["main"]["temp"],
             "humidity": response["main"]["humidity"],
             "condition": response["weather"][0]["description"],
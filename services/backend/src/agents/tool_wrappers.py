@@ -1,10 +1,20 @@
 # src/agents/tool_wrappers.py
 
 import os
+import time
 import logging
-import requests
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, wait
 from dotenv import load_dotenv
 
+import utils.shared_path  # noqa: F401
+import http_client
+from distance_matrix import SOURCE_API, SOURCE_ESTIMATE, DistanceMatrix, format_distance, format_duration
+from geocode import GAZETTEER_CSV, Gazetteer, normalize_place
+from route_cache import get_route_cache, route_key
+from retrieval.cache import LRUCache
+
 # Load environment variables
 load_dotenv()
 
@@ -13,16 +23,17 @@ load_dotenv()
 # ───────────────────────────────────────
 GEOAPIFY_KEY = os.getenv("GEOAPIFY_API_KEY")
 
-try:
-    import googlemaps
-    gmaps = googlemaps.Client(key=os.getenv("GOOGLE_MAPS_API_KEY"))
-except Exception as e:
-    gmaps = None
-    logging.warning(f"[Google Maps] API not available: {e}")
+# Overall time budget of generate_smart_enrichment, in seconds
+ENRICHMENT_DEADLINE = float(os.getenv("ENRICHMENT_DEADLINE", "4"))
+YELP_CACHE_TTL = 600
+YELP_CACHE_ENTRIES = 1024
+YELP_TIMEOUT = float(os.getenv("YELP_TIMEOUT", "5"))  # seconds per Yelp request
+# Restaurants fetched per city; cuisine picks are filtered from the same list
+YELP_SEARCH_LIMIT = 50
 
 try:
     from yelpapi import YelpAPI
-    yelp = YelpAPI(os.getenv("YELP_API_KEY"))
+    yelp = YelpAPI(os.getenv("YELP_API_KEY"), timeout_s=YELP_TIMEOUT)
 except Exception as e:
     yelp = None
     logging.warning(f"[Yelp] API not available: {e}")
@@ -30,33 +41,128 @@ except Exception as e:
 # ───────────────────────────────────────
 # Google Maps Route
 # ───────────────────────────────────────
-def real_google_maps_route(origin, destination):
-    try:
-        if not gmaps:
-            raise ValueError("Google Maps API not initialized.")
-        result = gmaps.directions(origin, destination, mode="driving")
-        if result:
-            leg = result[0]['legs'][0]
-            return f"Driving from {origin} to {destination} takes {leg['duration']['text']} and covers {leg['distance']['text']}."
-    except Exception as e:
-        logging.warning(f"[Google Maps] Failed to fetch route: {e}")
+def _route_fallback(origin, destination):
     return f"Driving from {origin} to {destination} takes approximately 6 hours and covers 500km."
 
+
+@lru_cache(maxsize=1)
+def _gazetteer():
+    return Gazetteer.load() if os.path.exists(GAZETTEER_CSV) else Gazetteer({})
+
+
+# Cells are cached per mode and shared by every request; without a key, or
+# when Google is unavailable, durations are estimated from the gazetteer
+route_matrix = DistanceMatrix(
+    os.getenv("GOOGLE_MAPS_API_KEY"),
+    geocode=lambda name: _gazetteer().get(normalize_place(name)),
+)
+
+
+def real_google_maps_route(origin, destination):
+    """
+    Driving summary between two places. Answers are kept in the persistent
+    route cache (A->B and B->A alike); when Google is unavailable the last
+    known answer is used, then an estimate, and only then the canned text.
+    """
+    cache = get_route_cache()
+    key = route_key(origin, destination, "driving", symmetric=True)
+    summary = cache.get(key)
+    if summary is None:
+        source = None
+        try:
+            distance, duration, source = route_matrix.pair(origin, destination, mode="driving")
+        except Exception as e:
+            logging.warning(f"[Google Maps] Failed to fetch route: {e}")
+        if source == SOURCE_API:
+            summary = {"duration": format_duration(duration), "distance": format_distance(distance)}
+            cache.put(key, summary)
+        else:
+            summary = cache.get_stale(key)
+            if summary is None and source == SOURCE_ESTIMATE:
+                return (f"Driving from {origin} to {destination} takes roughly {format_duration(duration)} "
+                        f"and covers about {format_distance(distance)}.")
+    if summary is None:
+        return _route_fallback(origin, destination)
+    return f"Driving from {origin} to {destination} takes {summary['duration']} and covers {summary['distance']}."
+
+
+def travel_matrix(stops, mode="driving"):
+    """
+    Distance/duration between every pair of `stops` (names or "lat,lng") in
+    a handful of batched Distance Matrix calls, for ordering a day's stops.
+
+    Returns:
+        dict: see DistanceMatrix.matrix
+    """
+    return route_matrix.matrix(stops, stops, mode)
+
 # ───────────────────────────────────────
 # Yelp or fallback restaurant recommendation
 # ───────────────────────────────────────
-def real_restaurant_recommendation(city, cuisine=None):
+_yelp_lock = threading.Lock()
+_yelp_inflight = {}
+_yelp_cache = LRUCache(YELP_CACHE_ENTRIES)
+
+
+def _yelp_search(city, until=None):
+    """
+    Restaurants of a city as (name, categories) pairs, from one Yelp search
+    shared between callers: identical lookups already in flight wait for the
+    same request (until the monotonic time `until` at the latest), and
+    answers are reused for YELP_CACHE_TTL.
+    """
+    key = city.strip().lower()
+    with _yelp_lock:
+        cached = _yelp_cache.get(key)
+        if cached and time.monotonic() - cached[0] < YELP_CACHE_TTL:
+            return cached[1]
+        event = _yelp_inflight.get(key)
+        owner = event is None
+        if owner:
+            event = _yelp_inflight[key] = threading.Event()
+    if not owner:
+        timeout = YELP_TIMEOUT if until is None else max(until - time.monotonic(), 0)
+        if not event.wait(timeout):
+            raise TimeoutError("Shared Yelp lookup still running.")
+        cached = _yelp_cache.get(key)
+        if cached is None:
+            raise ValueError("Shared Yelp lookup failed.")
+        return cached[1]
+
+    try:
+        businesses = yelp.search_query(term="restaurant", location=city, limit=YELP_SEARCH_LIMIT)['businesses']
+        restaurants = [(biz['name'], " ".join(f"{c.get('alias', '')} {c.get('title', '')}".lower()
+                                              for c in biz.get('categories', [])))
+                       for biz in businesses]
+        _yelp_cache.put(key, (time.monotonic(), restaurants))
+        return restaurants
+    finally:
+        with _yelp_lock:
+            del _yelp_inflight[key]
+        event.set()
+
+
+def _restaurant_fallback(cuisine=None):
+    return [f"{cuisine.capitalize()} Delight", f"Authentic {cuisine.capitalize()} Kitchen"] if cuisine else [
+        "Gourmet Bistro", "Family Diner", "Healthy Greens"
+    ]
+
+
+def real_restaurant_recommendation(city, cuisine=None, until=None):
+    """Three Yelp restaurants in `city`, of `cuisine` when given; both come from the city's one search."""
     try:
         if not yelp:
             raise ValueError("Yelp API not initialized.")
-        term = f"{cuisine} restaurant" if cuisine else "restaurant"
-        results = yelp.search_query(term=term, location=city, limit=3)
-        return [biz['name'] for biz in results['businesses']]
+        restaurants = _yelp_search(city, until)
+        if cuisine:
+            restaurants = [(name, categories) for name, categories in restaurants
+                           if cuisine.strip().lower() in categories]
+            if not restaurants:
+                raise ValueError(f"No {cuisine} restaurants among Yelp's top {YELP_SEARCH_LIMIT}.")
+        return [name for name, _ in restaurants[:3]]
     except Exception as e:
         logging.warning(f"[Yelp] Failed to fetch restaurants: {e}")
-        return [f"{cuisine.capitalize()} Delight", f"Authentic {cuisine.capitalize()} Kitchen"] if cuisine else [
-            "Gourmet Bistro", "Family Diner", "Healthy Greens"
-        ]
+        return _restaurant_fallback(cuisine)
 
 # ───────────────────────────────────────
 # Geoapify Attractions (Free)
@@ -70,7 +176,7 @@ def geoapify_attractions(city, limit=3):
             "limit": limit,
             "apiKey": GEOAPIFY_KEY
         }
-        response = requests.get(url, params=params, timeout=10)
+        response = http_client.get(url, params=params)
         data = response.json()
         return [f["properties"]["name"] for f in data.get("features", []) if "name" in f["properties"]]
     except Exception as e:
@@ -87,32 +193,95 @@ def mock_hotel_suggestions(city, pet_friendly=True):
 # ───────────────────────────────────────
 # Smart Enrichment: Final Context Generator
 # ───────────────────────────────────────
-def generate_smart_enrichment(entities):
-    lines = []
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="enrichment")
+
+
+def _timed(until, fn, *args):
+    # Calls queued behind slow ones until after the deadline are dropped
+    # without going upstream, so a hung upstream cannot back the pool up
+    if time.monotonic() >= until:
+        raise TimeoutError(f"{fn.__name__} started after the deadline")
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def generate_smart_enrichment(entities, deadline=ENRICHMENT_DEADLINE, timings=None):
+    """
+    Builds the enrichment context for the LLM from the route, restaurant,
+    attraction and hotel lookups, run concurrently under one deadline.
+
+    Lookups that miss the deadline use the same fallbacks as a failed call;
+    they keep running in the background (bounded by their request timeouts),
+    so their Yelp answers still land in the shared cache for the next
+    request. Calls still queued for a worker when the deadline passes are
+    skipped.
+
+    Args:
+        entities (dict): destination, origin, cuisine, budget, duration.
+        deadline (float): Overall time budget in seconds.
+        timings (dict | None): Filled with {call: {"seconds", "status"}},
+            status being "ok" or "timeout".
+
+    Returns:
+        str: One line per piece of context.
+    """
     dest = entities.get("destination")
     origin = entities.get("origin")
     cuisine = entities.get("cuisine")
     budget = entities.get("budget")
     duration = entities.get("duration")
 
+    # name -> (future, fallback used when the call misses the deadline)
+    calls = {}
+    until = time.monotonic() + deadline
+    if origin and dest:
+        calls["route"] = (_executor.submit(_timed, until, real_google_maps_route, origin, dest),
+                          lambda: _route_fallback(origin, dest))
+    if dest and cuisine:
+        calls["cuisine_restaurants"] = (_executor.submit(_timed, until, real_restaurant_recommendation, dest,
+                                                         cuisine, until),
+                                        lambda: _restaurant_fallback(cuisine))
+    if dest:
+        calls["attractions"] = (_executor.submit(_timed, until, geoapify_attractions, dest), lambda: [])
+        calls["restaurants"] = (_executor.submit(_timed, until, real_restaurant_recommendation, dest, None, until),
+                                lambda: _restaurant_fallback())
+        calls["hotels"] = (_executor.submit(_timed, until, mock_hotel_suggestions, dest),
+                           lambda: mock_hotel_suggestions(dest))
+
+    start = time.perf_counter()
+    wait([future for future, _ in calls.values()], timeout=deadline)
+    results = {}
+    for name, (future, fallback) in calls.items():
+        if future.done() and future.exception() is None:
+            results[name], seconds = future.result()
+            status = "ok"
+        else:
+            results[name], seconds = fallback(), time.perf_counter() - start
+            status = "timeout"
+            logging.warning(f"[Enrichment] {name} missed the {deadline:.1f}s deadline; using fallback")
+        if timings is not None:
+            timings[name] = {"seconds": seconds, "status": status}
+
+    lines = []
     if origin and dest:
-        lines.append(real_google_maps_route(origin, dest))
+        lines.append(results["route"])
 
     if dest and cuisine:
-        recs = real_restaurant_recommendation(dest, cuisine)
+        recs = results["cuisine_restaurants"]
         lines.append(f"Recommended {cuisine} restaurants in {dest}: {', '.join(recs)}")
 
     if dest:
-        attractions = geoapify_attractions(dest)
+        attractions = results["attractions"]
         if attractions:
             lines.append(f"Top attractions in {dest}: {', '.join(attractions)}")
         else:
             lines.append(f"In {dest}, you may enjoy activities such as city tours, museums, and local food tasting.")
 
-        rest_fallback = real_restaurant_recommendation(dest)
+        rest_fallback = results["restaurants"]
         lines.append(f"Popular restaurants include: {', '.join(rest_fallback)}")
 
-        hotels = mock_hotel_suggestions(dest)
+        hotels = results["hotels"]
         lines.append(f"Hotel options in {dest}: {', '.join(hotels)}")
 
     if budget:
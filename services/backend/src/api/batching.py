@@ -0,0 +1,97 @@
+# src/api/batching.py
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent async calls into batches for a blocking batch function.
+
+    `submit` queues one item and waits for its result. A batch is flushed once
+    `max_batch` items are waiting or `max_wait_ms` after its first item
+    arrived, and runs on a single worker thread, so while one batch is busy
+    the next one keeps filling up: the busier the service, the larger the
+    batches, with no added latency when it is idle beyond `max_wait_ms`.
+
+    Items submitted with a `key` that is already queued or running are not
+    queued again; they wait for the result of the first one.
+    """
+
+    def __init__(self, fn, max_batch=32, max_wait_ms=2.0, name="batch"):
+        """
+        Args:
+            fn (callable): Takes a list of items and returns a list of
+                results in the same order.
+            max_batch (int): Largest batch handed to `fn`.
+            max_wait_ms (float): How long the first item of a batch waits
+                for company.
+        """
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix=name)
+        self._pending = []
+        self._timer = None
+        self._waiting = {}  # key -> future of the queued or running item
+        self.batches = 0
+        self.items = 0
+        self.coalesced = 0
+
+    async def submit(self, item, key=None):
+        """
+        Args:
+            item: Passed to `fn` as part of a batch.
+            key (hashable | None): Identity of the item; submits with the same
+                key while it is queued or running share its result.
+        """
+        future = self._waiting.get(key) if key is not None else None
+        if future is not None:
+            self.coalesced += 1
+        else:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            if key is not None:
+                self._waiting[key] = future
+                future.add_done_callback(lambda _: self._waiting.pop(key, None))
+            self._pending.append((item, future))
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.max_wait, self._flush)
+        # One caller giving up must not cancel the result for the others
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            asyncio.get_running_loop().create_task(self._run(batch))
+
+    async def _run(self, batch):
+        items = [item for item, _ in batch]
+        self.batches += 1
+        self.items += len(items)
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(self._executor, self.fn, items)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch": self.items / self.batches if self.batches else 0.0,
+            "coalesced": self.coalesced,
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,416 @@
+# src/api/server.py
+#
+# Headless HTTP service over the same index, doc store and embedding model
+# as the Streamlit app, for the React frontend and for load testing:
+#
+#   GET  /health                         index generation and batching stats
+#   POST /search                         {query, k?, mode?, filters?}
+#   POST /trips/generate                 TripInput -> TripPlan (tripAPI.generateItinerary)
+#   GET  /places/destination/{name}      ?category=&page=&pageSize= (placesAPI.getPlacesByDestination)
+#
+# Concurrent requests are coalesced into micro-batches: one encode call and
+# one FAISS scan per batch of queries sharing a filter mask. Responses are
+# gzip-compressed when the client accepts it, and GET responses carry an
+# ETag so unchanged place pages cost a 304. Run from the repository root:
+#
+#     PYTHONPATH=services/backend/src python -m api.server --port 8000
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+
+import numpy as np
+from aiohttp import web
+
+from api.batching import MicroBatcher
+from planning.itinerary import plan_places
+from retrieval.cache import LRUCache, ResultCache, filter_key, normalize_query
+from retrieval.embeddings import BACKEND, BACKENDS, MODEL_DIR, load_encoder
+from retrieval.index_store import open_snapshot, read_generation
+from retrieval.metadata import INDEX_DIR, filter_mask
+from retrieval.search import RETRIEVAL_MODES, filtered_search_batch, hybrid_search
+from utils.geo import PLACE_CATEGORIES, get_places
+
+CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*")
+PLACES_TTL = 3600
+MAX_PAGE_SIZE = 100
+MAX_TRIP_DAYS = 60
+MIN_GZIP_BYTES = 1024
+
+
+# ───────────────────────────────────────
+# Retrieval
+# ───────────────────────────────────────
+class SearchService:
+    """Holds the current index snapshot and the encode / search batchers."""
+
+    def __init__(self, index_dir=INDEX_DIR, encoder=None, max_batch=32, max_wait_ms=2.0):
+        self.index_dir = index_dir
+        self.encoder = encoder
+        self.snapshot = open_snapshot(index_dir)
+        self._checked = time.monotonic()
+        self._embeddings = LRUCache(4096)
+        self._masks = LRUCache(256)
+        self.results = ResultCache()
+        self.encode_batcher = MicroBatcher(self._encode_batch, max_batch, max_wait_ms, "encode")
+        self.search_batcher = MicroBatcher(self._search_batch, max_batch, max_wait_ms, "search")
+
+    def refresh(self):
+        """Picks up a new index generation; checked at most once a second."""
+        now = time.monotonic()
+        if now - self._checked < 1.0:
+            return
+        self._checked = now
+        if read_generation(self.index_dir) != self.snapshot["generation"]:
+            self.snapshot = open_snapshot(self.index_dir)
+            self._masks.clear()
+            logging.info("Loaded index generation %d", self.snapshot["generation"])
+
+    def _encode_batch(self, queries):
+        return list(self.encoder.encode(queries, batch_size=len(queries)))
+
+    async def encode(self, query):
+        key = normalize_query(query)
+        embedding = self._embeddings.get(key)
+        if embedding is None:
+            # Identical queries waiting at the same time share one encode
+            embedding = await self.encode_batcher.submit(query, key=key)
+            embedding.setflags(write=False)
+            self._embeddings.put(key, embedding)
+        return embedding
+
+    def mask(self, snapshot, filters):
+        """Filter mask with tombstones applied, cached per (generation, filters)."""
+        key = (snapshot["generation"], filter_key(filters))
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = filter_mask(snapshot["metadata"], snapshot["documents"],
+                               keyword_index=snapshot["keyword_index"], **filters)
+            mask &= ~snapshot["deleted"]
+            self._masks.put(key, mask)
+        return mask
+
+    def _search_batch(self, items):
+        # items: (snapshot, filters, embedding, k); one FAISS call per distinct mask
+        groups = {}
+        for n, (snapshot, filters, _, _) in enumerate(items):
+            groups.setdefault((id(snapshot), filter_key(filters)), []).append(n)
+        results = [None] * len(items)
+        for members in groups.values():
+            snapshot, filters = items[members[0]][0], items[members[0]][1]
+            k = max(items[n][3] for n in members)
+            embeddings = np.vstack([items[n][2] for n in members])
+            found = filtered_search_batch(snapshot["index"], embeddings, self.mask(snapshot, filters), k)
+            for n, (distances, ids) in zip(members, found):
+                results[n] = (distances[:items[n][3]], ids[:items[n][3]])
+        return results
+
+    async def search(self, query, filters, k=5, mode="dense"):
+        self.refresh()
+        snapshot = self.snapshot
+        key = self.results.key(query, filters, k, mode)
+        result = self.results.get(key, snapshot["generation"])
+        if result is not None:
+            return snapshot, result
+
+        embedding = await self.encode(query)
+        if mode == "dense":
+            result = await self.search_batcher.submit((snapshot, filters, embedding, k),
+                                                      key=(snapshot["generation"],) + key)
+        else:
+            # The BM25 candidate set differs per query, so these are not batched
+            mask = self.mask(snapshot, filters)
+            result = await asyncio.to_thread(hybrid_search, snapshot["index"], snapshot["bm25"], query,
+                                             embedding[None, :], mask, k, mode)
+        self.results.put(key, snapshot["generation"], result)
+        return snapshot, result
+
+
+def parse_filters(raw):
+    """Request filters -> `filter_mask` keyword arguments; absent keys are disabled."""
+    raw = raw or {}
+    if not isinstance(raw, dict):
+        raise TypeError("filters must be an object")
+
+    def keywords(value):
+        if value is None:
+            return None
+        values = value.split(",") if isinstance(value, str) else value
+        if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+            raise TypeError("countries and activities must be strings or lists of strings")
+        return [v.lower() for v in values]
+
+    duration = raw.get("duration")
+    if duration is not None and not (isinstance(duration, list) and len(duration) == 2
+                                     and all(isinstance(d, int) and not isinstance(d, bool) for d in duration)):
+        raise TypeError("duration must be a list of two integers [min_days, max_days]")
+    budget = raw.get("budget")
+    return {
+        "countries": keywords(raw.get("countries")),
+        "duration": tuple(duration) if duration else None,
+        "activities": keywords(raw.get("activities")),
+        "budget": float(budget) if budget is not None else None,
+    }
+
+
+# ───────────────────────────────────────
+# Places
+# ───────────────────────────────────────
+class PlacesService:
+    """Per-destination place lists, fetched once per TTL and paginated locally."""
+
+    def __init__(self, ttl=PLACES_TTL):
+        self.ttl = ttl
+        self._cache = LRUCache(512)
+        self._inflight = {}
+
+    async def places(self, destination, category):
+        key = (destination.strip().lower(), category)
+        cached = self._cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self.ttl:
+            return cached[1]
+        # Concurrent requests for the same destination share one upstream fetch
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(asyncio.to_thread(get_places, destination, category))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        places = await task
+        if places is None:
+            # Upstream failure: answer empty now, but ask again next time
+            return []
+        self._cache.put(key, (time.monotonic(), places))
+        return places
+
+
+# ───────────────────────────────────────
+# HTTP
+# ───────────────────────────────────────
+def json_response(request, payload, status=200, cache_control=None):
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    headers = {"Vary": "Accept-Encoding"}
+    if request.method == "GET" and status == 200:
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        headers["ETag"] = etag
+        if cache_control:
+            headers["Cache-Control"] = cache_control
+        if etag in request.headers.get("If-None-Match", ""):
+            return web.Response(status=304, headers=headers)
+    return web.Response(body=body, status=status, content_type="application/json", headers=headers)
+
+
+def error_response(request, message, status=400):
+    return json_response(request, {"success": False, "data": None, "message": message}, status)
+
+
+@web.middleware
+async def compression_middleware(request, handler):
+    response = await handler(request)
+    if isinstance(response, web.Response) and response.body is not None and len(response.body) >= MIN_GZIP_BYTES:
+        response.enable_compression()
+    return response
+
+
+@web.middleware
+async def cors_middleware(request, handler):
+    if request.method == "OPTIONS":
+        response = web.Response(status=204)
+    else:
+        response = await handler(request)
+    response.headers["Access-Control-Allow-Origin"] = CORS_ORIGINS
+    response.headers["Access-Control-Allow-Headers"] = "Authorization, Content-Type, If-None-Match"
+    response.headers["Access-Control-Expose-Headers"] = "ETag"
+    return response
+
+
+async def read_json(request):
+    """The request body, which must be a JSON object."""
+    try:
+        body = await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise web.HTTPBadRequest(text="Request body must be JSON")
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(text="Request body must be a JSON object")
+    return body
+
+
+async def health(request):
+    service = request.app["search"]
+    return json_response(request, {
+        "success": True,
+        "data": {
+            "generation": service.snapshot["generation"],
+            "documents": len(service.snapshot["documents"]),
+            "encode": service.encode_batcher.stats(),
+            "search": service.search_batcher.stats(),
+            "results": service.results.stats(),
+        },
+    }, cache_control="no-cache")
+
+
+async def search(request):
+    body = await read_json(request)
+    query = body.get("query")
+    if not isinstance(query, str) or not query.strip():
+        return error_response(request, "query is required")
+    query = query.strip()
+    mode = body.get("mode", "dense")
+    if mode not in RETRIEVAL_MODES:
+        return error_response(request, f"mode must be one of {', '.join(RETRIEVAL_MODES)}")
+    try:
+        filters = parse_filters(body.get("filters"))
+        k = min(max(int(body.get("k", 5)), 1), 50)
+    except (TypeError, ValueError, IndexError, KeyError) as e:
+        return error_response(request, f"Invalid filters: {e}")
+
+    snapshot, (distances, doc_ids) = await request.app["search"].search(query, filters, k, mode)
+    results = [
+        {"id": int(doc_id), "score": float(1 / (1 + distance)), "document": snapshot["documents"][doc_id]}
+        for distance, doc_id in zip(distances, doc_ids)
+    ]
+    return json_response(request, {"success": True, "data": {"generation": snapshot["generation"],
+                                                             "results": results}})
+
+
+def _duration_text(minutes):
+    hours, minutes = divmod(int(round(minutes)), 60)
+    text = f"{hours} hour{'s' if hours > 1 else ''}" if hours else ""
+    return f"{text} {minutes} mins".strip() if minutes else text
+
+
+def _activity(place, duration="2 hours", start=None):
+    activity = {"id": str(place["id"]), "name": place["name"], "type": place["category"], "duration": duration,
+                "cost": place.get("cost") or 0, "description": place["description"], "image": place["image"],
+                "location": place["address"]}
+    if start is not None:
+        activity["time"] = f"{int(start) // 60 % 24:02d}:{int(start) % 60:02d}"
+    return activity
+
+
+def build_trip_plan(trip, attractions, matches):
+    """
+    TripPlan for the frontend: attractions chosen and ordered per day by the
+    itinerary planner (opening hours, travel between them, a day's time),
+    budget split as in the mock. Without coordinates the attractions are
+    spread over the days in order.
+    """
+    duration = max(int(trip.get("duration") or 1), 1)
+    budget = float(trip.get("budget") or 0)
+    planned = plan_places(attractions, duration)
+    if any(planned):
+        day_activities = [[_activity(place, _duration_text(stop["end"] - stop["start"]), stop["start"])
+                           for place, stop in stops] for stops in planned]
+    else:
+        per_day = max(1, min(3, -(-len(attractions) // duration))) if attractions else 0
+        day_activities = [[_activity(p) for p in attractions[day * per_day:(day + 1) * per_day]]
+                          for day in range(duration)]
+    days = [{"day": day + 1, "date": "", "activities": activities,
+             "totalCost": sum(a["cost"] for a in activities)}
+            for day, activities in enumerate(day_activities)]
+    split = {"accommodation": 0.4, "transport": 0.2, "activities": 0.25, "food": 0.15}
+    cost_breakdown = {name: int(budget * share) for name, share in split.items()}
+    cost_breakdown["total"] = budget
+    return {
+        "id": f"trip_{int(time.time() * 1000)}",
+        "destination": trip.get("destination", ""),
+        "startingPlace": trip.get("startingPlace", ""),
+        "startDate": trip.get("startDate", ""),
+        "duration": duration,
+        "totalBudget": budget,
+        "themes": trip.get("themes") or [],
+        "itinerary": days,
+        "costBreakdown": cost_breakdown,
+        "smartAdjustments": [f"Similar trip: {doc}" for doc in matches[:3]],
+    }
+
+
+async def generate_trip(request):
+    trip = await read_json(request)
+    destination = trip.get("destination")
+    if not isinstance(destination, str) or not destination.strip():
+        return error_response(request, "destination is required")
+    destination = destination.strip()
+    themes = trip.get("themes") or []
+    if not isinstance(themes, list) or not all(isinstance(t, str) for t in themes):
+        return error_response(request, "themes must be a list of strings")
+    try:
+        duration = int(trip.get("duration") or 1)
+        float(trip.get("budget") or 0)
+    except (TypeError, ValueError):
+        return error_response(request, "duration and budget must be numbers")
+    if duration > MAX_TRIP_DAYS:
+        return error_response(request, f"duration must be at most {MAX_TRIP_DAYS} days")
+    query = f"A {trip.get('duration', '')}-day trip to {destination} with {', '.join(themes)}"
+    filters = parse_filters({"budget": trip.get("budget")} if trip.get("budget") else None)
+
+    (snapshot, (_, doc_ids)), attractions = await asyncio.gather(
+        request.app["search"].search(query, filters, 5),
+        request.app["places"].places(destination, "attraction"),
+    )
+    matches = [snapshot["documents"][doc_id] for doc_id in doc_ids]
+    return json_response(request, {"success": True, "data": build_trip_plan(trip, attractions, matches)})
+
+
+async def places_by_destination(request):
+    destination = request.match_info["destination"]
+    category = request.query.get("category")
+    if category is not None and category not in PLACE_CATEGORIES:
+        return error_response(request, f"category must be one of {', '.join(PLACE_CATEGORIES)}")
+    try:
+        page = max(int(request.query.get("page", 1)), 1)
+        page_size = min(max(int(request.query.get("pageSize", 20)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return error_response(request, "page and pageSize must be integers")
+
+    categories = [category] if category else list(PLACE_CATEGORIES)
+    lists = await asyncio.gather(*(request.app["places"].places(destination, c) for c in categories))
+    places = [place for places in lists for place in places]
+    start = (page - 1) * page_size
+    return json_response(request, {
+        "success": True,
+        "data": places[start:start + page_size],
+        "page": page,
+        "pageSize": page_size,
+        "total": len(places),
+        "nextPage": page + 1 if start + page_size < len(places) else None,
+    }, cache_control="public, max-age=300")
+
+
+def create_app(index_dir=INDEX_DIR, encoder=None, max_batch=32, max_wait_ms=2.0):
+    app = web.Application(middlewares=[cors_middleware, compression_middleware])
+    app["search"] = SearchService(index_dir, encoder or load_encoder(), max_batch, max_wait_ms)
+    app["places"] = PlacesService()
+    app.router.add_get("/health", health)
+    app.router.add_post("/search", search)
+    app.router.add_post("/trips/generate", generate_trip)
+    app.router.add_get("/places/destination/{destination}", places_by_destination)
+
+    async def close(app):
+        app["search"].encode_batcher.close()
+        app["search"].search_batcher.close()
+    app.on_cleanup.append(close)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval / itinerary HTTP service")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--backend", choices=BACKENDS, default=BACKEND)
+    parser.add_argument("--max-batch", type=int, default=32, help="largest encode / search batch")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0, help="how long a batch waits to fill")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    app = create_app(args.index_dir, load_encoder(args.backend, args.model_dir), args.max_batch, args.max_wait_ms)
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,55 @@
 import os
+import time
 os.environ["STREAMLIT_WATCHER_TYPE"] = "none"
 
 import streamlit as st
-import faiss
-import pickle
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from rag_pipeline.generate_response import generate_response
 from nlp.ner_utils import extract_entities
-import re
+from retrieval.search import RETRIEVAL_MODES, hybrid_search
+from retrieval.metadata import INDEX_DIR, filter_mask
+from retrieval.index_store import open_snapshot, read_generation
+from retrieval.embeddings import load_encoder
+from retrieval.cache import QueryEncoder, ResultCache
+from retrieval.response_cache import SemanticResponseCache, context_key
 
-# Load index and documents
 @st.cache_resource
-def load_resources():
-    index = faiss.read_index("data/index/travel_index.faiss")
-    with open("data/index/documents.pkl", "rb") as f:
-        documents = pickle.load(f)
-    model = SentenceTransformer("all-MiniLM-L6-v2")
-    return index, documents, model
+def load_model():
+    # Backend and local model directory come from EMBEDDING_BACKEND / EMBEDDING_MODEL_DIR
+    return QueryEncoder(load_encoder())
 
-index, all_documents, model = load_resources()
+@st.cache_resource
+def load_result_cache():
+    return ResultCache()
+
+@st.cache_resource
+def load_response_cache():
+    # Threshold, TTL, size and path come from the RESPONSE_CACHE_* env vars
+    return SemanticResponseCache()
+
+# Load index and documents. Incremental updates bump the generation in the
+# index manifest, so the next rerun loads the new one without a restart.
+@st.cache_resource(max_entries=1)
+def load_resources(generation):
+    return open_snapshot(INDEX_DIR)
+
+snapshot = load_resources(read_generation(INDEX_DIR))
+index, all_documents, deleted = snapshot["index"], snapshot["documents"], snapshot["deleted"]
+metadata, keyword_index, bm25 = snapshot["metadata"], snapshot["keyword_index"], snapshot["bm25"]
+model = load_model()
+result_cache = load_result_cache()
+response_cache = load_response_cache()
 
 st.title("🌍 AI Travel Assistant")
 
 # User input
 query = st.text_input("✈️ Enter your travel query")
 
+# dense ranks every filtered document; bm25/fused rank only the best lexical matches
+retrieval_mode = st.selectbox(
+    "Retrieval mode", RETRIEVAL_MODES, index=RETRIEVAL_MODES.index(os.getenv("RETRIEVAL_MODE", "dense"))
+)
+
 st.subheader("🧩 Filters (optional)")
 
 # Country filter
@@ -52,65 +76,65 @@ if apply_budget:
 # Submit
 if st.button("🔍 Get Itinerary") and query:
     # Apply filters
-    filtered_docs = []
-    for doc in all_documents:
-        doc_lower = doc.lower()
-        include = True
-
-        if apply_country:
-            include &= any(c.strip() in doc_lower for c in allowed_countries)
-
-        if apply_duration:
-            match = re.search(r"(\d+)\s*[- ]?day[s]?", doc_lower)
-            if match:
-                days = int(match.group(1))
-                include &= min_days <= days <= max_days
-            else:
-                include = False
-
-        if apply_activities:
-            include &= any(a.strip() in doc_lower for a in activity_keywords)
-
-        if apply_budget:
-            match = re.search(r"\$?(\d{3,5})", doc)
-            if match:
-                include &= float(match.group(1)) <= budget_limit
-            else:
-                include = False
-
-        if include:
-            filtered_docs.append(doc)
-
-    if not filtered_docs:
+    filters = {
+        "countries": allowed_countries if apply_country else None,
+        "duration": (min_days, max_days) if apply_duration else None,
+        "activities": activity_keywords if apply_activities else None,
+        "budget": budget_limit if apply_budget else None,
+    }
+    cache_key = result_cache.key(query, filters, k=5, mode=retrieval_mode)
+    result = result_cache.get(cache_key, snapshot["generation"])
+    if result is None:
+        mask = filter_mask(metadata, all_documents, keyword_index=keyword_index, **filters)
+        mask &= ~deleted
+        if mask.any():
+            # Rank the filtered documents against the stored index vectors
+            st.info("Ranking documents...")
+            result = hybrid_search(index, bm25, query, model.encode(query), mask, k=5, mode=retrieval_mode)
+        else:
+            result = (np.empty(0, dtype="float32"), np.empty(0, dtype="int64"))
+        result_cache.put(cache_key, snapshot["generation"], result)
+    distances, doc_ids = result
+    st.caption(
+        f"Cache hit rate: query embeddings {model.cache.stats()['hit_rate']:.0%}, "
+        f"results {result_cache.stats()['hit_rate']:.0%}"
+    )
+
+    if len(doc_ids) == 0:
         st.warning("No documents match the filters. Try relaxing them.")
     else:
-        # Rank using FAISS on filtered
-        st.info("Ranking documents...")
-        query_embedding = model.encode([query]).astype("float32")
-        embeddings = model.encode(filtered_docs).astype("float32")
-        temp_index = faiss.IndexFlatL2(embeddings.shape[1])
-        temp_index.add(embeddings)
-        k = min(5, len(filtered_docs))
-        distances, indices = temp_index.search(query_embedding, k)
-
         top_matches = []
-        for i, idx in enumerate(indices[0]):
-            sim_score = 1 / (1 + distances[0][i])
-            top_matches.append(filtered_docs[idx])
+        for i, doc_id in enumerate(doc_ids):
+            sim_score = 1 / (1 + distances[i])
+            top_matches.append(all_documents[doc_id])
             st.markdown(f"**Match {i+1}** (score: {sim_score:.4f})")
-            st.write(filtered_docs[idx])
+            st.write(all_documents[doc_id])
             st.divider()
 
         # Generate response
         st.subheader("🤖 Travel Assistant Suggestion")
-        with st.spinner("Generating response..."):
-            answer = generate_response(query, top_matches)
-            st.success(answer)
-
-        # Show extracted entities
+        query_embedding = model.encode(query)
+        context = context_key(doc_ids, top_matches)
+        answer = response_cache.get(query_embedding, context)
+        if answer is None:
+            with st.spinner("Generating response..."):
+                started = time.perf_counter()
+                answer = generate_response(query, top_matches)
+                response_cache.put(query_embedding, context, answer, time.perf_counter() - started)
+        st.success(answer)
+        response_stats = response_cache.stats()
+        st.caption(
+            f"Response cache hit rate {response_stats['hit_rate']:.0%}, "
+            f"{response_stats['latency_saved_s']:.1f}s of generation saved"
+        )
+
+        # Show entities; precomputed at index build time when it ran with --ner
         st.subheader("🔍 Named Entities in Results")
-        for i, doc in enumerate(top_matches):
-            entities = extract_entities(doc)
+        if snapshot["entities"] is not None:
+            match_entities = [snapshot["entities"][doc_id] for doc_id in doc_ids]
+        else:
+            match_entities = [extract_entities(doc) for doc in top_matches]
+        for i, entities in enumerate(match_entities):
             if entities:
                 st.markdown(f"**Entities in Match {i+1}:**")
                 for ent in entities:
@@ -0,0 +1,84 @@
+# src/benchmarks/bench_bm25_prefilter.py
+#
+# End-to-end latency (query encode + retrieval) and top-k agreement with
+# dense-only retrieval for the BM25 prefilter modes, over a built index.
+# Queries are the ones in data/test_cases_travel_assistant.csv plus
+# phrases cut from sampled documents. Run from the repository root:
+#
+#     PYTHONPATH=services/backend/src python -m benchmarks.bench_bm25_prefilter --candidates 100 300 1000
+
+import argparse
+import csv
+import time
+
+import numpy as np
+
+from retrieval.embeddings import BACKEND, BACKENDS, load_encoder
+from retrieval.index_store import open_snapshot
+from retrieval.metadata import INDEX_DIR
+from retrieval.search import hybrid_search
+
+TEST_CASES_CSV = "data/test_cases_travel_assistant.csv"
+
+
+def load_queries(documents, deleted, sample, seed=0):
+    with open(TEST_CASES_CSV, newline="", encoding="utf-8") as f:
+        queries = [row["query"] for row in csv.DictReader(f)]
+    rng = np.random.default_rng(seed)
+    live = np.flatnonzero(~deleted)
+    for doc_id in rng.choice(live, min(sample, len(live)), replace=False):
+        words = documents[doc_id].split()
+        start = int(rng.integers(0, max(1, len(words) - 6)))
+        queries.append(" ".join(words[start:start + 6]))
+    return queries
+
+
+def run(snapshot, encoder, queries, k, mode, candidates):
+    mask = ~snapshot["deleted"]
+    timings, search_timings, results = [], [], []
+    for query in queries:
+        start = time.perf_counter()
+        query_embedding = encoder.encode([query])
+        encoded = time.perf_counter()
+        _, ids = hybrid_search(snapshot["index"], snapshot["bm25"], query, query_embedding, mask, k,
+                               mode=mode, candidates=candidates)
+        end = time.perf_counter()
+        timings.append(end - start)
+        search_timings.append(end - encoded)
+        results.append(ids)
+    return np.array(timings) * 1000, np.array(search_timings) * 1000, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BM25 prefilter vs dense-only retrieval")
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    parser.add_argument("--candidates", type=int, nargs="+", default=[100, 300, 1000])
+    parser.add_argument("--sample-queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--backend", choices=BACKENDS, default=BACKEND, help="embedding backend for the queries")
+    args = parser.parse_args()
+
+    snapshot = open_snapshot(args.index_dir)
+    encoder = load_encoder(args.backend)
+    queries = load_queries(snapshot["documents"], snapshot["deleted"], args.sample_queries)
+    print(f"{len(snapshot['documents'])} documents, {len(queries)} queries, top-{args.k} agreement with dense\n")
+
+    # Warm up the encoder so the first query does not carry its start-up cost
+    encoder.encode(queries[:8])
+    dense_total, dense_search, dense = run(snapshot, encoder, queries, args.k, "dense", 0)
+
+    print(f"{'mode':>6} {'cands':>6} {'p50 ms':>8} {'p99 ms':>8} {'search p50':>11} {'agreement':>10}")
+    print(f"{'dense':>6} {'-':>6} {np.percentile(dense_total, 50):>8.3f} {np.percentile(dense_total, 99):>8.3f} "
+          f"{np.percentile(dense_search, 50):>11.3f} {1.0:>10.3f}")
+    for mode in ("bm25", "fused"):
+        for candidates in args.candidates:
+            total, search, found = run(snapshot, encoder, queries, args.k, mode, candidates)
+            agreement = np.mean([
+                len(set(f.tolist()) & set(d.tolist())) / max(1, len(d)) for f, d in zip(found, dense)
+            ])
+            print(f"{mode:>6} {candidates:>6} {np.percentile(total, 50):>8.3f} {np.percentile(total, 99):>8.3f} "
+                  f"{np.percentile(search, 50):>11.3f} {agreement:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# src/benchmarks/bench_embeddings.py
+#
+# Throughput, single-query latency and cosine agreement with the fp32 torch
+# embeddings for every embedding backend, on documents from the built index.
+# Needs a local model exported with `python -m retrieval.embeddings export`.
+# Run from the repository root:
+#
+#     PYTHONPATH=services/backend/src python -m benchmarks.bench_embeddings --docs 2000
+
+import argparse
+import csv
+import time
+
+import numpy as np
+
+from retrieval.embeddings import BACKENDS, MODEL_DIR, load_encoder
+from retrieval.index_store import load_documents
+from retrieval.metadata import INDEX_DIR
+
+TEST_CASES_CSV = "data/test_cases_travel_assistant.csv"
+
+
+def cosine(a, b):
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding backend comparison")
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    documents = load_documents(args.index_dir)
+    rng = np.random.default_rng(0)
+    sample = [documents[int(i)] for i in rng.choice(len(documents), min(args.docs, len(documents)), replace=False)]
+    with open(TEST_CASES_CSV, newline="", encoding="utf-8") as f:
+        queries = [row["query"] for row in csv.DictReader(f)]
+
+    reference = None
+    print(f"{len(sample)} documents, batch size {args.batch_size}\n")
+    print(f"{'backend':>11} {'sent/s':>8} {'query p50 ms':>13} {'cos mean':>9} {'cos min':>8}")
+    for backend in ["torch"] + [b for b in args.backends if b != "torch"]:
+        encoder = load_encoder(backend, args.model_dir)
+        encoder.encode(sample[:args.batch_size], batch_size=args.batch_size)  # warm-up
+
+        start = time.perf_counter()
+        embeddings = encoder.encode(sample, batch_size=args.batch_size)
+        throughput = len(sample) / (time.perf_counter() - start)
+
+        timings = []
+        for _ in range(args.repeats):
+            for query in queries:
+                start = time.perf_counter()
+                encoder.encode([query], batch_size=1)
+                timings.append(time.perf_counter() - start)
+
+        if reference is None:
+            reference = embeddings
+        agreement = cosine(embeddings, reference)
+        if backend in args.backends:
+            print(f"{backend:>11} {throughput:>8.0f} {np.percentile(timings, 50) * 1000:>13.2f} "
+                  f"{agreement.mean():>9.4f} {agreement.min():>8.4f}")
+
+
+if __name__ == "__main__":
+    main()
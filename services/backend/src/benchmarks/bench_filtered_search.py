@@ -0,0 +1,86 @@
+# src/benchmarks/bench_filtered_search.py
+#
+# Latency check for the filtered-ranking path. A filtered query is one query
+# encode plus a restricted scan of the stored index vectors, so its cost is
+# capped by a single unfiltered scan no matter how many documents pass the
+# filters. With --encode the old path (re-encode every filtered document and
+# build a temporary IndexFlatL2) is timed as well for comparison.
+# Run from services/backend/src:
+#
+#     python -m benchmarks.bench_filtered_search --docs 50000
+
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from retrieval.search import filtered_search
+
+DIM = 384  # all-MiniLM-L6-v2
+FRACTIONS = [0.0005, 0.005, 0.05, 0.25, 1.0]
+
+
+def p50_ms(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.percentile(timings, 50)) * 1000
+
+
+def old_path_ms(model, docs, query):
+    def run():
+        query_embedding = model.encode([query]).astype("float32")
+        embeddings = model.encode(docs).astype("float32")
+        temp_index = faiss.IndexFlatL2(embeddings.shape[1])
+        temp_index.add(embeddings)
+        temp_index.search(query_embedding, min(5, len(docs)))
+    return p50_ms(run, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Filtered-ranking latency check")
+    parser.add_argument("--docs", type=int, default=50000)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--max-ratio", type=float, default=1.5,
+                        help="fail if a filtered search is slower than this multiple of an unfiltered one")
+    parser.add_argument("--encode", action="store_true",
+                        help="also time the old re-encode path (needs sentence-transformers)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.docs, DIM)).astype("float32")
+    query = rng.standard_normal((1, DIM)).astype("float32")
+    index = faiss.IndexFlatL2(DIM)
+    index.add(vectors)
+
+    model = None
+    if args.encode:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer("all-MiniLM-L6-v2")
+        texts = [f"A {n % 20 + 1}-day trip to city {n} with budget ${n % 5000 + 100}" for n in range(args.docs)]
+
+    baseline = p50_ms(lambda: filtered_search(index, query, None, k=args.k), args.repeats)
+    print(f"unfiltered scan p50: {baseline:.3f} ms\n")
+    print(f"{'filtered docs':>14} {'p50 ms':>8} {'old path ms':>12}")
+
+    worst = 0.0
+    for fraction in FRACTIONS:
+        mask = rng.random(args.docs) < fraction
+        p50 = p50_ms(lambda: filtered_search(index, query, mask, k=args.k), args.repeats)
+        worst = max(worst, p50 / baseline)
+        old = "-"
+        if model is not None:
+            old = f"{old_path_ms(model, [texts[i] for i in np.flatnonzero(mask)], 'beach trip'):.1f}"
+        print(f"{int(mask.sum()):>14} {p50:>8.3f} {old:>12}")
+
+    print(f"\nworst filtered / unfiltered ratio: {worst:.2f}x")
+    if worst > args.max_ratio:
+        raise SystemExit(f"Filtered search exceeds one index scan ({worst:.2f}x > {args.max_ratio}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# src/benchmarks/bench_index_types.py
+#
+# Recall@k against exact search, p50/p99 search latency and serialized size
+# for each index type, over the vectors of a built index. Queries are the
+# ones in data/test_cases_travel_assistant.csv, plus stored document vectors
+# sampled from the corpus so the percentiles rest on more than eight points.
+# --scale grows the corpus with jittered copies of the stored vectors to
+# see how each type behaves past the current size. Run from the repository root:
+#
+#     PYTHONPATH=services/backend/src python -m benchmarks.bench_index_types --scale 300000
+
+import argparse
+import csv
+import time
+
+import faiss
+import numpy as np
+
+from retrieval.embeddings import BACKEND, BACKENDS, load_encoder
+from retrieval.index_factory import INDEX_TYPES, make_index, stored_vectors, training_size
+from retrieval.index_store import open_index
+from retrieval.metadata import INDEX_DIR
+
+TEST_CASES_CSV = "data/test_cases_travel_assistant.csv"
+
+
+def load_corpus(index_dir, scale, seed=0):
+    index, documents, deleted, _ = open_index(index_dir)
+    ids = np.flatnonzero(~deleted)
+    vectors = stored_vectors(index, ids).astype("float32")
+    if scale and scale > len(vectors):
+        rng = np.random.default_rng(seed)
+        extra = vectors[rng.integers(0, len(vectors), scale - len(vectors))]
+        noise = rng.normal(0, vectors.std() * 0.1, extra.shape).astype("float32")
+        vectors = np.vstack([vectors, extra + noise])
+    return vectors
+
+
+def load_queries(backend, corpus, sample, seed=0):
+    with open(TEST_CASES_CSV, newline="", encoding="utf-8") as f:
+        texts = [row["query"] for row in csv.DictReader(f)]
+    encoded = load_encoder(backend).encode(texts)
+    rng = np.random.default_rng(seed)
+    return np.vstack([encoded, corpus[rng.choice(len(corpus), sample, replace=False)]])
+
+
+def latency_ms(index, queries, k):
+    timings = []
+    for q in queries:
+        start = time.perf_counter()
+        index.search(q[None, :], k)
+        timings.append(time.perf_counter() - start)
+    return np.percentile(timings, 50) * 1000, np.percentile(timings, 99) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall / latency / memory per index type")
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    parser.add_argument("--types", nargs="+", choices=INDEX_TYPES, default=list(INDEX_TYPES))
+    parser.add_argument("--scale", type=int, default=0, help="grow the corpus to this many vectors")
+    parser.add_argument("--sample-queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--ef-search", type=int, default=64)
+    parser.add_argument("--backend", choices=BACKENDS, default=BACKEND, help="embedding backend for the queries")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.index_dir, args.scale)
+    queries = load_queries(args.backend, corpus, min(args.sample_queries, len(corpus)))
+    ids = np.arange(len(corpus), dtype=np.int64)
+    print(f"{len(corpus)} vectors, {len(queries)} queries, recall@{args.k} against exact search\n")
+
+    truth = None
+    print(f"{'type':>6} {'build s':>8} {'recall':>7} {'p50 ms':>8} {'p99 ms':>8} {'size MB':>8}")
+    for index_type in ["flat"] + [t for t in args.types if t != "flat"]:
+        start = time.perf_counter()
+        index = make_index(index_type, corpus.shape[1], len(corpus), nprobe=args.nprobe, ef_search=args.ef_search)
+        if training_size(index):
+            rng = np.random.default_rng(0)
+            index.train(corpus[rng.choice(len(corpus), min(len(corpus), training_size(index)), replace=False)])
+        index.add_with_ids(corpus, ids)
+        build_s = time.perf_counter() - start
+
+        _, found = index.search(queries, args.k)
+        if truth is None:
+            truth = found
+        recall = np.mean([len(set(f) & set(t)) / args.k for f, t in zip(found, truth)])
+        p50, p99 = latency_ms(index, queries, args.k)
+        size_mb = faiss.serialize_index(index).nbytes / 1e6
+        if index_type in args.types:
+            print(f"{index_type:>6} {build_s:>8.2f} {recall:>7.3f} {p50:>8.3f} {p99:>8.3f} {size_mb:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# src/benchmarks/bench_itinerary.py
+#
+# Itinerary planner check on synthetic cities: places scattered over a few
+# neighbourhoods around the hotel, a mix of attractions (some closed one
+# weekday), restaurants and nightlife with their own opening hours, and
+# ratings / review counts drawn like real ones. Every plan is re-checked
+# independently (each place at most once, visits inside opening hours, back
+# at the hotel before the day ends) and timed with and without the 2-opt /
+# or-opt improvement rounds. Run from services/backend/src:
+#
+#     python -m benchmarks.bench_itinerary --places 200 --days 7
+
+import argparse
+import time
+
+import numpy as np
+
+from planning.itinerary import (DAY_START, DEFAULT_OPENING_HOURS, EVENING_END, OPENING_HOURS, VISIT_MINUTES,
+                                place_scores, plan_itinerary, travel_minutes)
+
+CATEGORIES = ["attraction", "restaurant", "nightlife"]
+CATEGORY_SHARE = [0.6, 0.25, 0.15]
+
+
+def synthetic_city(rng, n, days):
+    """Places around a hotel in the centre of a random city, as plan_itinerary arguments."""
+    centre = rng.uniform(-50, 60), rng.uniform(-120, 140)
+    hubs = rng.normal(0, 0.04, size=(rng.integers(3, 7), 2))  # neighbourhoods within ~5 km
+    hub = rng.integers(0, len(hubs), n)
+    offsets = hubs[hub] + rng.normal(0, 0.01, size=(n, 2))
+    lat = centre[0] + offsets[:, 0]
+    lng = centre[1] + offsets[:, 1] / np.cos(np.radians(centre[0]))
+
+    category = rng.choice(len(CATEGORIES), n, p=CATEGORY_SHARE)
+    visit = np.array([VISIT_MINUTES[CATEGORIES[c]] for c in category], dtype=float)
+    visit *= rng.uniform(0.5, 1.25, n).round(1)
+    hours = [OPENING_HOURS.get(c, DEFAULT_OPENING_HOURS) for c in CATEGORIES]
+    open_min = np.array([hours[c][0] for c in category], dtype=float)[:, None].repeat(days, 1)
+    close_min = np.array([hours[c][1] for c in category], dtype=float)[:, None].repeat(days, 1)
+    # A third of the attractions are closed on one day of the trip
+    closed = np.flatnonzero((category == 0) & (rng.random(n) < 1 / 3))
+    close_min[closed, rng.integers(0, days, len(closed))] = 0
+
+    rating = np.where(rng.random(n) < 0.1, 0, rng.uniform(3.5, 5.0, n).round(1))
+    reviews = rng.lognormal(5, 1.5, n).astype(int)
+    return {"lat": lat, "lng": lng, "score": place_scores(rating, reviews), "visit_min": visit,
+            "open_min": open_min, "close_min": close_min, "start": centre}, category
+
+
+def check(plan, city, travel, days, day_end):
+    """Raises if the plan visits a place twice, misses a window or overruns a day."""
+    n = len(city["score"])
+    seen = set()
+    for d, stops in enumerate(plan["days"]):
+        t, at = DAY_START, n
+        for stop in stops:
+            place = stop["place"]
+            assert place not in seen, f"place {place} planned twice"
+            seen.add(place)
+            t = max(t + travel[at, place], city["open_min"][place, d])
+            assert abs(t - stop["start"]) < 1e-6, f"day {d + 1}: schedule of place {place} is off"
+            assert t + city["visit_min"][place] <= city["close_min"][place, d] + 1e-6, \
+                f"day {d + 1}: place {place} visited outside its opening hours"
+            t, at = t + city["visit_min"][place], place
+        assert t + travel[at, n] <= day_end + 1e-6, f"day {d + 1} ends after {day_end}"
+    assert seen.isdisjoint(plan["unvisited"]) and len(seen) + len(plan["unvisited"]) == n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Itinerary planner speed and quality check")
+    parser.add_argument("--places", type=int, default=200)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--cities", type=int, default=10)
+    parser.add_argument("--day-end", type=int, default=EVENING_END, help="minutes after midnight")
+    parser.add_argument("--max-seconds", type=float, default=1.0,
+                        help="fail if planning one city takes longer than this")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{args.places} places, {args.days} days, {DAY_START // 60}:00-{args.day_end // 60}:00, "
+          f"{args.cities} cities\n")
+    print(f"{'city':>4} {'greedy ms':>10} {'full ms':>8} {'visits':>7} {'nightlife':>9} {'score +%':>9} "
+          f"{'travel min/visit':>17}")
+
+    worst = 0.0
+    nightlife = CATEGORIES.index("nightlife")
+    for c in range(args.cities):
+        city, category = synthetic_city(rng, args.places, args.days)
+        travel = travel_minutes(np.append(city["lat"], city["start"][0]), np.append(city["lng"], city["start"][1]))
+        runs = {}
+        for improve in (False, True):
+            start = time.perf_counter()
+            plan = plan_itinerary(**city, days=args.days, day_start=DAY_START, day_end=args.day_end,
+                                  improve=improve)
+            runs[improve] = (time.perf_counter() - start, plan)
+            check(plan, city, travel, args.days, args.day_end)
+        (greedy_s, greedy), (full_s, full) = runs[False], runs[True]
+        worst = max(worst, full_s)
+        per_visit = {}
+        for name, plan in (("greedy", greedy), ("full", full)):
+            visits = sum(len(stops) for stops in plan["days"])
+            per_visit[name] = (visits, sum(plan["travel_min"]) / max(visits, 1))
+        evening = sum(category[stop["place"]] == nightlife for stops in full["days"] for stop in stops)
+        print(f"{c:>4} {greedy_s * 1000:>10.1f} {full_s * 1000:>8.1f} {per_visit['full'][0]:>7} {evening:>9} "
+              f"{100 * (full['score'] / greedy['score'] - 1):>9.1f} "
+              f"{per_visit['greedy'][1]:>8.1f} -> {per_visit['full'][1]:<5.1f}")
+
+    print(f"\nslowest plan: {worst * 1000:.1f} ms; every plan respects opening hours and day budgets")
+    if worst > args.max_seconds:
+        raise SystemExit(f"Planning took {worst:.2f} s > {args.max_seconds} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# src/benchmarks/bench_keyword_index.py
+#
+# Compares the posting-list keyword index with the substring scan the
+# Streamlit filters used, on synthetic documents generated from
+# data/kaggle_trips.csv. Run from the repository root:
+#
+#     PYTHONPATH=services/backend/src python -m benchmarks.bench_keyword_index --sizes 10000 100000 1000000
+
+import argparse
+import csv
+import random
+import time
+
+import numpy as np
+
+from retrieval.keyword_index import KeywordIndex
+from retrieval.metadata import ACTIVITY_TAGS, load_place_vocabulary
+
+TRIPS_CSV = "data/kaggle_trips.csv"
+
+QUERIES = {
+    "country": ["denver"],
+    "countries": ["france", "new york", "kyrgyz republic"],
+    "activities": ["hiking", "museum"],
+    "prefix": ["beach", "temp"],
+}
+
+
+def synthetic_documents(n, seed=0):
+    """Trip documents built from kaggle_trips.csv rows, resampled up to `n`."""
+    rng = random.Random(seed)
+    with open(TRIPS_CSV, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    places = load_place_vocabulary()
+    docs = []
+    for i in range(n):
+        row = rows[i % len(rows)]
+        place = rng.choice(places).title()
+        activities = ", ".join(rng.sample(ACTIVITY_TAGS, 2))
+        docs.append(
+            f"A {row['duration_days']}-day {row['trip_type']} trip from {row['origin']} to "
+            f"{row['destination']} near {place} by {row['travel_mode']} with {activities}. "
+            f"Budget: ${row['budget_usd']}. Pets: {row['pets']}."
+        )
+    return docs
+
+
+def substring_scan(documents, keywords):
+    return np.array(
+        [i for i, doc in enumerate(documents) if any(k.strip() in doc.lower() for k in keywords)],
+        dtype=np.int32,
+    )
+
+
+def best_of(fn, repeats):
+    best = float("inf")
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keyword index vs substring scan")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        documents = synthetic_documents(n)
+        start = time.perf_counter()
+        index = KeywordIndex.build(documents)
+        build_s = time.perf_counter() - start
+        print(f"\n{n} docs: index build {build_s:.2f} s, {len(index.tokens)} tokens, "
+              f"{index.postings.nbytes / 1e6:.1f} MB postings")
+        print(f"{'query':>12} {'matches':>9} {'scan ms':>10} {'index ms':>10} {'speedup':>8}")
+        for name, keywords in QUERIES.items():
+            scan_ms, expected = best_of(lambda: substring_scan(documents, keywords), 1 if n >= 1000000 else args.repeats)
+            index_ms, got = best_of(lambda: index.any_of(keywords, documents), args.repeats)
+            if not np.array_equal(expected, got):
+                raise SystemExit(f"Result mismatch for {keywords} at {n} docs")
+            print(f"{name:>12} {len(got):>9} {scan_ms:>10.2f} {index_ms:>10.2f} {scan_ms / index_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
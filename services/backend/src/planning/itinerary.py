@@ -0,0 +1,369 @@
+# src/planning/itinerary.py
+#
+# Turns collected places (attractions, restaurants, nightlife) into an
+# ordered day-by-day plan: which places to visit, on which day and in what
+# order, so that every day fits between leaving and getting back to the
+# hotel, every visit falls inside the place's opening hours, and the total
+# score of what is visited is as high as possible.
+#
+# This is a prize-collecting routing problem with one route per day (a team
+# orienteering problem with time windows), solved heuristically:
+#
+#   - travel times come from one vectorised haversine matrix (x detour /
+#     typical door-to-door speed, plus a fixed overhead per leg), or from a
+#     duration matrix supplied by the caller (e.g. Distance Matrix answers);
+#   - construction is greedy insertion over all days at once: every
+#     (place, day, position) is scored with NumPy and the best
+#     score^2 / added-minutes that keeps the schedule feasible is inserted.
+#     Feasibility is O(1) per candidate thanks to the per-stop wait and
+#     "max shift" slack, and only the day that changed is re-evaluated;
+#   - each day is then shortened with 2-opt and or-opt moves that keep every
+#     time window, the time freed is offered to the places still unvisited,
+#     and the two repeat until nothing changes.
+#
+# Times are minutes after midnight throughout.
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+DETOUR_FACTOR = 1.3
+SPEED_KMH = 22.0  # mixed walking / transit / taxi in a city
+LEG_OVERHEAD_MIN = 5.0  # getting out, finding the entrance, queueing
+DAY_START = 9 * 60
+DAY_END = 19 * 60
+# plan_places runs days this late when there is nightlife to fit in, as bars
+# and clubs only open at 18:00; with DAY_END they could never be visited
+EVENING_END = 24 * 60
+UNRATED_SCORE = 3.0  # rating used for places nobody has rated yet
+MAX_ROUNDS = 5  # improve / re-insert rounds
+
+# Default visit length and opening hours per place category
+VISIT_MINUTES = {"attraction": 120, "restaurant": 75, "cafe": 45, "nightlife": 120, "shopping": 90}
+DEFAULT_VISIT_MINUTES = 90
+OPENING_HOURS = {"restaurant": (11 * 60 + 30, 23 * 60), "nightlife": (18 * 60, 26 * 60)}
+DEFAULT_OPENING_HOURS = (9 * 60, 18 * 60)
+# PlaceRecord's category names -> the ones above
+CATEGORY_NAMES = {"attractions": "attraction", "restaurants": "restaurant", "hotels": "hotel"}
+
+_EPS = 1e-6
+
+
+# ───────────────────────────────────────
+# Travel times and scores
+# ───────────────────────────────────────
+def haversine_matrix(lat, lng):
+    """N x N great-circle distances (km) between points given in degrees."""
+    lat = np.radians(np.asarray(lat, dtype=float))
+    lng = np.radians(np.asarray(lng, dtype=float))
+    a = (np.sin((lat[:, None] - lat[None, :]) / 2) ** 2
+         + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin((lng[:, None] - lng[None, :]) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def travel_minutes(lat, lng, speed_kmh=SPEED_KMH, detour=DETOUR_FACTOR, overhead=LEG_OVERHEAD_MIN):
+    """N x N estimated door-to-door travel minutes; zero on the diagonal."""
+    minutes = haversine_matrix(lat, lng) * (detour / speed_kmh * 60.0) + overhead
+    np.fill_diagonal(minutes, 0.0)
+    return minutes
+
+
+def place_scores(rating, reviews):
+    """Visit value of places: the rating, weighted by how many people gave it."""
+    rating = np.asarray(rating, dtype=float)
+    reviews = np.maximum(np.asarray(reviews, dtype=float), 0.0)
+    return np.where(rating > 0, rating, UNRATED_SCORE) * (1.0 + np.log1p(reviews))
+
+
+# ───────────────────────────────────────
+# Schedules
+# ───────────────────────────────────────
+class _Day:
+    """One day's route (place indices, hotel excluded) and its schedule."""
+
+    def __init__(self, index, depot, opens, latest, day_start, day_end, T, visit):
+        self.index = index
+        self.depot = depot
+        self.opens = opens  # (N + 1,) earliest start per node, the hotel last
+        self.latest = latest  # (N + 1,) latest start per node
+        self.opens_list = opens.tolist()
+        self.latest_list = latest.tolist()
+        self.day_start = day_start
+        self.day_end = day_end
+        self.route = []
+        self.reschedule(T, visit)
+
+    def nodes(self, route=None):
+        return [self.depot, *(self.route if route is None else route), self.depot]
+
+    def simulate(self, route, T, visit):
+        """Start times along depot + route + depot, or None if a window is missed."""
+        nodes = self.nodes(route)
+        starts = [self.day_start]
+        t = self.day_start
+        for prev, node in zip(nodes, nodes[1:]):
+            t = max(t + visit[prev] + T[prev][node], self.opens_list[node])
+            if t > self.latest_list[node] + _EPS:
+                return None
+            starts.append(t)
+        return starts
+
+    def reschedule(self, T, visit):
+        """Recomputes start, wait and max-shift arrays for the current route."""
+        nodes = self.nodes()
+        starts, arrivals = [self.day_start], [self.day_start]
+        for prev, node in zip(nodes, nodes[1:]):
+            arrivals.append(starts[-1] + visit[prev] + T[prev][node])
+            starts.append(max(arrivals[-1], self.opens_list[node]))
+        self.node_array = np.asarray(nodes)
+        self.start = np.asarray(starts, dtype=float)
+        self.wait = self.start - np.asarray(arrivals, dtype=float)
+        # How far each stop's start can slip without breaking it or any later stop
+        max_shift = np.empty(len(nodes))
+        max_shift[-1] = self.day_end - self.start[-1]
+        for k in range(len(nodes) - 2, -1, -1):
+            max_shift[k] = min(self.latest_list[nodes[k]] - self.start[k], self.wait[k + 1] + max_shift[k + 1])
+        self.max_shift = max_shift
+
+    def travel(self, route, T):
+        nodes = self.nodes(route)
+        return sum(T[a][b] for a, b in zip(nodes, nodes[1:]))
+
+
+def _insertion_ratios(day, candidates, score, visit, T):
+    """
+    Best insertion of every candidate into `day`.
+
+    Returns:
+        tuple: (ratio, position) arrays over the candidates; ratio is -inf
+        where no position keeps the day feasible.
+    """
+    nodes = day.node_array
+    prev, nxt = nodes[:-1], nodes[1:]
+    leave = day.start[:-1] + visit[prev]  # (Q,)
+    to_c = T[np.ix_(prev, candidates)].T  # (C, Q) prev -> c
+    from_c = T[np.ix_(candidates, nxt)]  # (C, Q) c -> next
+    begin = np.maximum(leave[None, :] + to_c, day.opens[candidates][:, None])
+    shift = begin + visit[candidates][:, None] + from_c - (leave + T[prev, nxt])[None, :]
+    feasible = ((begin <= day.latest[candidates][:, None] + _EPS)
+                & (shift <= (day.wait[1:] + day.max_shift[1:])[None, :] + _EPS))
+    ratio = np.where(feasible, (score[candidates] ** 2)[:, None] / np.maximum(shift, _EPS), -np.inf)
+    position = ratio.argmax(axis=1)
+    return ratio[np.arange(len(candidates)), position], position
+
+
+# ───────────────────────────────────────
+# Construction and improvement
+# ───────────────────────────────────────
+def _insert_greedy(days, visited, score, visit, T, T_list, visit_list):
+    """Greedy insertion over all days until nothing more fits; returns the number inserted."""
+    n = len(score)
+    candidates = np.flatnonzero(~visited & (score > 0))
+    if not len(candidates):
+        return 0
+    ratios = np.full((len(days), n), -np.inf)
+    positions = np.zeros((len(days), n), dtype=int)
+    for day in days:
+        ratios[day.index, candidates], positions[day.index, candidates] = _insertion_ratios(
+            day, candidates, score, visit, T)
+
+    inserted = 0
+    while True:
+        best = int(ratios.argmax())
+        d, place = divmod(best, n)
+        if not np.isfinite(ratios[d, place]):
+            return inserted
+        day = days[d]
+        day.route.insert(int(positions[d, place]), place)
+        day.reschedule(T_list, visit_list)
+        visited[place] = True
+        ratios[:, place] = -np.inf
+        inserted += 1
+        candidates = np.flatnonzero(np.isfinite(ratios[d]))
+        ratios[d] = -np.inf
+        if len(candidates):
+            ratios[d, candidates], positions[d, candidates] = _insertion_ratios(day, candidates, score, visit, T)
+
+
+def _two_opt(day, T, T_list, visit_list):
+    """Applies improving segment reversals, best first; True if the route changed."""
+    changed = False
+    while len(day.route) >= 2:
+        nodes = day.node_array
+        k = len(nodes)
+        i, j = np.triu_indices(k - 1, 1)  # reverse nodes[i..j], 1 <= i < j <= k - 2
+        keep = i >= 1
+        i, j = i[keep], j[keep]
+        delta = (T[nodes[i - 1], nodes[j]] + T[nodes[i], nodes[j + 1]]
+                 - T[nodes[i - 1], nodes[i]] - T[nodes[j], nodes[j + 1]])
+        current = day.travel(day.route, T_list)
+        for m in np.argsort(delta):
+            if delta[m] >= -_EPS:
+                return changed
+            a, b = i[m] - 1, j[m] - 1  # route indices
+            route = day.route[:a] + day.route[a:b + 1][::-1] + day.route[b + 1:]
+            if day.travel(route, T_list) < current - _EPS and day.simulate(route, T_list, visit_list):
+                day.route = route
+                day.reschedule(T_list, visit_list)
+                changed = True
+                break
+        else:
+            return changed
+    return changed
+
+
+def _or_opt(day, T_list, visit_list, max_segment=3):
+    """Moves segments of 1..max_segment stops elsewhere in the day; True if the route changed."""
+    changed = False
+    while True:
+        nodes = day.nodes()
+        current = day.travel(day.route, T_list)
+        moves = []
+        for length in range(1, min(max_segment, len(day.route)) + 1):
+            for i in range(1, len(nodes) - length):
+                p, first, last, q = nodes[i - 1], nodes[i], nodes[i + length - 1], nodes[i + length]
+                removed = T_list[p][first] + T_list[last][q] - T_list[p][q]
+                for j in range(len(nodes) - 1):
+                    if i - 1 <= j <= i + length - 1:
+                        continue
+                    u, v = nodes[j], nodes[j + 1]
+                    delta = T_list[u][first] + T_list[last][v] - T_list[u][v] - removed
+                    if delta < -_EPS:
+                        moves.append((delta, i, length, j))
+        moves.sort()
+        for _, i, length, j in moves:
+            a = i - 1  # route indices
+            segment = day.route[a:a + length]
+            rest = day.route[:a] + day.route[a + length:]
+            at = j if j < a else j - length
+            route = rest[:at] + segment + rest[at:]
+            if day.travel(route, T_list) < current - _EPS and day.simulate(route, T_list, visit_list):
+                day.route = route
+                day.reschedule(T_list, visit_list)
+                changed = True
+                break
+        else:
+            return changed
+
+
+def plan_itinerary(lat, lng, score, visit_min, days, open_min=None, close_min=None, start=None,
+                   day_start=DAY_START, day_end=DAY_END, travel=None, improve=True):
+    """
+    Chooses and orders the places to visit on each day.
+
+    Args:
+        lat, lng (array-like): (N,) place coordinates in degrees.
+        score (array-like): (N,) value of visiting each place; places scoring
+            0 are never planned.
+        visit_min (array-like): (N,) minutes spent at each place.
+        days (int): Number of days.
+        open_min, close_min (array-like | None): (N,) or (N, days) opening
+            hours; a visit starts at or after opening and ends by closing,
+            and close <= open marks a closed day. Always open by default.
+        start (tuple | None): (lat, lng) every day starts and ends at,
+            typically the hotel; the centroid of the places by default.
+        day_start, day_end (float): When each day starts and must be over.
+        travel (np.ndarray | None): (N + 1, N + 1) travel minutes with the
+            start as the last row/column; estimated from coordinates when
+            omitted.
+        improve (bool): Run the 2-opt / or-opt improvement rounds.
+
+    Returns:
+        dict: "days" (one list per day of {"place", "arrive", "start",
+        "end"} stops in visiting order), "back" (time back at the start per
+        day), "travel_min" (per day), "score" (total of the planned places)
+        and "unvisited" (place indices left out).
+    """
+    score = np.asarray(score, dtype=float)
+    n = len(score)
+    visit = np.append(np.asarray(visit_min, dtype=float), 0.0)
+    if travel is None:
+        lat, lng = np.asarray(lat, dtype=float), np.asarray(lng, dtype=float)
+        if start is None:
+            start = (float(lat.mean()), float(lng.mean())) if n else (0.0, 0.0)
+        travel = travel_minutes(np.append(lat, start[0]), np.append(lng, start[1]))
+    T = np.asarray(travel, dtype=float)
+    T_list, visit_list = T.tolist(), visit.tolist()
+
+    # (days, N) opening hours; a closed day has close <= open, so nothing fits
+    opens = np.broadcast_to(np.asarray(0.0 if open_min is None else open_min, dtype=float).T, (days, n))
+    closes = np.broadcast_to(np.asarray(np.inf if close_min is None else close_min, dtype=float).T, (days, n))
+    plan_days = []
+    for d in range(days):
+        day_opens = np.append(opens[d], day_start)
+        # Visits end by closing and leave time to get back before the day is over
+        day_latest = np.append(np.minimum(closes[d], day_end - T[:n, n]) - visit[:n], day_end)
+        plan_days.append(_Day(d, n, day_opens, day_latest, day_start, day_end, T_list, visit_list))
+
+    visited = np.zeros(n, dtype=bool)
+    for round_ in range(MAX_ROUNDS):
+        inserted = _insert_greedy(plan_days, visited, score, visit, T, T_list, visit_list)
+        if not improve or (round_ and not inserted):
+            break
+        changed = False
+        for day in plan_days:
+            changed |= _two_opt(day, T, T_list, visit_list)
+            changed |= _or_opt(day, T_list, visit_list)
+        if not changed:
+            break
+
+    result = {"days": [], "back": [], "travel_min": [], "score": float(score[visited].sum()),
+              "unvisited": np.flatnonzero(~visited).tolist()}
+    for day in plan_days:
+        nodes = day.nodes()
+        stops = []
+        for k, place in enumerate(day.route, start=1):
+            arrive = day.start[k] - day.wait[k]
+            stops.append({"place": place, "arrive": float(arrive), "start": float(day.start[k]),
+                          "end": float(day.start[k] + visit[place])})
+        result["days"].append(stops)
+        result["back"].append(float(day.start[-1]))
+        result["travel_min"].append(float(sum(T[a, b] for a, b in zip(nodes, nodes[1:]))))
+    return result
+
+
+def _category(place):
+    """The place's category, picking the first that has its own visit length."""
+    names = [place["category"]] if place.get("category") else place.get("categories") or []
+    names = [CATEGORY_NAMES.get(name, name) for name in names]
+    return next((name for name in names if name in VISIT_MINUTES), names[0] if names else "")
+
+
+def _coordinates(place):
+    location = place.get("location") or {}
+    return place.get("lat", location.get("lat")), place.get("lng", location.get("lng"))
+
+
+def plan_places(places, days, start=None, **options):
+    """
+    Plans place dicts as collected: utils.geo.get_places ("lat", "lng",
+    "category") or PlaceRecord.to_dict ("location", "categories"), with
+    optional "rating", "reviews" / "user_ratings_total", "visit_min",
+    "open_min" and "close_min". Visit lengths and opening hours default per
+    category, and days run until EVENING_END rather than DAY_END when there
+    is nightlife among the places, unless `day_end` is given.
+
+    Returns:
+        list: One list per day of (place, stop) pairs in visiting order;
+        places without coordinates are never planned.
+    """
+    located = [(p, *_coordinates(p)) for p in places]
+    located = [(p, lat, lng) for p, lat, lng in located if lat is not None and lng is not None]
+    if not located:
+        return [[] for _ in range(days)]
+    categories = [_category(p) for p, _, _ in located]
+    hours = [OPENING_HOURS.get(c, DEFAULT_OPENING_HOURS) for c in categories]
+    options.setdefault("day_end", EVENING_END if "nightlife" in categories else DAY_END)
+    plan = plan_itinerary(
+        [lat for _, lat, _ in located],
+        [lng for _, _, lng in located],
+        place_scores([p.get("rating") or 0 for p, _, _ in located],
+                     [p.get("reviews") or p.get("user_ratings_total") or 0 for p, _, _ in located]),
+        [p.get("visit_min") or VISIT_MINUTES.get(c, DEFAULT_VISIT_MINUTES)
+         for (p, _, _), c in zip(located, categories)],
+        days,
+        open_min=[p.get("open_min", h[0]) for (p, _, _), h in zip(located, hours)],
+        close_min=[p.get("close_min", h[1]) for (p, _, _), h in zip(located, hours)],
+        start=start,
+        **options,
+    )
+    return [[(located[stop["place"]][0], stop) for stop in stops] for stops in plan["days"]]
@@ -0,0 +1,189 @@
+# src/retrieval/bm25.py
+
+import os
+import sys
+from collections import Counter
+
+import numpy as np
+
+from retrieval.keyword_index import TOKEN_RE, merge_postings, truncated_offsets
+
+INDEX_DIR = "data/index"
+BM25_INDEX_PATH = os.path.join(INDEX_DIR, "bm25.npz")
+
+K1 = 1.2
+B = 0.75
+
+
+class BM25Index:
+    """
+    Okapi BM25 over the indexed documents, stored as sparse arrays: a sorted
+    token array, CSR offsets into concatenated (doc ID, term frequency)
+    postings and the token length of every document. Scoring a query only
+    touches the postings of its own tokens, so a candidate set is a few
+    milliseconds away however large the corpus is.
+    """
+
+    def __init__(self, tokens, offsets, doc_ids, tfs, doc_lens):
+        self.tokens = tokens
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.doc_lens = doc_lens
+        self.num_docs = len(doc_lens)
+        self.avg_len = float(doc_lens.mean()) if len(doc_lens) else 0.0
+        # Length normalization of the default k1/b, per document
+        self._norm = self._length_norm(K1, B)
+
+    def _length_norm(self, k1, b):
+        return (k1 * (1 - b + b * self.doc_lens / max(self.avg_len, 1.0))).astype(np.float32)
+
+    @classmethod
+    def build(cls, documents):
+        token_postings = {}
+        doc_lens = []
+        for doc_id, doc in enumerate(documents):
+            counts = Counter(TOKEN_RE.findall(doc.lower()))
+            doc_lens.append(sum(counts.values()))
+            for token, tf in counts.items():
+                token_postings.setdefault(token, []).append((doc_id, tf))
+
+        tokens = sorted(token_postings)
+        offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(token_postings[t]) for t in tokens])
+        doc_ids = np.empty(offsets[-1], dtype=np.int32)
+        tfs = np.empty(offsets[-1], dtype=np.uint16)
+        for i, token in enumerate(tokens):
+            postings = np.array(token_postings[token], dtype=np.int64)
+            doc_ids[offsets[i]:offsets[i + 1]] = postings[:, 0]
+            tfs[offsets[i]:offsets[i + 1]] = np.minimum(postings[:, 1], np.iinfo(np.uint16).max)
+        return cls(np.array(tokens, dtype=str), offsets, doc_ids, tfs, np.array(doc_lens, dtype=np.int32))
+
+    @classmethod
+    def merged(cls, paths, prefix=""):
+        """
+        Joins parts saved with `arrays(prefix)` into .npz files, each built
+        over one run of documents, into one index numbered in file order.
+        """
+        lens = []
+
+        def part_docs(data):
+            lens.append(data[prefix + "doc_lens"])
+            return len(lens[-1])
+
+        tokens, offsets, postings, _ = merge_postings(paths, prefix, "doc_ids", ["doc_ids", "tfs"], part_docs)
+        doc_lens = np.concatenate(lens) if lens else np.empty(0, dtype=np.int32)
+        return cls(tokens, offsets, postings.get("doc_ids", np.empty(0, dtype=np.int32)),
+                   postings.get("tfs", np.empty(0, dtype=np.uint16)), doc_lens)
+
+    def extended(self, documents):
+        """Returns a new index that also covers `documents`, numbered after the current ones."""
+        delta = BM25Index.build(documents)
+        old_pos = {t: i for i, t in enumerate(self.tokens.tolist())}
+        new_pos = {t: i for i, t in enumerate(delta.tokens.tolist())}
+        tokens = sorted(old_pos.keys() | new_pos.keys())
+
+        id_lists, tf_lists = [], []
+        for token in tokens:
+            ids, tfs = [], []
+            if token in old_pos:
+                start, end = self.offsets[old_pos[token]], self.offsets[old_pos[token] + 1]
+                ids.append(self.doc_ids[start:end])
+                tfs.append(self.tfs[start:end])
+            if token in new_pos:
+                start, end = delta.offsets[new_pos[token]], delta.offsets[new_pos[token] + 1]
+                ids.append(delta.doc_ids[start:end] + np.int32(self.num_docs))
+                tfs.append(delta.tfs[start:end])
+            id_lists.append(np.concatenate(ids))
+            tf_lists.append(np.concatenate(tfs))
+
+        offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(ids) for ids in id_lists])
+        doc_ids = np.concatenate(id_lists).astype(np.int32) if id_lists else np.empty(0, dtype=np.int32)
+        tfs = np.concatenate(tf_lists).astype(np.uint16) if tf_lists else np.empty(0, dtype=np.uint16)
+        return BM25Index(np.array(tokens, dtype=str), offsets, doc_ids, tfs,
+                         np.concatenate([self.doc_lens, delta.doc_lens]))
+
+    def truncated(self, num_docs):
+        """Returns the index restricted to documents below `num_docs` (e.g. dropping an uncommitted add)."""
+        if num_docs >= self.num_docs:
+            return self
+        keep = self.doc_ids < num_docs
+        tokens, offsets = truncated_offsets(self.tokens, self.offsets, keep)
+        return BM25Index(tokens, offsets, self.doc_ids[keep], self.tfs[keep], self.doc_lens[:num_docs])
+
+    def arrays(self, prefix=""):
+        """The arrays `save` writes, keyed by `prefix` + name (for storing parts beside other arrays)."""
+        return {prefix + "tokens": self.tokens, prefix + "offsets": self.offsets, prefix + "doc_ids": self.doc_ids,
+                prefix + "tfs": self.tfs, prefix + "doc_lens": self.doc_lens}
+
+    def save(self, path=BM25_INDEX_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **self.arrays())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=BM25_INDEX_PATH):
+        with np.load(path) as data:
+            return cls(data["tokens"], data["offsets"], data["doc_ids"], data["tfs"], data["doc_lens"])
+
+    def scores(self, query, k1=K1, b=B):
+        """
+        BM25 scores of every document sharing a token with `query`.
+
+        Returns:
+            tuple: (ids, scores), ids sorted ascending.
+        """
+        norms = self._norm if (k1, b) == (K1, B) else self._length_norm(k1, b)
+        query_tokens = sorted(set(TOKEN_RE.findall(query.lower())))
+        positions = np.searchsorted(self.tokens, query_tokens) if query_tokens else np.empty(0, dtype=np.int64)
+        ids, weights = [], []
+        for token, pos in zip(query_tokens, positions):
+            if pos >= len(self.tokens) or self.tokens[pos] != token:
+                continue
+            start, end = self.offsets[pos], self.offsets[pos + 1]
+            doc_ids = self.doc_ids[start:end]
+            tf = self.tfs[start:end].astype(np.float32)
+            df = end - start
+            idf = np.log1p((self.num_docs - df + 0.5) / (df + 0.5))
+            ids.append(doc_ids)
+            weights.append(np.float32(idf * (k1 + 1)) * tf / (tf + norms[doc_ids]))
+        if not ids:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+
+        # Documents matching several tokens are merged over the postings alone,
+        # so the cost follows the postings touched, not the corpus size
+        ids, slots = np.unique(np.concatenate(ids), return_inverse=True)
+        totals = np.bincount(slots, np.concatenate(weights), minlength=len(ids))
+        return ids.astype(np.int32), totals.astype(np.float32)
+
+    def top(self, query, n=300, mask=None):
+        """
+        The `n` best-scoring documents for `query`, optionally restricted to `mask`.
+
+        Returns:
+            tuple: (ids, scores) in descending score order.
+        """
+        ids, scores = self.scores(query)
+        if mask is not None and len(ids):
+            keep = mask[np.minimum(ids, len(mask) - 1)] & (ids < len(mask))
+            ids, scores = ids[keep], scores[keep]
+        if len(ids) > n:
+            best = np.argpartition(-scores, n - 1)[:n]
+            ids, scores = ids[best], scores[best]
+        order = np.argsort(-scores, kind="stable")
+        return ids[order], scores[order]
+
+
+if __name__ == "__main__":
+    # Builds bm25.npz for an existing index directory:
+    #     python -m retrieval.bm25 [data/index]
+    from retrieval.index_store import load_documents
+
+    index_dir = sys.argv[1] if len(sys.argv) > 1 else INDEX_DIR
+    out_path = os.path.join(index_dir, os.path.basename(BM25_INDEX_PATH))
+    docs = load_documents(index_dir)
+    BM25Index.build(docs).save(out_path)
+    print(f"Wrote BM25 index for {len(docs)} documents to {out_path}")
@@ -0,0 +1,309 @@
+# src/retrieval/build_index.py
+#
+# Offline builder for data/index: streams the trip and airport CSVs in
+# chunks, encodes them in fixed-size batches across worker processes and
+# publishes travel_index.faiss, the doc store, metadata.npz, keywords.npz,
+# bm25.npz together, plus the entity store when run with --ner (the same
+# worker processes then run spaCy NER). Finished chunks are checkpointed, so
+# an interrupted build picks up where it stopped. Run from the repository
+# root:
+#
+#     PYTHONPATH=services/backend/src python -m retrieval.build_index --workers 4
+
+import argparse
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+
+import faiss
+import numpy as np
+
+from retrieval.bm25 import BM25Index
+from retrieval.doc_store import append_documents, write_doc_store
+from retrieval.embeddings import BACKEND, BACKENDS, MODEL_DIR, load_encoder
+from retrieval.entities import NER_MODEL, append_entities, encode_entities, extract_entities_batch, load_ner
+from retrieval.index_factory import INDEX_TYPES, make_index, training_size
+from retrieval.index_store import (BM25_FILE, INDEX_FILE, KEYWORDS_FILE, METADATA_FILE, publish_directory, read_generation,
+                                   write_manifest)
+from retrieval.keyword_index import KeywordIndex
+from retrieval.metadata import INDEX_DIR, extract_metadata, load_place_vocabulary, save_metadata
+
+TRIPS_CSV = "data/kaggle_trips.csv"
+AIRPORTS_CSV = "data/open_travel_data.csv"
+# Bumped whenever chunk checkpoints change shape, so older ones are not resumed from
+CHECKPOINT_FORMAT = 3
+
+
+# ───────────────────────────────────────
+# Documents
+# ───────────────────────────────────────
+def trip_document(row):
+    return (
+        f"A {row['duration_days']}-day {row['trip_type']} trip from {row['origin']} to "
+        f"{row['destination']} by {row['travel_mode']}. Budget: ${row['budget_usd']}. "
+        f"Pets allowed: {row['pets']}."
+    )
+
+
+def airport_document(row):
+    # Coordinates are left out on purpose: their digits would trip the budget filter.
+    return f"{row['airport_name']} ({row['iata_code']}) serves {row['city']}, {row['country']}."
+
+
+SOURCES = {
+    "trips": (TRIPS_CSV, trip_document),
+    "airports": (AIRPORTS_CSV, airport_document),
+}
+
+
+def iter_chunks(sources, chunk_size):
+    """Yields lists of at most `chunk_size` documents, reading the CSVs lazily."""
+    chunk = []
+    for path, to_document in sources:
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                chunk.append(to_document(row))
+                if len(chunk) == chunk_size:
+                    yield chunk
+                    chunk = []
+    if chunk:
+        yield chunk
+
+
+# ───────────────────────────────────────
+# Encoding and NER workers
+# ───────────────────────────────────────
+_model = None
+_nlp = None
+
+
+def _load_model(backend, model_dir, ner_model=None):
+    global _model, _nlp
+    _model = load_encoder(backend, model_dir)
+    _nlp = load_ner(ner_model) if ner_model else None
+
+
+def _ner_available(ner_model):
+    try:
+        load_ner(ner_model)
+    except (ImportError, OSError) as e:
+        logging.warning("Skipping entity extraction: cannot load spaCy pipeline '%s' (%s)", ner_model, e)
+        return False
+    return True
+
+
+def _encode_batch(batch):
+    return _model.encode(batch, batch_size=len(batch))
+
+
+def _entities_batch(batch):
+    return encode_entities(extract_entities_batch(batch, _nlp, batch_size=len(batch)))
+
+
+def _batches(chunk, batch_size):
+    return [chunk[i:i + batch_size] for i in range(0, len(chunk), batch_size)]
+
+
+def encode_chunk(chunk, batch_size, pool=None):
+    batches = _batches(chunk, batch_size)
+    encoded = pool.imap(_encode_batch, batches) if pool else map(_encode_batch, batches)
+    return np.vstack(list(encoded))
+
+
+def chunk_entities(chunk, batch_size, pool=None):
+    """JSON-encoded entity lists for every document of the chunk."""
+    batches = _batches(chunk, batch_size)
+    extracted = pool.imap(_entities_batch, batches) if pool else map(_entities_batch, batches)
+    return [ents for batch in extracted for ents in batch]
+
+
+# ───────────────────────────────────────
+# Checkpoints and publishing
+# ───────────────────────────────────────
+def _chunk_path(work_dir, n):
+    return os.path.join(work_dir, f"chunk_{n:06d}.npz")
+
+
+def _write_chunk(work_dir, n, docs, embeddings, metadata, entities=None):
+    """Checkpoints one chunk: documents, embeddings, metadata columns, entities and its keyword and BM25 parts."""
+    path = _chunk_path(work_dir, n)
+    tmp_path = path + ".tmp"
+    extra = {**KeywordIndex.build(docs).arrays("keywords_"), **BM25Index.build(docs).arrays("bm25_")}
+    if entities is not None:
+        extra["entities"] = np.array(entities, dtype=object)
+    with open(tmp_path, "wb") as f:
+        np.savez(f, docs=np.array(docs, dtype=object), embeddings=embeddings, **extra,
+                 **{f"meta_{key}": value for key, value in metadata.items()})
+    os.replace(tmp_path, path)
+
+
+def _check_build_config(work_dir, config, restart):
+    config_path = os.path.join(work_dir, "build.json")
+    if restart:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    os.makedirs(work_dir, exist_ok=True)
+    if os.path.exists(config_path):
+        with open(config_path, encoding="utf-8") as f:
+            previous = json.load(f)
+        if previous != config:
+            raise ValueError(
+                f"{work_dir} holds a build with different settings ({previous}); pass --restart to discard it."
+            )
+        logging.info("Resuming build from %s", work_dir)
+    else:
+        with open(config_path, "w", encoding="utf-8") as f:
+            json.dump(config, f)
+
+
+def _chunk_embeddings(work_dir, n):
+    with np.load(_chunk_path(work_dir, n), allow_pickle=True) as data:
+        return data["embeddings"]
+
+
+def _train(index, work_dir, num_chunks, seed=0):
+    """Trains IVF indexes on an even random sample drawn from every chunk."""
+    sample_size = training_size(index)
+    if not sample_size:
+        return
+    rng = np.random.default_rng(seed)
+    per_chunk = -(-sample_size // num_chunks)
+    sample = []
+    for n in range(num_chunks):
+        embeddings = _chunk_embeddings(work_dir, n)
+        take = min(per_chunk, len(embeddings))
+        sample.append(embeddings[rng.choice(len(embeddings), take, replace=False)])
+    index.train(np.vstack(sample))
+
+
+def _assemble(work_dir, num_chunks, num_rows, staging_dir, generation, index_options):
+    os.makedirs(staging_dir, exist_ok=True)
+    write_doc_store(staging_dir, [])
+    dim = _chunk_embeddings(work_dir, 0).shape[1]
+    index = make_index(index_options.get("index_type", "flat"), dim, num_rows,
+                       **{k: v for k, v in index_options.items() if k != "index_type"})
+    _train(index, work_dir, num_chunks)
+
+    num_docs = 0
+    columns = {}
+    for n in range(num_chunks):
+        with np.load(_chunk_path(work_dir, n), allow_pickle=True) as data:
+            embeddings = data["embeddings"]
+            index.add_with_ids(embeddings, np.arange(num_docs, num_docs + len(embeddings), dtype=np.int64))
+            num_docs = append_documents(staging_dir, data["docs"].tolist())
+            if "entities" in data.files:
+                append_entities(staging_dir, data["entities"].tolist())
+            for key in data.files:
+                if key.startswith("meta_"):
+                    columns.setdefault(key[len("meta_"):], []).append(data[key])
+
+    # Vocabularies are the same for every chunk; the per-document columns are stacked.
+    metadata = {
+        key: parts[0] if key.endswith("_vocab") else np.concatenate(parts)
+        for key, parts in columns.items()
+    }
+
+    faiss.write_index(index, os.path.join(staging_dir, INDEX_FILE))
+    save_metadata(metadata, os.path.join(staging_dir, METADATA_FILE))
+    # Built per chunk while encoding; only the numeric postings are merged here
+    chunk_paths = [_chunk_path(work_dir, n) for n in range(num_chunks)]
+    KeywordIndex.merged(chunk_paths, "keywords_").save(os.path.join(staging_dir, KEYWORDS_FILE))
+    BM25Index.merged(chunk_paths, "bm25_").save(os.path.join(staging_dir, BM25_FILE))
+    write_manifest(staging_dir, generation, num_docs)
+    return num_docs
+
+
+def build_index(sources=("trips", "airports"), out_dir=INDEX_DIR, chunk_size=10000, batch_size=256,
+                workers=1, model_dir=MODEL_DIR, restart=False, index_options=None, backend=BACKEND,
+                ner_model=None):
+    """
+    Builds the retrieval index directory from the source CSVs.
+
+    Memory is bounded by one chunk of documents and embeddings while
+    encoding; each finished chunk is checkpointed to `<out_dir>.build/`
+    with its keyword and BM25 parts. Assembly streams the chunks into the
+    doc store and FAISS index and merges the parts, so it holds the final
+    arrays but never the documents.
+    `index_options` are passed to `make_index` (index_type, nlist, pq_m,
+    hnsw_m, nprobe, ef_search) and only affect assembly, so they can change
+    when resuming. Entities are extracted with the spaCy `ner_model` in the
+    same worker processes when one is given and it loads; otherwise they are
+    skipped with a warning.
+
+    Returns:
+        int: Number of documents in the published index.
+    """
+    if ner_model and not _ner_available(ner_model):
+        ner_model = None
+    work_dir = out_dir.rstrip("/") + ".build"
+    config = {"format": CHECKPOINT_FORMAT, "sources": list(sources), "chunk_size": chunk_size, "model": model_dir,
+              "backend": backend, "ner_model": ner_model}
+    _check_build_config(work_dir, config, restart)
+
+    places = load_place_vocabulary()
+    pool = None
+    if workers > 1:
+        ctx = multiprocessing.get_context("spawn")
+        pool = ctx.Pool(workers, initializer=_load_model, initargs=(backend, model_dir, ner_model))
+    else:
+        _load_model(backend, model_dir, ner_model)
+
+    num_chunks = 0
+    num_rows = 0
+    try:
+        for n, chunk in enumerate(iter_chunks([SOURCES[name] for name in sources], chunk_size)):
+            num_chunks = n + 1
+            num_rows += len(chunk)
+            if os.path.exists(_chunk_path(work_dir, n)):
+                continue
+            embeddings = encode_chunk(chunk, batch_size, pool)
+            entities = chunk_entities(chunk, batch_size, pool) if ner_model else None
+            _write_chunk(work_dir, n, chunk, embeddings, extract_metadata(chunk, places), entities)
+            logging.info("Encoded chunk %d (%d documents)", n, len(chunk))
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    staging_dir = os.path.join(work_dir, "staging")
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    generation = read_generation(out_dir) + 1 if os.path.exists(out_dir) else 1
+    total = _assemble(work_dir, num_chunks, num_rows, staging_dir, generation, index_options or {})
+    publish_directory(staging_dir, out_dir)
+    shutil.rmtree(work_dir, ignore_errors=True)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the FAISS index and document store")
+    parser.add_argument("--sources", nargs="+", choices=sorted(SOURCES), default=["trips", "airports"])
+    parser.add_argument("--out", default=INDEX_DIR)
+    parser.add_argument("--chunk-size", type=int, default=10000, help="rows read and checkpointed at a time")
+    parser.add_argument("--batch-size", type=int, default=256, help="sentences per encode call")
+    parser.add_argument("--workers", type=int, default=1, help="encoding processes")
+    parser.add_argument("--model-dir", default=MODEL_DIR, help="local model exported by retrieval.embeddings")
+    parser.add_argument("--backend", choices=BACKENDS, default=BACKEND, help="embedding backend")
+    parser.add_argument("--ner", action="store_true", help="extract and store document entities (needs spaCy)")
+    parser.add_argument("--ner-model", default=NER_MODEL, help="spaCy pipeline used with --ner")
+    parser.add_argument("--restart", action="store_true", help="discard checkpoints from an interrupted build")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default="flat")
+    parser.add_argument("--nlist", type=int, help="IVF lists (default ~4*sqrt(n))")
+    parser.add_argument("--nprobe", type=int, default=16, help="IVF lists visited per query")
+    parser.add_argument("--pq-m", type=int, default=48, help="IVF-PQ bytes per vector; must divide the dimension")
+    parser.add_argument("--hnsw-m", type=int, default=32, help="HNSW neighbours per node")
+    parser.add_argument("--ef-search", type=int, default=64, help="HNSW candidates per query")
+    args = parser.parse_args()
+
+    index_options = {"index_type": args.index_type, "nlist": args.nlist, "nprobe": args.nprobe,
+                     "pq_m": args.pq_m, "hnsw_m": args.hnsw_m, "ef_search": args.ef_search}
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    total = build_index(args.sources, args.out, args.chunk_size, args.batch_size, args.workers,
+                        args.model_dir, args.restart, index_options, args.backend,
+                        args.ner_model if args.ner else None)
+    print(f"Indexed {total} documents into {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# src/retrieval/cache.py
+
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+_SPACES_RE = re.compile(r"\s+")
+
+
+def normalize_query(text):
+    """
+    Cache key for a query: case-folded, whitespace collapsed. The
+    all-MiniLM-L6-v2 tokenizer lower-cases and splits on whitespace, so
+    queries that differ only in these respects encode to the same vector.
+    Only used as a key; the encoder is always given the query as typed.
+    """
+    return _SPACES_RE.sub(" ", text.casefold()).strip()
+
+
+class LRUCache:
+    """Bounded, thread-safe LRU map with hit/miss counters."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class QueryEncoder:
+    """Wraps an encoder with an LRU cache of query embeddings keyed on normalized text."""
+
+    def __init__(self, encoder, maxsize=4096):
+        self.encoder = encoder
+        self.cache = LRUCache(maxsize)
+
+    def encode(self, query):
+        """Returns the (1, dim) float32 embedding of `query`."""
+        key = normalize_query(query)
+        embedding = self.cache.get(key)
+        if embedding is None:
+            embedding = self.encoder.encode([query])
+            embedding.setflags(write=False)
+            self.cache.put(key, embedding)
+        return embedding
+
+
+def filter_key(filters):
+    """Hashable, order-insensitive form of the filter arguments of `filter_mask`."""
+    key = []
+    for name in sorted(filters):
+        value = filters[name]
+        if isinstance(value, (list, tuple)) and name in ("countries", "activities"):
+            value = tuple(sorted({v.strip().lower() for v in value}))
+        elif isinstance(value, (list, tuple)):
+            value = tuple(value)
+        key.append((name, value))
+    return tuple(key)
+
+
+class ResultCache:
+    """
+    LRU cache of top-k results keyed on (query, filters, k, retrieval mode,
+    index generation). Entries from an older generation can never match
+    again, so the whole cache is dropped the first time a newer generation
+    is seen.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.cache = LRUCache(maxsize)
+        self.generation = None
+        self.invalidations = 0
+
+    def _check_generation(self, generation):
+        if generation != self.generation:
+            if self.generation is not None:
+                self.cache.clear()
+                self.invalidations += 1
+            self.generation = generation
+
+    def key(self, query, filters, k, mode="dense"):
+        return normalize_query(query), filter_key(filters), k, mode
+
+    def get(self, key, generation):
+        self._check_generation(generation)
+        return self.cache.get((generation,) + key)
+
+    def put(self, key, generation, result):
+        self._check_generation(generation)
+        for array in result:
+            np.asarray(array).setflags(write=False)
+        self.cache.put((generation,) + key, result)
+
+    def stats(self):
+        return dict(self.cache.stats(), generation=self.generation, invalidations=self.invalidations)
@@ -0,0 +1,147 @@
+# src/retrieval/doc_store.py
+#
+# Binary document store: documents.bin holds the UTF-8 text of every
+# document back to back and documents.offsets holds n + 1 little-endian
+# int64 byte offsets into it. Both files are only ever appended to, and
+# readers mmap them, so every process on a node shares one copy of the
+# corpus through the page cache and opening the store costs the same for
+# ten documents or ten million. Other per-document text (the entities of
+# retrieval.entities) uses the same format under a different file name.
+
+import mmap
+import os
+
+import numpy as np
+
+BLOB_FILE = "documents.bin"
+OFFSETS_FILE = "documents.offsets"
+
+_OFFSET_DTYPE = np.dtype("<i8")
+
+
+def _paths(index_dir, name):
+    return os.path.join(index_dir, name + ".bin"), os.path.join(index_dir, name + ".offsets")
+
+
+class DocStore:
+    """Read-only, lazily decoded view of the first `num_docs` documents."""
+
+    def __init__(self, blob, offsets):
+        self._blob = blob
+        self._offsets = offsets
+
+    @classmethod
+    def open(cls, index_dir, num_docs=None, name="documents"):
+        """
+        Maps the store in `index_dir`.
+
+        Args:
+            num_docs (int | None): Committed document count from the manifest;
+                anything appended after it is ignored. None maps everything.
+            name (str): File name stem of the store.
+        """
+        blob_path, offsets_path = _paths(index_dir, name)
+        available = os.path.getsize(offsets_path) // _OFFSET_DTYPE.itemsize - 1
+        num_docs = available if num_docs is None else min(num_docs, available)
+        offsets = np.memmap(offsets_path, dtype=_OFFSET_DTYPE, mode="r", shape=(num_docs + 1,))
+
+        # Map only the committed bytes, so a writer truncating an uncommitted tail is harmless
+        blob_bytes = int(offsets[-1])
+        blob = b""
+        if blob_bytes:
+            with open(blob_path, "rb") as f:
+                blob = mmap.mmap(f.fileno(), blob_bytes, access=mmap.ACCESS_READ)
+        return cls(blob, offsets)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError(f"document {i} out of range")
+        return self._blob[self._offsets[i]:self._offsets[i + 1]].decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def close(self):
+        if isinstance(self._blob, mmap.mmap):
+            self._blob.close()
+
+
+def _committed_size(offsets_path):
+    count = os.path.getsize(offsets_path) // _OFFSET_DTYPE.itemsize - 1
+    return count, np.fromfile(offsets_path, dtype=_OFFSET_DTYPE, count=1, offset=count * _OFFSET_DTYPE.itemsize)[0]
+
+
+def append_documents(index_dir, documents, num_docs=None, name="documents"):
+    """
+    Appends documents to the store, creating it when missing.
+
+    Args:
+        num_docs (int | None): Committed document count; a longer store is
+            first truncated back to it (the tail of an interrupted append).
+
+    Returns:
+        int: Document count after the append.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    blob_path, offsets_path = _paths(index_dir, name)
+    if not os.path.exists(offsets_path):
+        with open(blob_path, "wb"), open(offsets_path, "wb") as f:
+            np.zeros(1, dtype=_OFFSET_DTYPE).tofile(f)
+
+    count, end = _committed_size(offsets_path)
+    if num_docs is not None and num_docs < count:
+        count = num_docs
+        end = np.fromfile(offsets_path, dtype=_OFFSET_DTYPE, count=1, offset=count * _OFFSET_DTYPE.itemsize)[0]
+
+    with open(blob_path, "r+b") as blob, open(offsets_path, "r+b") as offsets:
+        blob.truncate(end)
+        offsets.truncate((count + 1) * _OFFSET_DTYPE.itemsize)
+        blob.seek(0, os.SEEK_END)
+        offsets.seek(0, os.SEEK_END)
+
+        batch = []
+        for doc in documents:
+            data = doc.encode("utf-8")
+            blob.write(data)
+            end += len(data)
+            batch.append(end)
+            count += 1
+            if len(batch) == 65536:
+                np.asarray(batch, dtype=_OFFSET_DTYPE).tofile(offsets)
+                batch = []
+        np.asarray(batch, dtype=_OFFSET_DTYPE).tofile(offsets)
+
+        # Durable before the caller commits the new count to the manifest
+        blob.flush()
+        os.fsync(blob.fileno())
+        offsets.flush()
+        os.fsync(offsets.fileno())
+    return count
+
+
+def write_doc_store(index_dir, documents, name="documents"):
+    """Writes a fresh store from any iterable of strings, streaming it to disk."""
+    for path in _paths(index_dir, name):
+        if os.path.exists(path):
+            os.remove(path)
+    return append_documents(index_dir, documents, name=name)
+
+
+if __name__ == "__main__":
+    # Converts a pickled document list into the binary store:
+    #     python -m retrieval.doc_store data/index/documents.pkl [data/index]
+    import pickle
+    import sys
+
+    pickle_path = sys.argv[1]
+    out_dir = sys.argv[2] if len(sys.argv) > 2 else os.path.dirname(pickle_path)
+    with open(pickle_path, "rb") as f:
+        docs = pickle.load(f)
+    print(f"Wrote {write_doc_store(out_dir, docs)} documents to {out_dir}")
@@ -0,0 +1,175 @@
+# src/retrieval/embeddings.py
+#
+# Pluggable sentence encoders. All backends load from a local model
+# directory (written once by `export`) and never touch the network:
+#
+#   torch       SentenceTransformer in fp32 (the reference)
+#   torch-int8  the same model with its Linear layers dynamically quantized to int8
+#   onnx        ONNX Runtime over an exported graph, mean pooling done in NumPy
+#   onnx-int8   ONNX Runtime over a dynamically int8-quantized export
+#
+#     PYTHONPATH=services/backend/src python -m retrieval.embeddings export --model-dir models/all-MiniLM-L6-v2
+
+import argparse
+import json
+import os
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+MODEL_DIR = os.getenv("EMBEDDING_MODEL_DIR", os.path.join("models", MODEL_NAME))
+BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+ONNX_FILE = os.path.join("onnx", "model.onnx")
+ONNX_INT8_FILE = os.path.join("onnx", "model_qint8.onnx")
+
+
+def _offline():
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+
+class TorchEncoder:
+    def __init__(self, model_dir, quantize=False):
+        if os.path.isdir(model_dir):
+            _offline()
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_dir, device="cpu")
+        if quantize:
+            self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    def encode(self, texts, batch_size=32):
+        return self.model.encode(list(texts), batch_size=batch_size).astype("float32")
+
+
+class OnnxEncoder:
+    """Tokenizer + ONNX graph + the pooling/normalization modules listed in modules.json."""
+
+    def __init__(self, model_dir, onnx_file=ONNX_FILE, threads=None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(os.path.join(model_dir, onnx_file), options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        with open(os.path.join(model_dir, "sentence_bert_config.json"), encoding="utf-8") as f:
+            max_length = json.load(f).get("max_seq_length", 256)
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length)
+        self.tokenizer.enable_padding()
+
+        with open(os.path.join(model_dir, "modules.json"), encoding="utf-8") as f:
+            self.normalize = any(m["type"].endswith("Normalize") for m in json.load(f))
+
+    def _encode_batch(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        token_embeddings = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0]
+
+        mask = feeds["attention_mask"][..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype("float32")
+
+    def encode(self, texts, batch_size=32):
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, self.session.get_outputs()[0].shape[-1]), dtype="float32")
+        # Sorting by length keeps padding per batch small; results go back in input order
+        order = np.argsort([len(t) for t in texts])
+        out = [None] * len(texts)
+        for start in range(0, len(texts), batch_size):
+            idx = order[start:start + batch_size]
+            for i, vec in zip(idx, self._encode_batch([texts[i] for i in idx])):
+                out[i] = vec
+        return np.vstack(out)
+
+
+def load_encoder(backend=BACKEND, model_dir=MODEL_DIR):
+    """
+    Returns an object with `encode(texts, batch_size) -> float32 array`.
+
+    Without a local model directory the plain torch backend falls back to
+    the hub model name (and may download it), as the app always did.
+
+    Raises:
+        FileNotFoundError: If another backend's model directory or export is
+            missing; run `python -m retrieval.embeddings export` once first.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}'; expected one of {', '.join(BACKENDS)}")
+    if backend == "torch" and not os.path.isdir(model_dir):
+        return TorchEncoder(MODEL_NAME)
+    if not os.path.isdir(model_dir):
+        raise FileNotFoundError(f"No local model at {model_dir}; run `python -m retrieval.embeddings export` first.")
+    if backend == "torch":
+        return TorchEncoder(model_dir)
+    if backend == "torch-int8":
+        return TorchEncoder(model_dir, quantize=True)
+    onnx_file = ONNX_FILE if backend == "onnx" else ONNX_INT8_FILE
+    if not os.path.exists(os.path.join(model_dir, onnx_file)):
+        raise FileNotFoundError(f"No ONNX export at {os.path.join(model_dir, onnx_file)}; run the export command first.")
+    return OnnxEncoder(model_dir, onnx_file)
+
+
+def export(model_dir=MODEL_DIR, model_name=MODEL_NAME):
+    """
+    Saves the SentenceTransformer model locally, exports its transformer to
+    ONNX and writes a dynamically int8-quantized copy. This is the only step
+    that may download anything.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    if not os.path.isdir(model_dir):
+        SentenceTransformer(model_name, device="cpu").save(model_dir)
+    model = SentenceTransformer(model_dir, device="cpu")
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+
+    sample = tokenizer(["A 3-day trip to Goa"], return_tensors="pt")
+    names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic = {name: {0: "batch", 1: "sequence"} for name in names}
+    dynamic["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    onnx_path = os.path.join(model_dir, ONNX_FILE)
+    os.makedirs(os.path.dirname(onnx_path), exist_ok=True)
+    with torch.no_grad():
+        torch.onnx.export(transformer, tuple(sample[name] for name in names), onnx_path,
+                          input_names=names, output_names=["last_hidden_state"],
+                          dynamic_axes=dynamic, opset_version=14)
+    quantize_dynamic(onnx_path, os.path.join(model_dir, ONNX_INT8_FILE), weight_type=QuantType.QInt8)
+    if not os.path.exists(os.path.join(model_dir, "tokenizer.json")):
+        tokenizer.save_pretrained(model_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local embedding model management")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_cmd = commands.add_parser("export", help="save the model locally and write ONNX / int8 exports")
+    export_cmd.add_argument("--model-dir", default=MODEL_DIR)
+    export_cmd.add_argument("--model", default=MODEL_NAME)
+    args = parser.parse_args()
+
+    export(args.model_dir, args.model)
+    print(f"Exported {args.model} to {args.model_dir}")
+
+
+if __name__ == "__main__":
+    main()
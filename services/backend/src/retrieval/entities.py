@@ -0,0 +1,85 @@
+# src/retrieval/entities.py
+#
+# Named entities of the indexed documents. Documents never change once
+# indexed, so the NER pipeline runs once per document at build time (in the
+# build's worker processes) and the results are stored next to the doc store
+# as entities.bin / entities.offsets, one JSON list of [text, label] pairs per
+# document ID. Query time is then a lookup; `extract_entities_batch` covers
+# ad-hoc text and index directories built before entities were stored.
+
+import json
+import os
+
+from retrieval.doc_store import DocStore, append_documents, write_doc_store
+
+NER_MODEL = os.getenv("NER_MODEL", "en_core_web_sm")
+ENTITIES_NAME = "entities"
+ENTITIES_FILE = ENTITIES_NAME + ".offsets"
+
+# Only the entity recognizer and the embedding layer it listens to are needed
+_UNUSED_PIPES = ("tagger", "parser", "attribute_ruler", "lemmatizer", "senter")
+
+
+def load_ner(model=NER_MODEL):
+    import spacy
+
+    return spacy.load(model, disable=_UNUSED_PIPES)
+
+
+def extract_entities_batch(texts, nlp=None, batch_size=64, n_process=1):
+    """
+    Runs NER over many texts in one pass through `nlp.pipe`.
+
+    Args:
+        texts (list[str]): Texts to analyse.
+        nlp: Loaded spaCy pipeline; loads NER_MODEL when None.
+        batch_size (int): Texts per pipeline batch.
+        n_process (int): spaCy worker processes.
+
+    Returns:
+        list[list[tuple[str, str]]]: (text, label) pairs per input text.
+    """
+    nlp = nlp or load_ner()
+    return [
+        [(ent.text, ent.label_) for ent in doc.ents]
+        for doc in nlp.pipe(texts, batch_size=batch_size, n_process=n_process)
+    ]
+
+
+# ───────────────────────────────────────
+# Storage
+# ───────────────────────────────────────
+def encode_entities(entities):
+    return [json.dumps(ents, ensure_ascii=False) for ents in entities]
+
+
+class EntityStore:
+    """Read-only view of the stored entities, indexed by document ID."""
+
+    def __init__(self, store):
+        self._store = store
+
+    @classmethod
+    def open(cls, index_dir, num_docs=None):
+        """Maps the entity store in `index_dir`, or returns None when the index has none."""
+        if not os.path.exists(os.path.join(index_dir, ENTITIES_FILE)):
+            return None
+        return cls(DocStore.open(index_dir, num_docs, name=ENTITIES_NAME))
+
+    def __len__(self):
+        return len(self._store)
+
+    def __getitem__(self, doc_id):
+        return [tuple(ent) for ent in json.loads(self._store[int(doc_id)])]
+
+    def close(self):
+        self._store.close()
+
+
+def append_entities(index_dir, entities, num_docs=None):
+    """Appends already encoded entity lists; same truncation semantics as `append_documents`."""
+    return append_documents(index_dir, entities, num_docs, name=ENTITIES_NAME)
+
+
+def write_entities(index_dir, entities):
+    return write_doc_store(index_dir, entities, name=ENTITIES_NAME)
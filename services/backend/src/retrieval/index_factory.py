@@ -0,0 +1,129 @@
+# src/retrieval/index_factory.py
+
+import math
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "ivf", "ivfpq", "hnsw")
+
+
+def default_nlist(num_vectors):
+    """~4 * sqrt(n) inverted lists, the usual starting point for IVF."""
+    return max(1, min(65536, int(4 * math.sqrt(max(num_vectors, 1)))))
+
+
+def make_index(index_type, dim, num_vectors, nlist=None, pq_m=48, hnsw_m=32, nprobe=16, ef_search=64):
+    """
+    Creates an empty index keyed by document ID.
+
+    Args:
+        index_type (str): "flat" (exact), "ivf" (IVF-Flat), "ivfpq" (IVF-PQ,
+            `pq_m` bytes per vector) or "hnsw".
+        dim (int): Embedding dimension.
+        num_vectors (int): Expected corpus size, used to size `nlist`.
+        nprobe (int): Inverted lists visited per IVF query.
+        ef_search (int): HNSW candidate list size per query.
+
+    Returns:
+        faiss.Index: Flat and HNSW indexes are wrapped in an IndexIDMap2; IVF
+        indexes store the IDs themselves. IVF indexes must be trained.
+    """
+    if index_type == "flat":
+        return faiss.index_factory(dim, "IDMap2,Flat")
+    if index_type == "hnsw":
+        index = faiss.index_factory(dim, f"IDMap2,HNSW{hnsw_m}")
+        faiss.downcast_index(index.index).hnsw.efSearch = ef_search
+        return index
+    if index_type in ("ivf", "ivfpq"):
+        nlist = nlist or default_nlist(num_vectors)
+        codec = "Flat" if index_type == "ivf" else f"PQ{pq_m}"
+        index = faiss.index_factory(dim, f"IVF{nlist},{codec}")
+        index.nprobe = nprobe
+        return index
+    raise ValueError(f"Unknown index type '{index_type}'; expected one of {', '.join(INDEX_TYPES)}")
+
+
+def training_size(index):
+    """Vectors to sample for `index.train`; 0 when the index needs no training."""
+    if index.is_trained:
+        return 0
+    # FAISS wants ~39 points per centroid; PQ codebooks need 256 per sub-quantizer
+    return max(39 * faiss.extract_index_ivf(index).nlist, 256 * 39)
+
+
+def index_type_of(index):
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if isinstance(inner, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(inner, faiss.IndexIVFPQ):
+        return "ivfpq"
+    if isinstance(inner, faiss.IndexIVF):
+        return "ivf"
+    return "flat"
+
+
+def is_id_mapped(index):
+    """True when the index is keyed by document ID rather than insertion order."""
+    return isinstance(index, (faiss.IndexIDMap, faiss.IndexIVF))
+
+
+def search_parameters(index, selector):
+    """Search parameters of the type the index expects, carrying its own nprobe / efSearch."""
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if isinstance(inner, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=inner.nprobe)
+    if isinstance(inner, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=inner.hnsw.efSearch)
+    return faiss.SearchParameters(sel=selector)
+
+
+def remove_ids(index, selector):
+    """
+    Removes vectors where the index type allows it. HNSW graphs cannot drop
+    nodes, so their deletions live only in the tombstone mask until compaction.
+
+    Returns:
+        bool: Whether the vectors were removed.
+    """
+    if index_type_of(index) == "hnsw":
+        return False
+    index.remove_ids(selector)
+    return True
+
+
+def drop_ids_from(index, first_id):
+    """
+    Removes every vector with an ID >= `first_id`, e.g. those left behind by
+    an add that was interrupted. HNSW graphs cannot drop nodes, so an HNSW
+    index holding such IDs is rebuilt from the vectors below `first_id`.
+
+    Returns:
+        faiss.Index: `index` itself, or its rebuilt copy.
+    """
+    if remove_ids(index, faiss.IDSelectorRange(first_id, np.iinfo(np.int64).max)):
+        return index
+    ids = faiss.vector_to_array(index.id_map)
+    if not (ids >= first_id).any():
+        return index
+    keep = np.sort(ids[ids < first_id])
+    rebuilt = empty_like(index)
+    if len(keep):
+        rebuilt.add_with_ids(stored_vectors(index, keep), keep)
+    return rebuilt
+
+
+def stored_vectors(index, ids):
+    """Vectors stored under `ids` (approximate for PQ codes)."""
+    if isinstance(index, faiss.IndexIVF):
+        index.set_direct_map_type(faiss.DirectMap.Hashtable)
+    return index.reconstruct_batch(ids)
+
+
+def empty_like(index):
+    """A trained, empty index of the same type and settings."""
+    clone = faiss.clone_index(index)
+    clone.reset()
+    if isinstance(clone, faiss.IndexIVF):
+        clone.set_direct_map_type(faiss.DirectMap.NoMap)
+    return clone
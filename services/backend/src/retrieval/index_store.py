@@ -0,0 +1,384 @@
+# src/retrieval/index_store.py
+#
+# On-disk layout of data/index and in-place updates to it. Document IDs are
+# positions in the append-only doc store (retrieval.doc_store) and are used as the external IDs of
+# the ID-mapped FAISS index, so new documents are appended and deletions are
+# tombstones until `compact` renumbers everything. manifest.json is written
+# last on every change; its generation counter tells running apps to reload.
+#
+#     PYTHONPATH=services/backend/src python -m retrieval.index_store add --source trips new_trips.csv
+#     PYTHONPATH=services/backend/src python -m retrieval.index_store delete 12 40 41
+#     PYTHONPATH=services/backend/src python -m retrieval.index_store compact
+
+import argparse
+import csv
+import fcntl
+import json
+import os
+import pickle
+import shutil
+from contextlib import contextmanager
+
+import faiss
+import numpy as np
+
+from retrieval.bm25 import BM25Index
+from retrieval.doc_store import OFFSETS_FILE, DocStore, append_documents, write_doc_store
+from retrieval.embeddings import BACKEND, BACKENDS, MODEL_DIR, load_encoder
+from retrieval.entities import (ENTITIES_FILE, ENTITIES_NAME, EntityStore, append_entities, encode_entities,
+                                extract_entities_batch, load_ner, write_entities)
+from retrieval.index_factory import drop_ids_from, empty_like, is_id_mapped, remove_ids, stored_vectors
+from retrieval.keyword_index import KeywordIndex
+from retrieval.metadata import (INDEX_DIR, METADATA_PATH, extract_metadata, load_metadata, metadata_rows, save_metadata,
+                                truncate_metadata)
+
+INDEX_FILE = "travel_index.faiss"
+LEGACY_DOCS_FILE = "documents.pkl"
+METADATA_FILE = os.path.basename(METADATA_PATH)
+KEYWORDS_FILE = "keywords.npz"
+BM25_FILE = "bm25.npz"
+TOMBSTONES_FILE = "tombstones.npy"
+MANIFEST_FILE = "manifest.json"
+
+
+# ───────────────────────────────────────
+# Manifest and publishing
+# ───────────────────────────────────────
+def read_manifest(index_dir=INDEX_DIR):
+    """
+    Returns {"generation", "num_docs"}; index directories without a
+    manifest are generation 0 and are read in full.
+    """
+    try:
+        with open(os.path.join(index_dir, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"generation": 0, "num_docs": None}
+
+
+def read_generation(index_dir=INDEX_DIR):
+    return read_manifest(index_dir)["generation"]
+
+
+def write_manifest(index_dir, generation, num_docs):
+    """Commits the current doc store length; called after every other file is in place."""
+    path = os.path.join(index_dir, MANIFEST_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"generation": generation, "num_docs": num_docs}, f)
+    os.replace(path + ".tmp", path)
+
+
+def publish_directory(staging_dir, out_dir):
+    """Swaps a fully written directory in, so readers never see a half-written index."""
+    backup_dir = out_dir.rstrip("/") + ".old"
+    shutil.rmtree(backup_dir, ignore_errors=True)
+    if os.path.exists(out_dir):
+        os.replace(out_dir, backup_dir)
+    os.replace(staging_dir, out_dir)
+    shutil.rmtree(backup_dir, ignore_errors=True)
+
+
+@contextmanager
+def _index_lock(index_dir, exclusive):
+    """Single writer, many readers; the lock file lives beside the directory because compaction swaps it."""
+    with open(os.path.join(os.path.dirname(index_dir.rstrip("/")) or ".", ".index.lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _write_index(index, path):
+    faiss.write_index(index, path + ".tmp")
+    os.replace(path + ".tmp", path)
+
+
+# ───────────────────────────────────────
+# Loading
+# ───────────────────────────────────────
+def _load_pickled_documents(index_dir):
+    """Reads a legacy documents.pkl: a pickled list, possibly followed by appended pickled batches."""
+    documents = []
+    with open(os.path.join(index_dir, LEGACY_DOCS_FILE), "rb") as f:
+        while True:
+            try:
+                documents.extend(pickle.load(f))
+            except EOFError:
+                break
+    return documents
+
+
+def load_documents(index_dir=INDEX_DIR, num_docs=None):
+    """Opens the memory-mapped doc store, falling back to a legacy documents.pkl."""
+    if os.path.exists(os.path.join(index_dir, OFFSETS_FILE)):
+        return DocStore.open(index_dir, num_docs)
+    return _load_pickled_documents(index_dir)
+
+
+def _read_index(index_dir, mmap):
+    path = os.path.join(index_dir, INDEX_FILE)
+    # Flat codes can be mapped straight from the file on FAISS builds that support it
+    if mmap and hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+        return faiss.read_index(path, faiss.IO_FLAG_MMAP_IFC)
+    return faiss.read_index(path)
+
+
+def load_tombstones(index_dir, num_docs):
+    deleted = np.zeros(num_docs, dtype=bool)
+    path = os.path.join(index_dir, TOMBSTONES_FILE)
+    if os.path.exists(path):
+        ids = np.load(path)
+        deleted[ids[ids < num_docs]] = True
+    return deleted
+
+
+def as_id_mapped(index):
+    """Wraps a positional index (older builds) in an IndexIDMap2 keyed by doc position."""
+    if is_id_mapped(index):
+        return index
+    mapped = faiss.IndexIDMap2(faiss.IndexFlatL2(index.d))
+    if index.ntotal:
+        mapped.add_with_ids(index.reconstruct_n(0, index.ntotal), np.arange(index.ntotal, dtype=np.int64))
+    return mapped
+
+
+def _open_index(index_dir, mmap=False):
+    manifest = read_manifest(index_dir)
+    index = _read_index(index_dir, mmap)
+    documents = load_documents(index_dir, manifest["num_docs"])
+    deleted = load_tombstones(index_dir, len(documents))
+    if not is_id_mapped(index) and index.ntotal != len(documents):
+        raise ValueError(
+            f"Index holds {index.ntotal} vectors but the document store has {len(documents)} entries; "
+            f"rebuild it with `python -m retrieval.build_index`."
+        )
+    return index, documents, deleted, manifest["generation"]
+
+
+def open_index(index_dir=INDEX_DIR):
+    """
+    Opens the FAISS index, documents and tombstone mask of the current
+    generation. Both the index and the doc store are memory-mapped, so this
+    is read-only and costs about the same for any corpus size.
+
+    Vectors whose IDs are tombstoned or lie past the committed doc store
+    (an interrupted update) can still be in the index; searches must be
+    restricted to `~deleted` over `len(documents)` IDs.
+
+    Returns:
+        tuple: (index, documents, deleted, generation)
+    """
+    with _index_lock(index_dir, exclusive=False):
+        return _open_index(index_dir, mmap=True)
+
+
+def open_snapshot(index_dir=INDEX_DIR):
+    """
+    Loads one consistent generation of everything the search path reads.
+
+    Metadata columns, the keyword index and the BM25 index are built in
+    memory when the directory predates them or they cover fewer documents
+    than the manifest; rows past it (left by an interrupted add) are
+    dropped. `entities` is None when the directory has no entity store.
+
+    Returns:
+        dict: index, documents, deleted, metadata, keyword_index, bm25, entities, generation.
+    """
+    with _index_lock(index_dir, exclusive=False):
+        index, documents, deleted, generation = _open_index(index_dir, mmap=True)
+        metadata_path = os.path.join(index_dir, METADATA_FILE)
+        keywords_path = os.path.join(index_dir, KEYWORDS_FILE)
+        metadata = load_metadata(metadata_path) if os.path.exists(metadata_path) else None
+        keyword_index = KeywordIndex.load(keywords_path) if os.path.exists(keywords_path) else None
+        bm25_path = os.path.join(index_dir, BM25_FILE)
+        bm25 = BM25Index.load(bm25_path) if os.path.exists(bm25_path) else None
+        entities = EntityStore.open(index_dir, len(documents))
+        if entities is not None and len(entities) < len(documents):
+            entities = None
+
+    num_docs = len(documents)
+    if metadata is None or metadata_rows(metadata) < num_docs:
+        metadata = extract_metadata(documents)
+    if keyword_index is None or keyword_index.num_docs < num_docs:
+        keyword_index = KeywordIndex.build(documents)
+    if bm25 is None or bm25.num_docs < num_docs:
+        bm25 = BM25Index.build(documents)
+    metadata = truncate_metadata(metadata, num_docs)
+    keyword_index = keyword_index.truncated(num_docs)
+    bm25 = bm25.truncated(num_docs)
+    return {
+        "index": index,
+        "documents": documents,
+        "deleted": deleted,
+        "metadata": metadata,
+        "keyword_index": keyword_index,
+        "bm25": bm25,
+        "entities": entities,
+        "generation": generation,
+    }
+
+
+# ───────────────────────────────────────
+# Updates
+# ───────────────────────────────────────
+def add_documents(new_documents, model, index_dir=INDEX_DIR, batch_size=256, nlp=None):
+    """
+    Encodes and appends documents without touching the existing vectors.
+    Entities are extracted with `nlp` (loaded on demand) when the index
+    stores them.
+
+    Returns:
+        np.ndarray: The IDs assigned to the new documents.
+    """
+    if not new_documents:
+        return np.empty(0, dtype=np.int64)
+
+    with _index_lock(index_dir, exclusive=True):
+        index, documents, deleted, generation = _open_index(index_dir)
+        index = as_id_mapped(index)
+        # Vectors left behind by an add that never reached the manifest; new
+        # IDs must not inherit them
+        index = drop_ids_from(index, len(documents))
+        ids = np.arange(len(documents), len(documents) + len(new_documents), dtype=np.int64)
+
+        embeddings = model.encode(new_documents, batch_size=batch_size)
+        index.add_with_ids(embeddings, ids)
+
+        if isinstance(documents, list):
+            # First update of a legacy directory: move the pickled list into the doc store
+            write_doc_store(index_dir, documents)
+            write_manifest(index_dir, generation, len(documents))
+        # Also drops the tail of an append that never reached the manifest
+        append_documents(index_dir, new_documents, len(documents))
+
+        # Rows past the committed doc store were written by an add that never
+        # reached the manifest; each file is cut back to it before extending
+        metadata_path = os.path.join(index_dir, METADATA_FILE)
+        if os.path.exists(metadata_path):
+            metadata = truncate_metadata(load_metadata(metadata_path), len(documents))
+            delta = extract_metadata(new_documents, metadata["place_vocab"].tolist(),
+                                     metadata["activity_vocab"].tolist())
+            for key, column in delta.items():
+                if not key.endswith("_vocab"):
+                    metadata[key] = np.concatenate([metadata[key], column])
+            save_metadata(metadata, metadata_path)
+
+        keywords_path = os.path.join(index_dir, KEYWORDS_FILE)
+        if os.path.exists(keywords_path):
+            KeywordIndex.load(keywords_path).truncated(len(documents)).extended(new_documents).save(keywords_path)
+
+        bm25_path = os.path.join(index_dir, BM25_FILE)
+        if os.path.exists(bm25_path):
+            BM25Index.load(bm25_path).truncated(len(documents)).extended(new_documents).save(bm25_path)
+
+        entities = EntityStore.open(index_dir)
+        if entities is not None and len(entities) >= len(documents):
+            extracted = extract_entities_batch(new_documents, nlp or load_ner(), batch_size=batch_size)
+            append_entities(index_dir, encode_entities(extracted), len(documents))
+
+        _write_index(index, os.path.join(index_dir, INDEX_FILE))
+        write_manifest(index_dir, generation + 1, len(documents) + len(new_documents))
+    return ids
+
+
+def delete_documents(doc_ids, index_dir=INDEX_DIR):
+    """Removes documents from the index and tombstones them in the doc store."""
+    with _index_lock(index_dir, exclusive=True):
+        index, documents, deleted, generation = _open_index(index_dir)
+        index = as_id_mapped(index)
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        doc_ids = doc_ids[(doc_ids >= 0) & (doc_ids < len(documents))]
+        doc_ids = np.unique(doc_ids[~deleted[doc_ids]])
+        deleted[doc_ids] = True
+
+        # Tombstones go first: readers mask them out even if the index write below is interrupted
+        tombstones_path = os.path.join(index_dir, TOMBSTONES_FILE)
+        with open(tombstones_path + ".tmp", "wb") as f:
+            np.save(f, np.flatnonzero(deleted))
+        os.replace(tombstones_path + ".tmp", tombstones_path)
+
+        if remove_ids(index, faiss.IDSelectorBatch(doc_ids)):
+            _write_index(index, os.path.join(index_dir, INDEX_FILE))
+        write_manifest(index_dir, generation + 1, len(documents))
+    return len(doc_ids)
+
+
+def compact(index_dir=INDEX_DIR):
+    """
+    Drops tombstoned documents and renumbers the survivors densely, rewriting
+    every file of the index directory in one swap.
+
+    Returns:
+        np.ndarray: old-ID -> new-ID map, -1 for dropped documents.
+    """
+    with _index_lock(index_dir, exclusive=True):
+        index, documents, deleted, generation = _open_index(index_dir)
+        index = as_id_mapped(index)
+        keep = np.flatnonzero(~deleted)
+        id_map = np.full(len(documents), -1, dtype=np.int64)
+        id_map[keep] = np.arange(len(keep))
+
+        # Same type and trained parameters; only the contents are rebuilt
+        compacted = empty_like(index)
+        if len(keep):
+            compacted.add_with_ids(stored_vectors(index, keep), np.arange(len(keep), dtype=np.int64))
+
+        staging_dir = index_dir.rstrip("/") + ".compact"
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        os.makedirs(staging_dir)
+        faiss.write_index(compacted, os.path.join(staging_dir, INDEX_FILE))
+        write_doc_store(staging_dir, (documents[i] for i in keep))
+        kept_docs = DocStore.open(staging_dir)
+
+        metadata_path = os.path.join(index_dir, METADATA_FILE)
+        if os.path.exists(metadata_path):
+            metadata = load_metadata(metadata_path)
+            save_metadata({key: column if key.endswith("_vocab") else column[keep]
+                           for key, column in metadata.items()},
+                          os.path.join(staging_dir, METADATA_FILE))
+        if os.path.exists(os.path.join(index_dir, KEYWORDS_FILE)):
+            KeywordIndex.build(kept_docs).save(os.path.join(staging_dir, KEYWORDS_FILE))
+        if os.path.exists(os.path.join(index_dir, BM25_FILE)):
+            BM25Index.build(kept_docs).save(os.path.join(staging_dir, BM25_FILE))
+        if os.path.exists(os.path.join(index_dir, ENTITIES_FILE)):
+            # Copied as stored JSON; no need to decode them
+            entities = DocStore.open(index_dir, len(documents), name=ENTITIES_NAME)
+            if len(entities) == len(documents):
+                write_entities(staging_dir, (entities[i] for i in keep))
+
+        write_manifest(staging_dir, generation + 1, len(kept_docs))
+        publish_directory(staging_dir, index_dir)
+    return id_map
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental updates to the retrieval index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="append documents built from CSV rows")
+    add.add_argument("--source", choices=["trips", "airports"], required=True)
+    add.add_argument("csv_path")
+    add.add_argument("--model-dir", default=MODEL_DIR)
+    add.add_argument("--backend", choices=BACKENDS, default=BACKEND)
+    delete = commands.add_parser("delete", help="tombstone documents by ID")
+    delete.add_argument("ids", type=int, nargs="+")
+    commands.add_parser("compact", help="reclaim space held by deleted documents")
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    args = parser.parse_args()
+
+    if args.command == "add":
+        from retrieval.build_index import SOURCES
+        to_document = SOURCES[args.source][1]
+        with open(args.csv_path, newline="", encoding="utf-8") as f:
+            new_documents = [to_document(row) for row in csv.DictReader(f)]
+        ids = add_documents(new_documents, load_encoder(args.backend, args.model_dir), args.index_dir)
+        print(f"Added {len(ids)} documents (IDs {ids[0]}-{ids[-1]})" if len(ids) else "Nothing to add")
+    elif args.command == "delete":
+        print(f"Deleted {delete_documents(args.ids, args.index_dir)} documents")
+    else:
+        id_map = compact(args.index_dir)
+        print(f"Compacted to {int((id_map >= 0).sum())} documents")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+# src/retrieval/keyword_index.py
+
+import os
+import re
+import sys
+
+import numpy as np
+
+INDEX_DIR = "data/index"
+KEYWORD_INDEX_PATH = os.path.join(INDEX_DIR, "keywords.npz")
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def truncated_offsets(tokens, offsets, keep):
+    """(tokens, offsets) of a CSR posting layout after keeping only the postings where `keep`."""
+    kept = np.concatenate([[0], np.cumsum(keep, dtype=np.int64)])
+    counts = kept[offsets[1:]] - kept[offsets[:-1]]
+    live = counts > 0
+    new_offsets = np.zeros(int(live.sum()) + 1, dtype=np.int64)
+    new_offsets[1:] = np.cumsum(counts[live])
+    return tokens[live], new_offsets
+
+
+def merge_postings(paths, prefix, id_field, fields, part_docs):
+    """
+    Merges CSR posting parts saved in .npz files (`prefix` + "tokens",
+    "offsets" and one array per posting field), each numbering its
+    documents from 0, into one layout numbered in file order.
+
+    Works in passes over the files (vocabulary, then posting counts, then
+    the postings themselves), so memory holds the merged arrays and one
+    part at a time, never a Python object per posting.
+
+    Args:
+        id_field (str): Posting field holding document IDs; shifted per part.
+        fields (list[str]): Posting fields, `id_field` included.
+        part_docs (callable): Loaded .npz -> number of documents in the part.
+
+    Returns:
+        tuple: (tokens, offsets, {field: array}, total documents)
+    """
+    tokens = np.empty(0, dtype=str)
+    for path in paths:
+        with np.load(path, allow_pickle=True) as data:
+            tokens = np.union1d(tokens, data[prefix + "tokens"])
+
+    counts = np.zeros(len(tokens), dtype=np.int64)
+    for path in paths:
+        with np.load(path, allow_pickle=True) as data:
+            counts[np.searchsorted(tokens, data[prefix + "tokens"])] += np.diff(data[prefix + "offsets"])
+    offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(counts)
+
+    merged = {}
+    fill = offsets[:-1].copy()  # next free slot of every token
+    num_docs = 0
+    for path in paths:
+        with np.load(path, allow_pickle=True) as data:
+            positions = np.searchsorted(tokens, data[prefix + "tokens"])
+            part_offsets = data[prefix + "offsets"]
+            part_counts = np.diff(part_offsets)
+            # Parts come in document order, so appending keeps every posting list sorted
+            dest = np.repeat(fill[positions] - part_offsets[:-1], part_counts) + np.arange(part_offsets[-1])
+            fill[positions] += part_counts
+            for field in fields:
+                values = data[prefix + field]
+                column = merged.setdefault(field, np.empty(offsets[-1], dtype=values.dtype))
+                column[dest] = values + values.dtype.type(num_docs) if field == id_field else values
+            num_docs += part_docs(data)
+    return tokens, offsets, merged, num_docs
+
+
+class KeywordIndex:
+    """
+    Token -> sorted document-ID posting lists, stored CSR-style as a sorted
+    token array, an offsets array and one concatenated postings array.
+
+    Lookups keep the filters' substring semantics (`keyword in doc.lower()`):
+    a keyword token matches every indexed token that contains it, and
+    keywords spanning several tokens are verified against the documents.
+    """
+
+    def __init__(self, tokens, offsets, postings, num_docs):
+        self.tokens = tokens
+        self.offsets = offsets
+        self.postings = postings
+        self.num_docs = int(num_docs)
+
+    @classmethod
+    def build(cls, documents):
+        token_docs = {}
+        for doc_id, doc in enumerate(documents):
+            for token in set(TOKEN_RE.findall(doc.lower())):
+                token_docs.setdefault(token, []).append(doc_id)
+
+        tokens = sorted(token_docs)
+        offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(token_docs[t]) for t in tokens])
+        postings = np.empty(offsets[-1], dtype=np.int32)
+        for i, token in enumerate(tokens):
+            # doc IDs were appended in increasing order, so each list is already sorted
+            postings[offsets[i]:offsets[i + 1]] = token_docs[token]
+        return cls(np.array(tokens, dtype=str), offsets, postings, len(documents))
+
+    @classmethod
+    def merged(cls, paths, prefix=""):
+        """
+        Joins parts saved with `arrays(prefix)` into .npz files, each built
+        over one run of documents, into one index numbered in file order.
+        """
+        tokens, offsets, postings, num_docs = merge_postings(
+            paths, prefix, "postings", ["postings"], lambda data: int(data[prefix + "num_docs"]))
+        return cls(tokens, offsets, postings.get("postings", np.empty(0, dtype=np.int32)), num_docs)
+
+    def extended(self, documents):
+        """Returns a new index that also covers `documents`, numbered after the current ones."""
+        delta = KeywordIndex.build(documents)
+        old_pos = {t: i for i, t in enumerate(self.tokens.tolist())}
+        new_pos = {t: i for i, t in enumerate(delta.tokens.tolist())}
+        tokens = sorted(old_pos.keys() | new_pos.keys())
+
+        lists = []
+        for token in tokens:
+            posting = []
+            if token in old_pos:
+                posting.append(self._posting(old_pos[token]))
+            if token in new_pos:
+                posting.append(delta._posting(new_pos[token]) + np.int32(self.num_docs))
+            lists.append(posting[0] if len(posting) == 1 else np.concatenate(posting))
+
+        offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(p) for p in lists])
+        postings = np.concatenate(lists).astype(np.int32) if lists else np.empty(0, dtype=np.int32)
+        return KeywordIndex(np.array(tokens, dtype=str), offsets, postings, self.num_docs + len(documents))
+
+    def truncated(self, num_docs):
+        """Returns the index restricted to documents below `num_docs` (e.g. dropping an uncommitted add)."""
+        if num_docs >= self.num_docs:
+            return self
+        keep = self.postings < num_docs
+        tokens, offsets = truncated_offsets(self.tokens, self.offsets, keep)
+        return KeywordIndex(tokens, offsets, self.postings[keep], num_docs)
+
+    def arrays(self, prefix=""):
+        """The arrays `save` writes, keyed by `prefix` + name (for storing parts beside other arrays)."""
+        return {prefix + "tokens": self.tokens, prefix + "offsets": self.offsets, prefix + "postings": self.postings,
+                prefix + "num_docs": np.int64(self.num_docs)}
+
+    def save(self, path=KEYWORD_INDEX_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **self.arrays())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=KEYWORD_INDEX_PATH):
+        with np.load(path) as data:
+            return cls(data["tokens"], data["offsets"], data["postings"], data["num_docs"])
+
+    def _posting(self, i):
+        return self.postings[self.offsets[i]:self.offsets[i + 1]]
+
+    def _token_docs(self, token):
+        """Sorted IDs of docs with an indexed token containing `token`."""
+        hits = np.flatnonzero(np.char.find(self.tokens, token) >= 0)
+        if len(hits) == 0:
+            return np.empty(0, dtype=np.int32)
+        if len(hits) == 1:
+            return self._posting(hits[0])
+        return np.unique(np.concatenate([self._posting(i) for i in hits]))
+
+    def keyword_docs(self, keyword, documents=None):
+        """
+        Sorted IDs of docs containing `keyword` as a substring.
+
+        `documents` is only read for keywords that are not a single token
+        (e.g. "new york"), to verify the candidate set.
+        """
+        keyword = keyword.strip().lower()
+        if not keyword:
+            # "" is a substring of everything
+            return np.arange(self.num_docs, dtype=np.int32)
+
+        parts = TOKEN_RE.findall(keyword)
+        if len(parts) == 1 and parts[0] == keyword:
+            return self._token_docs(keyword)
+
+        if parts:
+            candidates = self._token_docs(parts[0])
+            for part in parts[1:]:
+                candidates = np.intersect1d(candidates, self._token_docs(part), assume_unique=True)
+        else:
+            candidates = np.arange(self.num_docs, dtype=np.int32)
+        if documents is None:
+            raise ValueError(f"Keyword '{keyword}' spans several tokens; documents are needed to verify it.")
+        keep = np.fromiter((keyword in documents[i].lower() for i in candidates), dtype=bool, count=len(candidates))
+        return candidates[keep]
+
+    def any_of(self, keywords, documents=None):
+        """Sorted IDs of docs containing any of `keywords` (union of posting lists)."""
+        results = [self.keyword_docs(k, documents) for k in keywords]
+        if not results:
+            return np.empty(0, dtype=np.int32)
+        if len(results) == 1:
+            return results[0]
+        return np.unique(np.concatenate(results))
+
+
+if __name__ == "__main__":
+    # Builds keywords.npz for an existing index directory:
+    #     python -m retrieval.keyword_index [data/index]
+    from retrieval.index_store import load_documents
+
+    index_dir = sys.argv[1] if len(sys.argv) > 1 else INDEX_DIR
+    out_path = os.path.join(index_dir, os.path.basename(KEYWORD_INDEX_PATH))
+    docs = load_documents(index_dir)
+    KeywordIndex.build(docs).save(out_path)
+    print(f"Wrote keyword index for {len(docs)} documents to {out_path}")
@@ -0,0 +1,210 @@
+# src/retrieval/metadata.py
+
+import csv
+import os
+import re
+import sys
+
+import numpy as np
+
+INDEX_DIR = "data/index"
+METADATA_PATH = os.path.join(INDEX_DIR, "metadata.npz")
+GAZETTEER_CSV = "data/open_travel_data.csv"
+
+# Same patterns the Streamlit filters have always used, so the columns
+# reproduce their matches exactly.
+DURATION_RE = re.compile(r"(\d+)\s*[- ]?day[s]?")
+BUDGET_RE = re.compile(r"\$?(\d{3,5})")
+
+ACTIVITY_TAGS = [
+    "adventure", "beach", "business", "culture", "food", "hiking", "leisure",
+    "museum", "nightlife", "park", "romantic", "shopping", "temple", "wildlife",
+]
+
+
+# ───────────────────────────────────────
+# Extraction (index build time)
+# ───────────────────────────────────────
+def load_place_vocabulary(csv_path=GAZETTEER_CSV):
+    """
+    Returns the sorted, lowercased country and city names from the gazetteer.
+    The "country" filter is used for cities as well (e.g. "denver"), so both
+    are part of the vocabulary.
+    """
+    names = set()
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            for field in ("country", "city"):
+                value = row.get(field, "").strip().lower()
+                if value:
+                    names.add(value)
+    return sorted(names)
+
+
+def _tag_matrix(lowered_docs, vocabulary):
+    """Packed (n_docs, ceil(len(vocabulary) / 8)) bit matrix of substring hits."""
+    docs = np.asarray(lowered_docs, dtype=str)
+    hits = np.zeros((len(docs), len(vocabulary)), dtype=bool)
+    for j, term in enumerate(vocabulary):
+        hits[:, j] = np.char.find(docs, term) >= 0
+    return np.packbits(hits, axis=1)
+
+
+def extract_metadata(documents, places=None, activities=ACTIVITY_TAGS):
+    """
+    Extracts the filter fields from every document once.
+
+    Args:
+        documents (list[str]): Documents in index order.
+        places (list[str] | None): Country/city vocabulary; loaded from the
+            gazetteer when omitted.
+        activities (list[str]): Activity tag vocabulary.
+
+    Returns:
+        dict: Typed NumPy columns keyed by name:
+            duration_days (int32, -1 when absent), budget (float32, NaN when
+            absent), place_tags / activity_tags (packed uint8 bit matrices)
+            and the place / activity vocabularies they refer to.
+    """
+    if places is None:
+        places = load_place_vocabulary()
+
+    lowered = [doc.lower() for doc in documents]
+    duration = np.full(len(documents), -1, dtype=np.int32)
+    budget = np.full(len(documents), np.nan, dtype=np.float32)
+
+    for i, doc in enumerate(documents):
+        match = DURATION_RE.search(lowered[i])
+        if match:
+            duration[i] = int(match.group(1))
+        match = BUDGET_RE.search(doc)
+        if match:
+            budget[i] = float(match.group(1))
+
+    return {
+        "duration_days": duration,
+        "budget": budget,
+        "place_vocab": np.array(places, dtype=str),
+        "place_tags": _tag_matrix(lowered, places),
+        "activity_vocab": np.array(activities, dtype=str),
+        "activity_tags": _tag_matrix(lowered, activities),
+    }
+
+
+def save_metadata(metadata, path=METADATA_PATH):
+    """Writes the columns next to the document store, replacing the old file atomically."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **metadata)
+    os.replace(tmp_path, path)
+
+
+def load_metadata(path=METADATA_PATH):
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def metadata_rows(metadata):
+    """Number of documents the columns describe."""
+    return len(metadata["duration_days"])
+
+
+def truncate_metadata(metadata, num_docs):
+    """The columns restricted to the first `num_docs` documents."""
+    if metadata_rows(metadata) <= num_docs:
+        return metadata
+    return {key: column if key.endswith("_vocab") else column[:num_docs] for key, column in metadata.items()}
+
+
+# ───────────────────────────────────────
+# Vectorized filters (query time)
+# ───────────────────────────────────────
+def _tag_column(packed, j):
+    return ((packed[:, j >> 3] >> (7 - (j & 7))) & 1).astype(bool)
+
+
+def keyword_mask(metadata, prefix, keywords, documents):
+    """
+    Docs containing any of `keywords`, with the same substring semantics as
+    `keyword in doc.lower()`. Vocabulary terms are answered from the tag
+    columns; anything else falls back to a scan over the documents.
+    """
+    vocab = {term: j for j, term in enumerate(metadata[f"{prefix}_vocab"].tolist())}
+    packed = metadata[f"{prefix}_tags"]
+    mask = np.zeros(packed.shape[0], dtype=bool)
+    for keyword in keywords:
+        keyword = keyword.strip().lower()
+        if not keyword:
+            # "" is a substring of everything
+            mask[:] = True
+            break
+        if keyword in vocab:
+            mask |= _tag_column(packed, vocab[keyword])
+        else:
+            mask |= np.fromiter((keyword in doc.lower() for doc in documents), dtype=bool, count=len(documents))
+    return mask
+
+
+def duration_mask(metadata, min_days, max_days):
+    days = metadata["duration_days"]
+    return (days >= 0) & (days >= min_days) & (days <= max_days)
+
+
+def budget_mask(metadata, budget_limit):
+    # NaN (no price in the document) compares False, which excludes it
+    return metadata["budget"] <= budget_limit
+
+
+def filter_mask(metadata, documents, countries=None, duration=None, activities=None, budget=None,
+                keyword_index=None):
+    """
+    Combines the enabled filters into one boolean document mask.
+
+    Args:
+        countries (list[str] | None): Country/city keywords, any may match.
+        duration (tuple[int, int] | None): Inclusive (min_days, max_days).
+        activities (list[str] | None): Activity keywords, any may match.
+        budget (float | None): Maximum budget in USD.
+        keyword_index (KeywordIndex | None): When given, the country and
+            activity filters are answered from its posting lists and
+            intersected with the column filters instead of using the tag
+            columns.
+    """
+    mask = np.ones(len(metadata["duration_days"]), dtype=bool)
+    if duration is not None:
+        mask &= duration_mask(metadata, *duration)
+    if budget is not None:
+        mask &= budget_mask(metadata, budget)
+
+    if keyword_index is not None:
+        ids = None
+        for keywords in (countries, activities):
+            if keywords is None:
+                continue
+            hits = keyword_index.any_of(keywords, documents)
+            ids = hits if ids is None else np.intersect1d(ids, hits, assume_unique=True)
+        if ids is None:
+            return mask
+        ids = ids[mask[ids]]
+        mask = np.zeros_like(mask)
+        mask[ids] = True
+        return mask
+
+    if countries is not None:
+        mask &= keyword_mask(metadata, "place", countries, documents)
+    if activities is not None:
+        mask &= keyword_mask(metadata, "activity", activities, documents)
+    return mask
+
+
+if __name__ == "__main__":
+    # Builds metadata.npz for an existing index directory:
+    #     python -m retrieval.metadata [data/index]
+    from retrieval.index_store import load_documents
+
+    index_dir = sys.argv[1] if len(sys.argv) > 1 else INDEX_DIR
+    out_path = os.path.join(index_dir, os.path.basename(METADATA_PATH))
+    docs = load_documents(index_dir)
+    save_metadata(extract_metadata(docs), out_path)
+    print(f"Wrote metadata for {len(docs)} documents to {out_path}")
@@ -0,0 +1,188 @@
+# src/retrieval/response_cache.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", "data/cache/responses.npz")
+SIMILARITY_THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.95"))
+TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL", str(24 * 3600)))
+MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+
+
+def context_key(doc_ids, documents):
+    """
+    Identifies the retrieved context: the doc IDs in rank order plus a digest
+    of their text, so a rebuilt index that reuses IDs for different documents
+    never serves an answer written for the old ones.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for doc in documents:
+        digest.update(doc.encode("utf-8"))
+        digest.update(b"\0")
+    return ",".join(str(int(i)) for i in doc_ids) + ":" + digest.hexdigest()
+
+
+class SemanticResponseCache:
+    """
+    Cache of generated answers in front of `generate_response`.
+
+    A stored answer is reused when the retrieved context is identical and the
+    cosine similarity between the new and the stored query embedding is at
+    least `threshold`. Entries expire after `ttl` seconds; past `maxsize` the
+    least recently used one is evicted. The cache is persisted to `path`
+    after every insert and reloaded on start.
+    """
+
+    def __init__(self, path=RESPONSE_CACHE_PATH, threshold=SIMILARITY_THRESHOLD,
+                 ttl=TTL_SECONDS, maxsize=MAX_ENTRIES):
+        self.path = path
+        self.threshold = threshold
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        # context key -> list of entry dicts; embeddings are unit-norm float32
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+        self.latency_saved = 0.0
+        if path and os.path.exists(path):
+            self._load()
+
+    # ───────────────────────────────────────
+    # Lookup / insert
+    # ───────────────────────────────────────
+    def get(self, query_embedding, context):
+        """
+        Returns the cached answer for `context` whose query is most similar to
+        `query_embedding`, or None if none is within the threshold.
+        """
+        query = _unit(query_embedding)
+        now = time.time()
+        with self._lock:
+            entries = self._expire(context, now)
+            best, best_score = None, self.threshold
+            for entry in entries:
+                score = float(entry["embedding"] @ query)
+                if score >= best_score:
+                    best, best_score = entry, score
+            if best is None:
+                self.misses += 1
+                return None
+            best["last_used"] = now
+            self.hits += 1
+            self.latency_saved += best["latency"]
+            return best["answer"]
+
+    def put(self, query_embedding, context, answer, latency):
+        """Stores `answer`, which took `latency` seconds to generate, and persists the cache."""
+        now = time.time()
+        entry = {
+            "embedding": _unit(query_embedding),
+            "answer": answer,
+            "latency": float(latency),
+            "created": now,
+            "last_used": now,
+        }
+        with self._lock:
+            self._expire(context, now)
+            self._entries.setdefault(context, []).append(entry)
+            self._evict()
+            if self.path:
+                self._save()
+
+    def _expire(self, context, now):
+        entries = self._entries.get(context, [])
+        live = [e for e in entries if now - e["created"] < self.ttl]
+        if len(live) != len(entries):
+            self.expired += len(entries) - len(live)
+            if live:
+                self._entries[context] = live
+            else:
+                del self._entries[context]
+        return live
+
+    def _evict(self):
+        size = len(self)
+        if size <= self.maxsize:
+            return
+        # Least recently used first
+        order = sorted(
+            ((e["last_used"], context, e) for context, entries in self._entries.items() for e in entries),
+            key=lambda item: item[0],
+        )
+        for _, context, entry in order[: size - self.maxsize]:
+            self._entries[context].remove(entry)
+            if not self._entries[context]:
+                del self._entries[context]
+            self.evicted += 1
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._entries.values())
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "latency_saved_s": self.latency_saved,
+        }
+
+    # ───────────────────────────────────────
+    # Persistence
+    # ───────────────────────────────────────
+    def _save(self):
+        """Writes all live entries, replacing the old file atomically."""
+        rows = [(context, e) for context, entries in self._entries.items() for e in entries]
+        records = [
+            {"context": context, "answer": e["answer"], "latency": e["latency"],
+             "created": e["created"], "last_used": e["last_used"]}
+            for context, e in rows
+        ]
+        embeddings = (
+            np.stack([e["embedding"] for _, e in rows]) if rows else np.empty((0, 0), dtype="float32")
+        )
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, embeddings=embeddings, records=np.array(json.dumps(records)))
+        os.replace(tmp_path, self.path)
+
+    def _load(self):
+        try:
+            with np.load(self.path) as data:
+                embeddings = data["embeddings"]
+                records = json.loads(str(data["records"]))
+        except (OSError, ValueError, KeyError):
+            # A corrupt or foreign cache file is not worth failing the app over
+            return
+        now = time.time()
+        for embedding, record in zip(embeddings, records):
+            if now - record["created"] >= self.ttl:
+                continue
+            self._entries.setdefault(record["context"], []).append({
+                "embedding": embedding.astype("float32"),
+                "answer": record["answer"],
+                "latency": record["latency"],
+                "created": record["created"],
+                "last_used": record["last_used"],
+            })
+        self._evict()
+        self.evicted = 0
+
+
+def _unit(embedding):
+    vector = np.asarray(embedding, dtype="float32").reshape(-1)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
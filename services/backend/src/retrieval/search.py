@@ -0,0 +1,154 @@
+# src/retrieval/search.py
+
+import faiss
+import numpy as np
+
+from retrieval.index_factory import search_parameters, stored_vectors
+
+
+def _mask_selector(mask):
+    """
+    Wraps a boolean document mask in a FAISS ID selector.
+
+    The packed bitmap is returned alongside the selector because FAISS only
+    keeps a raw pointer to it; the caller must hold on to both until the
+    search has finished.
+    """
+    bits = np.packbits(np.asarray(mask, dtype=bool), bitorder="little")
+    # The size is in bytes; IDs past the end of the mask are rejected
+    selector = faiss.IDSelectorBitmap(len(bits), faiss.swig_ptr(bits))
+    return selector, bits
+
+
+def filtered_search(index, query_embedding, mask=None, k=5):
+    """
+    Searches the persisted index, restricted to the documents allowed by `mask`.
+
+    Document vectors are never re-encoded: the filter is applied inside FAISS
+    through an ID selector, so the per-query cost is one query encode plus a
+    single restricted scan of the stored vectors.
+
+    Args:
+        index (faiss.Index): Index whose IDs are positions in the document store.
+        query_embedding (np.ndarray): Query vectors, shape (1, dim), float32.
+        mask (np.ndarray | None): Boolean array indexed by document ID; None
+            searches the whole index.
+        k (int): Number of neighbours to return.
+
+    Returns:
+        tuple: (distances, ids) as 1-D arrays, with unfilled slots dropped.
+    """
+    query_embedding = np.ascontiguousarray(query_embedding, dtype="float32")
+
+    if mask is None:
+        k = min(k, index.ntotal)
+        distances, ids = index.search(query_embedding, k)
+    else:
+        k = min(k, int(np.count_nonzero(mask)))
+        if k == 0:
+            return np.empty(0, dtype="float32"), np.empty(0, dtype="int64")
+        selector, _bits = _mask_selector(mask)
+        params = search_parameters(index, selector)
+        distances, ids = index.search(query_embedding, k, params=params)
+
+    keep = ids[0] >= 0
+    return distances[0][keep], ids[0][keep]
+
+
+def filtered_search_batch(index, query_embeddings, mask=None, k=5):
+    """
+    `filtered_search` for several queries sharing one mask, answered by a
+    single FAISS call so the stored vectors are scanned once per batch.
+
+    Returns:
+        list[tuple]: (distances, ids) per query, as in `filtered_search`.
+    """
+    query_embeddings = np.ascontiguousarray(query_embeddings, dtype="float32")
+    empty = (np.empty(0, dtype="float32"), np.empty(0, dtype="int64"))
+
+    if mask is None:
+        k = min(k, index.ntotal)
+        if k == 0:
+            return [empty] * len(query_embeddings)
+        distances, ids = index.search(query_embeddings, k)
+    else:
+        k = min(k, int(np.count_nonzero(mask)))
+        if k == 0:
+            return [empty] * len(query_embeddings)
+        selector, _bits = _mask_selector(mask)
+        distances, ids = index.search(query_embeddings, k, params=search_parameters(index, selector))
+
+    keep = ids >= 0
+    return [(d[m], i[m]) for d, i, m in zip(distances, ids, keep)]
+
+
+def rank_candidates(index, query_embedding, ids, k=None):
+    """
+    Ranks a small candidate set by distance to the query using the vectors
+    stored under `ids`, without scanning the rest of the index. Distances are
+    squared L2, as IndexFlatL2 reports them (reconstructed, so approximate,
+    for PQ codes).
+
+    Returns:
+        tuple: (distances, ids) nearest first, at most `k` of them.
+    """
+    query = np.ascontiguousarray(query_embedding, dtype="float32").reshape(-1)
+    diff = stored_vectors(index, np.asarray(ids, dtype=np.int64)) - query
+    distances = np.einsum("ij,ij->i", diff, diff)
+    order = np.argsort(distances, kind="stable")[:k]
+    return distances[order], np.asarray(ids, dtype=np.int64)[order]
+
+
+# ───────────────────────────────────────
+# Lexical prefilter
+# ───────────────────────────────────────
+RETRIEVAL_MODES = ("dense", "bm25", "fused")
+
+
+def _min_max(values):
+    span = values.max() - values.min()
+    return (values - values.min()) / span if span > 0 else np.ones_like(values)
+
+
+def hybrid_search(index, bm25, query, query_embedding, mask=None, k=5, mode="dense", candidates=300,
+                  alpha=0.5):
+    """
+    Searches with an optional BM25 prefilter in front of the dense ranker.
+
+    Modes:
+        dense   rank every document allowed by `mask` (plain `filtered_search`)
+        bm25    take the `candidates` best BM25 matches within `mask` and rank
+                only those by embedding distance
+        fused   same candidates, ordered by `alpha` * dense similarity +
+                (1 - `alpha`) * BM25 score, both min-max normalized
+
+    Queries with no indexed token fall back to dense ranking.
+
+    Returns:
+        tuple: (distances, ids) as 1-D arrays; distances are always the
+        embedding distances, whatever the ordering.
+    """
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode '{mode}'; expected one of {RETRIEVAL_MODES}")
+    if mode == "dense":
+        return filtered_search(index, query_embedding, mask, k)
+
+    ids, scores = bm25.top(query, candidates, mask)
+    if len(ids) == 0:
+        return filtered_search(index, query_embedding, mask, k)
+    try:
+        distances, dense_ids = rank_candidates(index, query_embedding, ids, k if mode == "bm25" else None)
+    except RuntimeError:
+        # Index types that cannot reconstruct: one selector-restricted scan instead
+        candidate_mask = np.zeros(bm25.num_docs, dtype=bool)
+        candidate_mask[ids] = True
+        distances, dense_ids = filtered_search(index, query_embedding, candidate_mask,
+                                               k if mode == "bm25" else len(ids))
+    if mode == "bm25":
+        return distances, dense_ids
+
+    lexical = dict(zip(ids.tolist(), _min_max(scores).tolist()))
+    lexical = np.array([lexical[i] for i in dense_ids.tolist()], dtype=np.float32)
+    fused = alpha * _min_max(-distances) + (1 - alpha) * lexical
+    order = np.argsort(-fused, kind="stable")[:k]
+    return distances[order], dense_ids[order]
@@ -2,9 +2,11 @@
 
 import os
 import logging
-import requests
 from dotenv import load_dotenv
 
+import utils.shared_path  # noqa: F401
+import http_client
+
 # Load API keys
 load_dotenv()
 GEOAPIFY_KEY = os.getenv("GEOAPIFY_API_KEY")
@@ -29,7 +31,7 @@ def get_attractions(city_name, limit=5):
             "limit": limit,
             "apiKey": GEOAPIFY_KEY
         }
-        response = requests.get(url, params=params, timeout=10)
+        response = http_client.get(url, params=params)
         response.raise_for_status()
         data = response.json()
         attractions = [f["properties"]["name"] for f in data.get("features", []) if "name" in f["properties"]]
@@ -39,5 +41,60 @@ def get_attractions(city_name, limit=5):
         return []
 
 
+# Frontend place categories -> Geoapify categories
+PLACE_CATEGORIES = {
+    "attraction": "tourism.sightseeing",
+    "hotel": "accommodation.hotel",
+    "restaurant": "catering.restaurant",
+}
+
+
+def get_places(city_name, category="attraction", limit=100):
+    """
+    Fetches places of one category in a city using Geoapify Places API.
+
+    Args:
+        city_name (str): Name of the city.
+        category (str): One of PLACE_CATEGORIES.
+        limit (int): Maximum number of places.
+
+    Returns:
+        list | None: Place dicts shaped like the frontend's `Place`, or None
+        when Geoapify could not be queried (as opposed to no places found).
+    """
+    try:
+        url = "https://api.geoapify.com/v2/places"
+        params = {
+            "categories": PLACE_CATEGORIES[category],
+            "filter": f"place:{city_name}",
+            "limit": limit,
+            "apiKey": GEOAPIFY_KEY
+        }
+        response = http_client.get(url, params=params)
+        response.raise_for_status()
+        data = response.json()
+    except Exception as e:
+        logging.warning(f"[Geoapify] Failed to fetch {category} places for '{city_name}': {e}")
+        return None
+
+    places = []
+    for f in data.get("features", []):
+        props = f["properties"]
+        if "name" not in props:
+            continue
+        places.append({
+            "id": props.get("place_id", f"{city_name}-{category}-{len(places)}"),
+            "name": props["name"],
+            "category": category,
+            "lat": props.get("lat"),
+            "lng": props.get("lon"),
+            "description": ", ".join(c.split(".")[-1].replace("_", " ") for c in props.get("categories", [])[:3]),
+            "image": "",
+            "rating": 0,
+            "address": props.get("formatted", ""),
+        })
+    return places
+
+
 def is_geoapify_ready():
     return GEOAPIFY_KEY is not None
@@ -0,0 +1,14 @@
+# src/utils/shared_path.py
+#
+# Puts services/shared (http_client, geocode, distance_matrix, route_cache,
+# ...) on sys.path for the backend modules. Import it before any of those
+# modules:
+#
+#     import utils.shared_path  # noqa: F401
+
+import os
+import sys
+
+SHARED_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "shared"))
+if SHARED_DIR not in sys.path:
+    sys.path.append(SHARED_DIR)
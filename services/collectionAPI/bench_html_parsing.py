@@ -0,0 +1,84 @@
+# Booking.com page parsing: BeautifulSoup (the original scraper) against the
+# lxml fast path, over the fixture corpus in fixtures/booking/ plus any
+# extra directories given (e.g. pages dumped with BOOKING_DEBUG_DIR). Files
+# named search_* are parsed as search pages, hotel_* as hotel pages.
+#
+#     python bench_html_parsing.py [--repeat 20] [extra_dir ...]
+#
+# Exits non-zero if the two parsers disagree on any page, or if a page is
+# not recognised as the kind of page it is.
+
+import argparse
+import glob
+import gzip
+import os
+import time
+
+from html_parsing import get_parser, is_search_page
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "booking")
+
+
+def load_pages(dirs):
+    pages = []
+    for directory in dirs:
+        for path in sorted(glob.glob(os.path.join(directory, "*.html")) + glob.glob(os.path.join(directory, "*.html.gz"))):
+            name = os.path.basename(path)
+            kind = "search" if name.startswith("search") else "hotel" if name.startswith("hotel") else None
+            if kind is None:
+                continue
+            opener = gzip.open if path.endswith(".gz") else open
+            with opener(path, "rt", encoding="utf-8") as f:
+                pages.append((name, kind, f.read()))
+    return pages
+
+
+def parse(parser, kind, page):
+    return parser.search_result(page) if kind == "search" else parser.hotel_page(page)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BeautifulSoup vs lxml on Booking.com pages")
+    parser.add_argument("dirs", nargs="*", help="extra directories of saved pages")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    pages = load_pages([FIXTURES, *args.dirs])
+    reference, fast = get_parser("bs4"), get_parser("lxml")
+
+    mismatches = 0
+    for name, kind, page in pages:
+        expected, got = parse(reference, kind, page), parse(fast, kind, page)
+        if expected != got:
+            mismatches += 1
+            print(f"MISMATCH {name}:\n  bs4:  {expected}\n  lxml: {got}")
+        if is_search_page(page) != (kind == "search"):
+            # booking.py only caches "not on Booking" for recognised search pages
+            mismatches += 1
+            print(f"MISRECOGNISED {name}: is_search_page says {is_search_page(page)}")
+    print(f"{len(pages)} pages ({sum(len(p) for _, _, p in pages) / 1e6:.1f} MB), "
+          f"{len(pages) - mismatches} identical between parsers")
+
+    print(f"\n{'parser':<8} {'kind':<8} {'pages/s':>9} {'ms/page':>9}")
+    rates = {}
+    for backend in (reference, fast):
+        for kind in ("search", "hotel"):
+            subset = [p for _, k, p in pages if k == kind]
+            if not subset:
+                continue
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                for page in subset:
+                    parse(backend, kind, page)
+            elapsed = time.perf_counter() - start
+            rate = args.repeat * len(subset) / elapsed
+            rates[backend.name, kind] = rate
+            print(f"{backend.name:<8} {kind:<8} {rate:>9.1f} {1000 / rate:>9.2f}")
+    for kind in ("search", "hotel"):
+        if ("bs4", kind) in rates:
+            print(f"lxml is {rates['lxml', kind] / rates['bs4', kind]:.1f}x faster on {kind} pages")
+    raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# Local POI store vs the Nearby Search path, against a fake Places server
+# that behaves like Google's: 20 results a page, up to three pages, page
+# tokens valid only ~2 s after they are issued, and a per-call latency.
+#
+#     python bench_poi_store.py --places 200000 --latency 0.15
+#
+# Reports the API path, a cold pull through the store (capped pulls are
+# split until every part comes back under 60 results), the same lookup
+# again, a shifted circle that only fetches its uncovered part, a smaller
+# circle inside the first, a session of random lookups, and raw R*Tree
+# query latency over a large store. Fails if a store lookup finds fewer
+# places than the API path does for the same circle, or if a circle inside
+# what was already pulled goes upstream again; reports after how many
+# lookups the up-front splitting has paid for itself.
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+import places_fetcher
+from poi_store import POIStore, haversine_m
+
+CENTRE = (48.8566, 2.3522)
+
+
+class FakePlaces(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    places = []
+    tokens = {}
+    calls = 0
+    latency = 0.15
+    token_delay = 2.0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        with FakePlaces.lock:
+            FakePlaces.calls += 1
+        time.sleep(FakePlaces.latency)
+        if "pagetoken" in query:
+            issued, matches, page = FakePlaces.tokens[query["pagetoken"]]
+            body = ({"status": "INVALID_REQUEST", "results": []} if time.time() - issued < FakePlaces.token_delay
+                    else self.page(matches, page))
+        else:
+            lat, lng = (float(v) for v in query["location"].split(","))
+            radius = float(query["radius"])
+            # Ranked by prominence, as Google does without rankby=distance
+            matches = sorted((p for p in FakePlaces.places if p["type"] == query["type"]
+                              and haversine_m(lat, lng, *p["latlng"]) <= radius), key=lambda p: -p["reviews"])[:60]
+            body = self.page(matches, 0)
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def page(self, matches, page):
+        results = [{
+            "place_id": p["place_id"], "name": p["name"], "rating": p["rating"], "user_ratings_total": p["reviews"],
+            "vicinity": "somewhere", "geometry": {"location": {"lat": p["latlng"][0], "lng": p["latlng"][1]}},
+        } for p in matches[page * 20:(page + 1) * 20]]
+        body = {"status": "OK" if results else "ZERO_RESULTS", "results": results}
+        if (page + 1) * 20 < len(matches):
+            token = f"{id(matches)}:{page + 1}:{random.random()}"
+            FakePlaces.tokens[token] = (time.time(), matches, page + 1)
+            body["next_page_token"] = token
+        return body
+
+    def log_message(self, *args):
+        pass
+
+
+def random_points(rng, n, centre, spread_m):
+    lat = centre[0] + np.degrees(rng.normal(0, spread_m, n) / 6371000.0)
+    lng = centre[1] + np.degrees(rng.normal(0, spread_m, n) / 6371000.0) / math.cos(math.radians(centre[0]))
+    return lat, lng
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local POI store vs Nearby Search")
+    parser.add_argument("--places", type=int, default=200000, help="places in the large store for raw query timing")
+    parser.add_argument("--city-places", type=int, default=3000,
+                        help="restaurants behind the fake server, spread over ~3 km around the centre; at the "
+                             "default a 4 km pull holds far more than 60, as in a real city")
+    parser.add_argument("--lookups", type=int, default=40,
+                        help="random 1-3 km lookups around the centre after the scripted ones")
+    parser.add_argument("--latency", type=float, default=0.15, help="fake upstream latency per call (s)")
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    lat, lng = random_points(rng, args.city_places, CENTRE, 3000)
+    FakePlaces.places = [{"place_id": f"r{i}", "name": f"Restaurant {i}", "type": "restaurant", "latlng": (a, b),
+                          "rating": round(3.5 + (i % 15) / 10, 1), "reviews": int(i * 7 % 4000)}
+                         for i, (a, b) in enumerate(zip(lat, lng))]
+    FakePlaces.latency = args.latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakePlaces)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    places_fetcher.PLACES_URL = f"http://127.0.0.1:{server.server_port}/nearbysearch/json"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = POIStore(os.path.join(tmp, "poi.sqlite"))
+        location = f"{CENTRE[0]},{CENTRE[1]}"
+        shifted = f"{CENTRE[0] + 0.02},{CENTRE[1]}"  # ~2.2 km north
+
+        async def lookup(loc, radius, use_store):
+            async with places_fetcher.http_client.AsyncHTTPClient() as client:
+                return await places_fetcher.fetch_category_async(
+                    client, places_fetcher.RateLimiter(), "restaurants", loc, radius,
+                    store=store if use_store else None)
+
+        def run(name, loc, radius, use_store, quiet=False):
+            FakePlaces.calls = 0
+            places, seconds = timed(lambda: asyncio.run(lookup(loc, radius, use_store)))
+            if not quiet:
+                shown = f"{seconds * 1000:.2f} ms" if seconds < 1 else f"{seconds:.2f} s"
+                print(f"{name:<34} {shown:>10} {FakePlaces.calls:>6} {len(places):>7}")
+            return FakePlaces.calls, len(places)
+
+        async def api_session(circles):
+            async with places_fetcher.http_client.AsyncHTTPClient() as client:
+                limiter = places_fetcher.RateLimiter()
+                return await asyncio.gather(*(places_fetcher.fetch_category_async(
+                    client, limiter, "restaurants", loc, radius) for loc, radius in circles))
+
+        scripted = [("store, cold", location, 4000),
+                    ("store, again", location, 4000),
+                    ("store, shifted 2.2 km", shifted, 4000),
+                    ("store, shifted again", shifted, 4000),
+                    ("store, 1 km inside", location, 1000)]
+        circles = [(f"{CENTRE[0] + a},{CENTRE[1] + b}", int(r)) for a, b, r in
+                   zip(rng.uniform(-0.02, 0.02, args.lookups), rng.uniform(-0.03, 0.03, args.lookups),
+                       rng.uniform(1000, 3000, args.lookups))]
+
+        print(f"{'path':<34} {'time':>10} {'calls':>6} {'places':>7}")
+        api = {(loc, radius): run(f"API, {radius // 1000} km{' shifted' if loc == shifted else ''}", loc, radius, False)
+               for loc, radius in ((location, 4000), (shifted, 4000), (location, 1000))}
+        api_calls = sum(api[loc, radius][0] for _, loc, radius in scripted)
+        store_calls = 0
+        for name, loc, radius in scripted:
+            calls, found = run(name, loc, radius, True)
+            store_calls += calls
+            assert found >= api[loc, radius][1], f"{name}: {found} places, the API path finds {api[loc, radius][1]}"
+            # Circles inside what was already pulled are the point of the store
+            assert "cold" in name or "shifted 2.2" in name or not calls, f"{name}: {calls} upstream calls"
+
+        FakePlaces.calls = 0
+        api_found = [len(places) for places in asyncio.run(api_session(circles))]
+        api_calls += FakePlaces.calls
+        local = 0
+        for (loc, radius), expected in zip(circles, api_found):
+            calls, found = run("", loc, radius, True, quiet=True)
+            store_calls += calls
+            local += not calls
+            assert found >= expected, f"lookup {loc} {radius} m: {found} places, the API path finds {expected}"
+        # Splitting capped pulls costs calls up front, and pays off over the
+        # lookups the store then answers alone
+        per_lookup = api_calls / (len(scripted) + args.lookups)
+        print(f"\n{args.lookups} random lookups: {local} answered from the store alone")
+        print(f"upstream calls over the session: store {store_calls}, API {api_calls}", end="")
+        print("" if store_calls <= api_calls else
+              f" ({per_lookup:.1f} per lookup, so the store breaks even after ~{store_calls / per_lookup:.0f} lookups)")
+        store.close()
+
+        big = POIStore(os.path.join(tmp, "big.sqlite"))
+        lat, lng = random_points(rng, args.places, CENTRE, 20000)
+        raw = [{"place_id": f"p{i}", "name": f"Place {i}", "rating": 4.2, "user_ratings_total": 900,
+                "geometry": {"location": {"lat": float(a), "lng": float(b)}}} for i, (a, b) in enumerate(zip(lat, lng))]
+        _, seconds = timed(lambda: big.add("restaurants", "", *CENTRE, 60000, raw))
+        print(f"\nloaded {args.places} places in {seconds:.1f}s")
+        q_lat, q_lng = random_points(rng, args.queries, CENTRE, 15000)
+        timings, found = [], 0
+        for a, b in zip(q_lat, q_lng):
+            start = time.perf_counter()
+            found += len(big.query("restaurants", "", float(a), float(b), 1000))
+            timings.append(time.perf_counter() - start)
+        timings = np.array(timings) * 1000
+        print(f"1 km radius query: p50 {np.percentile(timings, 50):.3f} ms, p99 {np.percentile(timings, 99):.3f} ms, "
+              f"{found / args.queries:.0f} places on average")
+        big.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
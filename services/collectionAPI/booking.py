@@ -0,0 +1,202 @@
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import quote, urlparse
+import shared_path  # noqa: F401
+import http_client
+from html_parsing import get_parser, is_search_page
+from geocode import normalize_place
+from places_fetcher import RateLimiter
+
+_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+BOOKING_CACHE_PATH = os.getenv("BOOKING_CACHE_PATH", os.path.join(_ROOT, "data", "cache", "booking.sqlite"))
+# Which Booking.com page a hotel name resolves to hardly ever changes; its prices do
+BOOKING_URL_TTL = float(os.getenv("BOOKING_URL_TTL", str(30 * 24 * 3600)))
+BOOKING_PRICE_TTL = float(os.getenv("BOOKING_PRICE_TTL", str(6 * 3600)))
+BOOKING_QPS = float(os.getenv("BOOKING_QPS", "2"))
+# Raw pages are written here for debugging selectors, and only when it is set
+BOOKING_DEBUG_DIR = os.getenv("BOOKING_DEBUG_DIR")
+
+BOOKING_URL = "https://www.booking.com"
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+_parser = get_parser()
+
+
+def get_booking_search_url(hotel_name, city):
+    return f"{BOOKING_URL}/searchresults.html?ss={quote(f'{hotel_name} {city}')}"
+
+def parse_price(price_str):
+    """Convert price string to numeric value"""
+    price_str = price_str.replace(",", "").replace("₹", "").strip()
+    match = re.search(r"\d+", price_str)
+    return int(match.group()) if match else None
+
+def parse_search_page(html, hotel_name, parser=None):
+    """(hotel URL, listed name) of the first search result, or (None, None)."""
+    href, title = (parser or _parser).search_result(html)
+    if not href:
+        return None, None
+    href = href.split("?")[0]
+    return BOOKING_URL + href if href.startswith("/") else href, title or hotel_name
+
+def parse_hotel_page(html, name, parser=None):
+    """(hotel name, rooms) from a hotel page."""
+    hotel_name, rows = (parser or _parser).hotel_page(html)
+    rooms = [{
+        "room_type": room_type,
+        "price_text": price_text,
+        "price_value": parse_price(price_text)
+    } for room_type, price_text in rows]
+    return hotel_name or name, rooms
+
+def _dump(kind, key, html):
+    if not BOOKING_DEBUG_DIR:
+        return
+    os.makedirs(BOOKING_DEBUG_DIR, exist_ok=True)
+    slug = re.sub(r"\W+", "_", key)[:80]
+    with open(os.path.join(BOOKING_DEBUG_DIR, f"{kind}_{slug}.html"), "w", encoding="utf-8") as f:
+        f.write(html)
+
+
+# ---------- Cache ---------- #
+class BookingCache:
+    """
+    Hotel name + city -> Booking.com URL, and URL -> rooms, in SQLite
+    with separate TTLs. Hotels a real search results page did not list are
+    remembered too, for the price TTL, so they are not searched for again
+    on every run.
+    """
+
+    def __init__(self, path=BOOKING_CACHE_PATH, url_ttl=BOOKING_URL_TTL, price_ttl=BOOKING_PRICE_TTL):
+        self.url_ttl = url_ttl
+        self.price_ttl = price_ttl
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS hotel_urls (key TEXT PRIMARY KEY, url TEXT, name TEXT, resolved_at REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS hotel_rooms (url TEXT PRIMARY KEY, details TEXT NOT NULL, fetched_at REAL NOT NULL);
+        """)
+        self._db.commit()
+
+    @staticmethod
+    def url_key(hotel_name, city):
+        return f"{normalize_place(hotel_name)}|{normalize_place(city)}"
+
+    def get_url(self, hotel_name, city):
+        """(url, name); (None, None) for a cached "not on Booking"; KeyError if unknown."""
+        with self._lock:
+            row = self._db.execute("SELECT url, name, resolved_at FROM hotel_urls WHERE key = ?",
+                                   (self.url_key(hotel_name, city),)).fetchone()
+        ttl = self.url_ttl if row and row[0] else self.price_ttl
+        if row is None or row[2] < time.time() - ttl:
+            raise KeyError(hotel_name)
+        return row[0], row[1]
+
+    def put_url(self, hotel_name, city, url, name):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO hotel_urls VALUES (?, ?, ?, ?)",
+                             (self.url_key(hotel_name, city), url, name, time.time()))
+            self._db.commit()
+
+    def get_details(self, url):
+        with self._lock:
+            row = self._db.execute("SELECT details, fetched_at FROM hotel_rooms WHERE url = ?", (url,)).fetchone()
+        if row is None or row[1] < time.time() - self.price_ttl:
+            raise KeyError(url)
+        return json.loads(row[0])
+
+    def put_details(self, url, details):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO hotel_rooms VALUES (?, ?, ?)",
+                             (url, json.dumps(details), time.time()))
+            self._db.commit()
+
+
+# ---------- Enrichment ---------- #
+class HostRateLimiter:
+    """One RateLimiter per host, so Booking.com is paced independently of anything else."""
+
+    def __init__(self, qps=BOOKING_QPS):
+        self._limiters = defaultdict(lambda: RateLimiter(qps))
+
+    async def acquire(self, url):
+        await self._limiters[urlparse(url).netloc].acquire()
+
+async def _get_page(client, limiter, url):
+    await limiter.acquire(url)
+    status, _, body = await client.get(url, headers=HEADERS)
+    if status != 200:
+        raise RuntimeError(f"Booking.com returned {status} for {url}")
+    return body.decode("utf-8", errors="replace")
+
+async def hotel_details_async(client, limiter, cache, hotel_name, city):
+    """
+    Booking.com rooms and prices for one hotel, from the cache where fresh.
+    Pages are parsed on the default executor so the event loop keeps
+    serving the other hotels meanwhile.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        hotel_url, name = cache.get_url(hotel_name, city)
+    except KeyError:
+        search_url = get_booking_search_url(hotel_name, city)
+        html = await _get_page(client, limiter, search_url)
+        _dump("search", f"{hotel_name} {city}", html)
+        hotel_url, name = await loop.run_in_executor(None, parse_search_page, html, hotel_name)
+        if not hotel_url and not is_search_page(html):
+            # A challenge or error page says nothing about the hotel: don't
+            # remember it as "not on Booking"
+            raise RuntimeError(f"Booking.com did not return a search results page for {search_url}")
+        cache.put_url(hotel_name, city, hotel_url, name)
+    if not hotel_url:
+        return {"error": "Hotel not found"}
+
+    try:
+        return cache.get_details(hotel_url)
+    except KeyError:
+        pass
+    html = await _get_page(client, limiter, hotel_url)
+    _dump("hotel", hotel_name, html)
+    hotel_name_final, rooms = await loop.run_in_executor(None, parse_hotel_page, html, name)
+    details = {"hotel_name": hotel_name_final, "hotel_url": hotel_url, "rooms": rooms}
+    cache.put_details(hotel_url, details)
+    return details
+
+_cache = None
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = BookingCache()
+    return _cache
+
+async def enrich_prices_async(hotel_names, city, qps=BOOKING_QPS, cache=None):
+    """
+    Booking.com details for every hotel at once, under a per-host rate
+    limit. Returns one dict per hotel, in order; a hotel whose pages could
+    not be fetched gets {"error": ...} instead of failing the rest.
+    """
+    cache = cache or get_cache()
+    limiter = HostRateLimiter(qps)
+
+    async def one(hotel_name, client):
+        try:
+            return await hotel_details_async(client, limiter, cache, hotel_name, city)
+        except Exception as e:
+            return {"error": str(e)}
+
+    async with http_client.AsyncHTTPClient() as client:
+        return await asyncio.gather(*(one(name, client) for name in hotel_names))
+
+def enrich_prices(hotel_names, city, qps=BOOKING_QPS, cache=None):
+    """Blocking wrapper around enrich_prices_async."""
+    return asyncio.run(enrich_prices_async(hotel_names, city, qps, cache))
@@ -0,0 +1,118 @@
+# Regenerates the Booking.com fixture corpus used by bench_html_parsing.py.
+#
+# The pages are synthetic but follow the markup the scraper's selectors
+# target, at realistic sizes: a large <head> full of inline scripts, 25
+# property cards per search page, hotel pages with long descriptions,
+# reviews and nested room tables. Edge cases are included on purpose: a
+# first card without the image link, no results, a hotel page without
+# h2#hp_hotel_name, div-based room rows, rows without a price. Real pages
+# dumped with BOOKING_DEBUG_DIR can be dropped in next to them.
+#
+#     python make_fixtures.py
+
+import gzip
+import os
+import random
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+rng = random.Random(7)
+
+WORDS = ("grand palace residency boutique heritage sea view garden royal comfort inn suites "
+         "lake hill fort lotus orchid taj city central budget luxury villa").split()
+
+
+def words(n):
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def head():
+    scripts = "".join(
+        f"<script>window.__b{i}={{\"k\":\"{words(30)}\",\"v\":[{','.join(str(rng.random()) for _ in range(40))}]}};</script>"
+        for i in range(60)
+    )
+    styles = "".join(f".c{i}{{margin:{i}px;padding:{i % 7}px;color:#{i:06x}}}" for i in range(1500))
+    return f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>Booking.com</title><style>{styles}</style>{scripts}</head>"
+
+
+def chrome(body):
+    nav = "".join(f"<li class='nav-item'><a href='/n/{i}'>{words(2)}</a></li>" for i in range(80))
+    footer = "".join(f"<p class='footer-link'><a href='/f/{i}'>{words(4)}</a></p>" for i in range(200))
+    return f"{head()}<body><header><ul>{nav}</ul></header><main>{body}</main><footer>{footer}</footer></body></html>"
+
+
+def card(i, with_link=True):
+    name = f"{words(2).title()} {rng.choice(['Hotel', 'Resort', 'Inn', 'Suites'])} &amp; Spa {i}"
+    slug = name.lower().replace(" ", "-").replace("&amp;", "and")
+    image = (f"<a data-testid='property-card-desktop-single-image' href='/hotel/in/{slug}.html?aid=304142&amp;ucfs=1'>"
+             f"<img src='https://cf.bstatic.com/{i}.jpg' alt=''><div data-testid='title'> {name} </div></a>"
+             if with_link else f"<img src='https://cf.bstatic.com/{i}.jpg' alt=''>")
+    facilities = "".join(f"<span class='facility'>{words(2)}</span>" for _ in range(12))
+    return (f"<div data-testid='property-card-container' class='c{i}'><div class='card-inner'>{image}"
+            f"<div class='details'><h3><a data-testid='title-link' href='https://www.booking.com/hotel/in/{slug}.html'>"
+            f"<div data-testid='title'>{name}</div></a></h3><div data-testid='review-score'>{rng.randint(60, 99) / 10}</div>"
+            f"<div class='facilities'>{facilities}</div><p>{words(40)}</p>"
+            f"<span data-testid='price-and-discounted-price'>₹ {rng.randint(900, 25000):,}</span></div></div></div>")
+
+
+def search_page(cards, first_without_link=False):
+    body = "".join(card(i, with_link=not (first_without_link and i == 0)) for i in range(cards))
+    filters = "".join(f"<label><input type='checkbox' name='f{i}'>{words(3)}</label>" for i in range(150))
+    return chrome(f"<aside>{filters}</aside><div id='search_results_table'>{body}</div>")
+
+
+def price_cell(i):
+    return (f"<td class='hprt-table-cell-price'><div class='prco-wrapper'>"
+            f"<span class='prco-valign-middle-helper bui-price-display__value'> ₹ {rng.randint(1200, 40000):,} </span>"
+            f"<div class='prd-taxes-and-fees-under-price'>+₹ {rng.randint(100, 900)} taxes</div></div></td>")
+
+
+def room_table(rooms, missing_price_every=0):
+    rows = []
+    for i in range(rooms):
+        nested = f"<table class='bed-types'><tr><td>{words(3)}</td></tr></table>"
+        price = "" if missing_price_every and i % missing_price_every == 0 else price_cell(i)
+        rows.append(f"<tr data-block-id='{i}'><td class='hprt-table-cell-roomtype'>"
+                    f"<a class='hprt-roomtype-link hprt-roomtype-icon-link' href='#RD{i}'> {words(3).title()} Room </a>"
+                    f"{nested}<ul>{''.join(f'<li>{words(2)}</li>' for _ in range(8))}</ul></td>{price}"
+                    f"<td><select name='nr_rooms_{i}'>{''.join(f'<option>{n}</option>' for n in range(10))}</select></td></tr>")
+    return (f"<table class='hprt-table hprt-table-long-language' id='hprt-table'><thead><tr><th>Room type</th>"
+            f"<th>Price</th></tr></thead><tbody>{''.join(rows)}</tbody></table>")
+
+
+def room_divs(rooms):
+    return "".join(
+        f"<div data-testid='room-row' class='room-row'><span data-testid='room-name'>{words(2).title()} Room</span>"
+        f"<div class='bed'>{words(4)}</div><span data-testid='price-and-discounted-price'>₹ {rng.randint(1200, 40000):,}"
+        f"</span></div>" for _ in range(rooms)
+    )
+
+
+def hotel_page(name, rooms_html, name_heading=True):
+    heading = (f"<h2 id='hp_hotel_name' class='pp-header__title'>{name}</h2>" if name_heading
+               else f"<h2 class='d2fee87262 pp-header__title'>{name}</h2>")
+    description = "".join(f"<p>{words(60)}</p>" for _ in range(40))
+    reviews = "".join(f"<div class='review'><h3>{words(5)}</h3><p>{words(80)}</p></div>" for _ in range(120))
+    gallery = "".join(f"<a class='bh-photo-grid-item' href='/p/{i}.jpg'><img src='/p/{i}.jpg'></a>" for i in range(60))
+    return chrome(f"<div id='gallery'>{gallery}</div>{heading}<div id='property_description_content'>{description}"
+                  f"</div><div id='available_rooms'>{rooms_html}</div><div id='reviews'>{reviews}</div>")
+
+
+def main():
+    pages = {
+        "search_typical": search_page(25),
+        "search_first_card_without_image": search_page(25, first_without_link=True),
+        "search_no_results": search_page(0),
+        "hotel_table": hotel_page("Taj Lake Palace &amp; Spa", room_table(12)),
+        "hotel_table_missing_prices": hotel_page("Heritage Fort Inn", room_table(16, missing_price_every=3)),
+        "hotel_div_rows": hotel_page("Lotus Boutique Suites", room_divs(10)),
+        "hotel_plain_heading": hotel_page("Orchid Comfort Hotel", room_table(6), name_heading=False),
+        "hotel_no_rooms": hotel_page("Sold Out Residency", "<p class='sold-out'>No availability</p>"),
+    }
+    for name, page in pages.items():
+        with gzip.open(os.path.join(HERE, f"{name}.html.gz"), "wt", encoding="utf-8") as f:
+            f.write(page)
+        print(f"{name}.html.gz  {len(page) / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import os
+import re
+from lxml import etree, html as lxml_html
+
+# "lxml" (default) or "bs4", the original BeautifulSoup implementation kept
+# as the reference the benchmark checks the fast path against
+HTML_PARSER = os.getenv("HTML_PARSER", "lxml")
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+def _text(node):
+    return node.text_content().strip() if node is not None else None
+
+
+_SEARCH_PAGE_RE = re.compile(
+    r"""<div\b[^>]*(?:id=["']search_results_table["']|data-testid=["']property-card-container["'])"""
+)
+
+
+def is_search_page(page):
+    """
+    Whether `page` is a real search results page (with or without results),
+    as opposed to e.g. a bot challenge or error page served with status 200.
+    """
+    return _SEARCH_PAGE_RE.search(page) is not None
+
+
+# ---------- BeautifulSoup (reference) ---------- #
+class SoupParser:
+    """Full BeautifulSoup tree + CSS selectors: what the scraper started with."""
+
+    name = "bs4"
+
+    def search_result(self, page):
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(page, "lxml")
+        first_result = soup.select_one(
+            "div[data-testid='property-card-container'] a[data-testid='property-card-desktop-single-image']"
+        )
+        if not first_result:
+            return None, None
+        title = first_result.select_one("div[data-testid='title']")
+        return first_result.get("href"), title.text.strip() if title else None
+
+    def hotel_page(self, page):
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(page, "lxml")
+        name_tag = soup.select_one("h2#hp_hotel_name") or soup.select_one("h2")
+        rooms = []
+        room_rows = soup.select("table.hprt-table tr") or soup.select("div[data-testid='room-row']")
+        for room in room_rows:
+            room_type = room.select_one(".hprt-roomtype-icon-link") or room.select_one("span[data-testid='room-name']")
+            price = room.select_one(".bui-price-display__value") or room.select_one("span[data-testid='price-and-discounted-price']")
+            if room_type and price:
+                rooms.append((room_type.text.strip(), price.text.strip()))
+        return name_tag.text.strip() if name_tag else None, rooms
+
+
+# ---------- lxml (fast path) ---------- #
+_CARD_RE = re.compile(r"""<div\b[^>]*data-testid=["']property-card-container["']""")
+_HOTEL_NAME_RE = re.compile(r"""<h2\b[^>]*id=["']hp_hotel_name["'][^>]*>.*?</h2>""", re.S)
+_ROOM_TABLE_RE = re.compile(r"""<table\b[^>]*class=["'][^"']*\bhprt-table\b""")
+_ROOM_ROW_RE = re.compile(r"""<div\b[^>]*data-testid=["']room-row["']""")
+
+
+class LxmlParser:
+    """
+    lxml.html with precompiled XPath, parsing only the part of the page the
+    selectors can match: the first property card of a search page, the
+    name heading and room table of a hotel page. Pages whose markup the
+    cheap regex cut cannot locate are parsed whole, so the answers match
+    SoupParser either way.
+    """
+
+    name = "lxml"
+
+    _first_card_link = etree.XPath(
+        "//div[@data-testid='property-card-container']//a[@data-testid='property-card-desktop-single-image']"
+    )
+    _card_title = etree.XPath(".//div[@data-testid='title']")
+    _hotel_name = etree.XPath("//h2[@id='hp_hotel_name']")
+    _any_h2 = etree.XPath("//h2")
+    _table_rows = etree.XPath(f"//table[{_has_class('hprt-table')}]//tr")
+    _div_rows = etree.XPath("//div[@data-testid='room-row']")
+    _room_type = etree.XPath(f".//*[{_has_class('hprt-roomtype-icon-link')}]")
+    _room_name = etree.XPath(".//span[@data-testid='room-name']")
+    _price = etree.XPath(f".//*[{_has_class('bui-price-display__value')}]")
+    _discounted_price = etree.XPath(".//span[@data-testid='price-and-discounted-price']")
+
+    @staticmethod
+    def _parse(page):
+        return lxml_html.document_fromstring(page) if page.strip() else None
+
+    def search_result(self, page):
+        match = _CARD_RE.search(page)
+        if match:
+            # The first card runs until the next one starts (or the page ends)
+            following = _CARD_RE.search(page, match.end())
+            tree = self._parse(page[match.start():following.start() if following else len(page)])
+            links = self._first_card_link(tree) if tree is not None else []
+        else:
+            links = []
+        if not links:
+            if match:
+                # Unexpected nesting: fall back to the whole page
+                tree = self._parse(page)
+                links = self._first_card_link(tree) if tree is not None else []
+            if not links:
+                return None, None
+        link = links[0]
+        titles = self._card_title(link)
+        return link.get("href"), _text(titles[0]) if titles else None
+
+    def hotel_page(self, page):
+        name_match = _HOTEL_NAME_RE.search(page)
+        rooms_match = _ROOM_TABLE_RE.search(page) or _ROOM_ROW_RE.search(page)
+        if name_match and rooms_match:
+            tree = self._parse(name_match.group(0) + page[rooms_match.start():])
+        else:
+            tree = self._parse(page)
+        if tree is None:
+            return None, []
+
+        names = self._hotel_name(tree) or self._any_h2(tree)
+        rooms = []
+        for row in self._table_rows(tree) or self._div_rows(tree):
+            room_type = self._room_type(row) or self._room_name(row)
+            price = self._price(row) or self._discounted_price(row)
+            if room_type and price:
+                rooms.append((_text(room_type[0]), _text(price[0])))
+        return _text(names[0]) if names else None, rooms
+
+
+PARSERS = {"bs4": SoupParser, "lxml": LxmlParser}
+
+
+def get_parser(name=None):
+    """The parser backend named by `name` or HTML_PARSER."""
+    name = name or HTML_PARSER
+    try:
+        return PARSERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown HTML parser '{name}', expected one of {sorted(PARSERS)}") from None
@@ -0,0 +1,163 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+
+PHOTO_URL = "https://maps.googleapis.com/maps/api/place/photo"
+
+PRICE_LEVELS = {
+    1: "Cheap",
+    2: "Moderate",
+    3: "Expensive",
+    4: "Luxury"
+}
+
+
+class PlaceFilter:
+    """Which raw Nearby Search results make it into a category's records."""
+
+    __slots__ = ("min_rating", "min_reviews", "blacklist")
+
+    def __init__(self, min_rating=4, min_reviews=50, blacklist=()):
+        self.min_rating = min_rating
+        self.min_reviews = min_reviews
+        self.blacklist = tuple(word.lower() for word in blacklist)
+
+    def accepts(self, place):
+        if place.get("rating", 0) < self.min_rating or place.get("user_ratings_total", 0) < self.min_reviews:
+            return False
+        name = place.get("name", "").lower()
+        return not any(word in name for word in self.blacklist)
+
+
+DEFAULT_FILTERS = {
+    "attractions": PlaceFilter(4, 500, blacklist=("tours", "travel", "agency", "transport")),
+    "hotels": PlaceFilter(4, 1000),
+    "restaurants": PlaceFilter(4, 50),
+    "nightlife": PlaceFilter(4, 50),
+}
+
+
+class PlaceRecord:
+    """
+    One venue, whatever category it was found under. Only the fields the
+    scripts use are kept (the raw result carries dozens), and the photo URL
+    is built on demand from the reference rather than stored per record.
+    """
+
+    __slots__ = ("place_id", "name", "rating", "reviews", "address", "lat", "lng", "price_level",
+                 "photo_ref", "categories")
+
+    def __init__(self, place_id, name, rating=0, reviews=0, address=None, lat=None, lng=None,
+                 price_level=None, photo_ref=None, categories=()):
+        self.place_id = place_id
+        self.name = name
+        self.rating = rating
+        self.reviews = reviews
+        self.address = address
+        self.lat = lat
+        self.lng = lng
+        self.price_level = price_level
+        self.photo_ref = photo_ref
+        self.categories = list(categories)
+
+    @classmethod
+    def from_api(cls, place, category):
+        location = place.get("geometry", {}).get("location") or {}
+        photos = place.get("photos")
+        return cls(
+            place.get("place_id") or place.get("name"),
+            place.get("name"),
+            place.get("rating", 0),
+            place.get("user_ratings_total", 0),
+            place.get("vicinity"),
+            location.get("lat"),
+            location.get("lng"),
+            place.get("price_level"),
+            photos[0].get("photo_reference") if photos else None,
+            (category,),
+        )
+
+    @property
+    def location(self):
+        return {"lat": self.lat, "lng": self.lng} if self.lat is not None else None
+
+    @property
+    def price_label(self):
+        return PRICE_LEVELS.get(self.price_level)
+
+    def photo_url(self, maxwidth=400):
+        if not self.photo_ref:
+            return None
+        return f"{PHOTO_URL}?maxwidth={maxwidth}&photoreference={self.photo_ref}&key={GOOGLE_API_KEY}"
+
+    def to_dict(self):
+        return {
+            "place_id": self.place_id,
+            "name": self.name,
+            "rating": self.rating,
+            "reviews": self.reviews,
+            "address": self.address,
+            "location": self.location,
+            "price_level": self.price_label,
+            "photo_url": self.photo_url(),
+            "categories": list(self.categories),
+        }
+
+    def __repr__(self):
+        return f"PlaceRecord({self.name!r}, {self.rating}, {self.reviews}, {self.categories})"
+
+
+def iter_records(places, category, place_filter=None, seen=None):
+    """
+    Streams records for one category's raw results.
+
+    Args:
+        places (iterable): Raw Nearby Search results; consumed lazily.
+        category (str): Category the results were fetched under.
+        place_filter (PlaceFilter): Defaults to DEFAULT_FILTERS[category].
+        seen (dict): place_id -> record already yielded. A venue already in
+            it is not yielded again; its record gains `category` instead.
+            Pass the same dict across categories and pages to dedup them.
+    """
+    place_filter = place_filter or DEFAULT_FILTERS.get(category) or PlaceFilter()
+    seen = {} if seen is None else seen
+    for place in places:
+        if not place_filter.accepts(place):
+            continue
+        key = place.get("place_id") or place.get("name")
+        record = seen.get(key)
+        if record is not None:
+            if category not in record.categories:
+                record.categories.append(category)
+            continue
+        record = PlaceRecord.from_api(place, category)
+        seen[key] = record
+        yield record
+
+
+def iter_bundle_records(bundle, filters=None):
+    """
+    Streams deduplicated records from a {category: raw results} bundle, as
+    returned by places_fetcher.fetch_city. Memory is bounded by the number of
+    accepted venues in one bundle, so a multi-city pull can write each city
+    out and let its records go before fetching the next.
+    """
+    filters = filters or {}
+    seen = {}
+    for category, places in bundle.items():
+        yield from iter_records(places, category, filters.get(category), seen)
+
+
+def show_places(records, top_n=5):
+    """Display the best-rated records"""
+    ranked = sorted(records, key=lambda r: (r.rating, r.reviews), reverse=True)
+    for i, r in enumerate(ranked[:top_n], 1):
+        price = f" | Price Level: {r.price_label}" if r.price_label else ""
+        print(f"{i}. {r.name} ({r.rating}⭐, {r.reviews} reviews){price}")
+        print(f"   📍 {r.address}")
+        photo = r.photo_url()
+        if photo:
+            print(f"   🖼 Photo: {photo}")
+    return ranked[:top_n]
@@ -0,0 +1,202 @@
+import asyncio
+import os
+import time
+from dotenv import load_dotenv
+import shared_path  # noqa: F401
+import http_client
+from utils import get_coordinates
+from place_records import iter_bundle_records
+from poi_store import MAX_RESULTS, get_store, sub_circles
+
+load_dotenv()
+GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+
+PLACES_URL = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+
+# Google caps Nearby Search well above this; keep headroom for other callers
+PLACES_QPS = float(os.getenv("PLACES_QPS", "10"))
+# A next_page_token only becomes valid a short while after it is issued:
+# poll it first after PAGE_TOKEN_DELAY, then every PAGE_TOKEN_RETRY seconds
+PAGE_TOKEN_DELAY = 1.5
+PAGE_TOKEN_RETRY = 0.5
+PAGE_TOKEN_POLLS = 8
+
+ATTRACTION_KEYWORDS = "museum|park|temple|monument|garden|beach"
+NIGHTLIFE_TYPES = ["night_club", "bar"]
+CATEGORIES = ("attractions", "hotels", "restaurants", "nightlife")
+
+
+def default_radius(category):
+    return 5000 if category == "nightlife" else 4000
+
+
+def category_queries(category, location, radius=None, keyword=""):
+    """Nearby Search parameter sets for one category; each is paged separately."""
+    if category == "attractions":
+        queries = [{"type": "tourist_attraction", "keyword": ATTRACTION_KEYWORDS}]
+    elif category == "hotels":
+        queries = [{"type": "lodging", "keyword": "hotel"}]
+    elif category == "restaurants":
+        queries = [{"type": "restaurant", "keyword": keyword}]
+    elif category == "nightlife":
+        queries = [{"type": place_type} for place_type in NIGHTLIFE_TYPES]
+    else:
+        raise ValueError(f"Unknown category '{category}'")
+    radius = radius or default_radius(category)
+    return [{"location": location, "radius": radius, "key": GOOGLE_API_KEY, **q} for q in queries]
+
+
+class RateLimiter:
+    """Spaces request starts at least 1/qps apart across every task on the loop."""
+
+    def __init__(self, qps=PLACES_QPS):
+        self.interval = 1.0 / qps
+        self._next = 0.0
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, self._next)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+async def fetch_query(client, limiter, params, errors=None):
+    """
+    Pages through one Nearby Search query. Between pages the task parks on
+    an event-loop timer until the token is valid, so the other queries keep
+    running in the meantime. Statuses other than OK / ZERO_RESULTS, and
+    "PAGE_TOKEN_TIMEOUT" when a page token never became valid (the
+    remaining pages are then missing), are appended to `errors`.
+    """
+    results = []
+    while True:
+        for _ in range(PAGE_TOKEN_POLLS):
+            await limiter.acquire()
+            data = await client.get_json(PLACES_URL, params=params)
+            # On a page token, INVALID_REQUEST means "not valid yet"
+            if "pagetoken" not in params or data.get("status") != "INVALID_REQUEST":
+                break
+            await asyncio.sleep(PAGE_TOKEN_RETRY)
+        else:
+            # The rest of the pages are lost; callers must not treat this as complete
+            print(f"Nearby Search page token still invalid after {PAGE_TOKEN_POLLS} polls; "
+                  f"keeping {len(results)} results")
+            if errors is not None:
+                errors.append("PAGE_TOKEN_TIMEOUT")
+            return results
+        if errors is not None and data.get("status") not in ("OK", "ZERO_RESULTS"):
+            errors.append(data.get("status"))
+        results.extend(data.get("results", []))
+
+        next_page = data.get("next_page_token")
+        if not next_page:
+            return results
+        params = {"pagetoken": next_page, "key": GOOGLE_API_KEY}
+        await asyncio.sleep(PAGE_TOKEN_DELAY)
+
+
+async def fetch_circle(client, limiter, category, location, radius=None, keyword="", errors=None):
+    """Every query of one category around `location`, paged concurrently."""
+    queries = category_queries(category, location, radius, keyword)
+    pages = await asyncio.gather(*(fetch_query(client, limiter, q, errors) for q in queries))
+    return [place for page in pages for place in page]
+
+
+async def fetch_category_async(client, limiter, category, location, radius=None, keyword="", store=None):
+    """
+    Raw results for one category. With a POIStore, only the part of the
+    circle it has no fresh data for goes upstream; the answer is then read
+    back from the store.
+    """
+    radius = radius or default_radius(category)
+    if store is None:
+        return await fetch_circle(client, limiter, category, location, radius, keyword)
+
+    lat, lng = (float(v) for v in location.split(","))
+
+    async def pull(c_lat, c_lng, c_radius):
+        """Fetches a circle into the store; True once it is covered."""
+        errors = []
+        queries = category_queries(category, f"{c_lat},{c_lng}", c_radius, keyword)
+        pages = await asyncio.gather(*(fetch_query(client, limiter, q, errors) for q in queries))
+        places = [place for page in pages for place in page]
+        # A denied or over-quota pull says nothing about the area: keep what
+        # came back, but don't mark the circle as covered
+        if errors:
+            store.add(category, keyword, c_lat, c_lng, c_radius, places, covered=False)
+            return False
+        # One cut off at MAX_RESULTS holds the most prominent places, not the
+        # nearest, so no radius of it is complete: cover it with sub-circles
+        capped = any(len(page) >= MAX_RESULTS for page in pages)
+        if not (capped and store.split(c_radius)):
+            store.add(category, keyword, c_lat, c_lng, c_radius, places)
+            return True
+        store.add(category, keyword, c_lat, c_lng, c_radius, places, covered=False)
+        parts = await asyncio.gather(*(pull(*part) for c in sub_circles(c_lat, c_lng, c_radius)
+                                       for part in store.uncovered(category, keyword, *c)))
+        if all(parts):
+            store.cover(category, keyword, c_lat, c_lng, c_radius)
+        return all(parts)
+
+    parts = store.uncovered(category, keyword, lat, lng, radius)
+    if parts and all(await asyncio.gather(*(pull(*c) for c in parts))):
+        # Covered piecewise now; one row saves re-deriving that on every lookup
+        store.cover(category, keyword, lat, lng, radius)
+    return store.query(category, keyword, lat, lng, radius)
+
+
+async def fetch_city_async(location, categories=CATEGORIES, restaurant_keyword="", qps=PLACES_QPS,
+                           timings=None, use_store=True):
+    """
+    Fetches every query of every category concurrently under one QPS limit.
+
+    Returns:
+        dict: category -> raw Nearby Search results, as the per-category
+        fetch_* functions return them
+    """
+    limiter = RateLimiter(qps)
+    store = get_store() if use_store else None
+    start = time.perf_counter()
+
+    async def run(category, client):
+        keyword = restaurant_keyword if category == "restaurants" else ""
+        places = await fetch_category_async(client, limiter, category, location, keyword=keyword, store=store)
+        if timings is not None:
+            timings[category] = time.perf_counter() - start
+        return places
+
+    async with http_client.AsyncHTTPClient() as client:
+        results = await asyncio.gather(*(run(category, client) for category in categories))
+    return dict(zip(categories, results))
+
+
+def fetch_city(location, categories=CATEGORIES, restaurant_keyword="", qps=PLACES_QPS, timings=None,
+               use_store=True):
+    """Blocking wrapper around fetch_city_async for scripts."""
+    return asyncio.run(fetch_city_async(location, categories, restaurant_keyword, qps, timings, use_store))
+
+
+def fetch_category(category, location, radius=None, keyword="", qps=PLACES_QPS, use_store=True):
+    """All results for one category, its queries (e.g. nightlife types) paged concurrently."""
+
+    async def run():
+        async with http_client.AsyncHTTPClient() as client:
+            return await fetch_category_async(client, RateLimiter(qps), category, location, radius, keyword,
+                                              get_store() if use_store else None)
+
+    return asyncio.run(run())
+
+
+if __name__ == "__main__":
+    city = input("Enter city/area: ")
+    location = get_coordinates(city)
+    timings = {}
+    start = time.perf_counter()
+    bundle = fetch_city(location, timings=timings)
+    print(f"\nFetched {city} in {time.perf_counter() - start:.1f}s:")
+    for category, places in bundle.items():
+        print(f"  {category:<12} {len(places):>4} places ({timings[category]:.1f}s)")
+    records = list(iter_bundle_records(bundle))
+    print(f"  {len(records)} distinct places pass the filters")
@@ -0,0 +1,243 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+
+_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+POI_STORE_PATH = os.getenv("POI_STORE_PATH", os.path.join(_ROOT, "data", "cache", "poi.sqlite"))
+# Ratings and opening status drift; venues themselves don't move
+POI_TTL = float(os.getenv("POI_TTL", str(3 * 24 * 3600)))
+
+EARTH_RADIUS_M = 6371000.0
+# Nearby Search answers 20 places a page and at most three pages a query
+PAGE_SIZE = 20
+MAX_PAGES = 3
+MAX_RESULTS = PAGE_SIZE * MAX_PAGES
+# A pull that hits MAX_RESULTS is split into sub-circles down to this radius;
+# circles this small are covered with whatever one query returns
+MIN_SPLIT_RADIUS = float(os.getenv("POI_MIN_SPLIT_RADIUS", "250"))
+
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    """Great-circle distance in metres."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat, lng, radius_m):
+    """(min_lat, max_lat, min_lng, max_lng) enclosing the circle."""
+    dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+    dlng = dlat / max(math.cos(math.radians(lat)), 1e-6)
+    return lat - dlat, lat + dlat, max(lng - dlng, -180.0), min(lng + dlng, 180.0)
+
+
+def sub_circles(lat, lng, radius_m):
+    """
+    Seven circles of half the radius that together cover the circle: one
+    in the middle and six on a ring at sqrt(3)/2 of the radius.
+    """
+    circles = [(lat, lng, radius_m / 2)]
+    ring = radius_m * math.sqrt(3) / 2
+    for k in range(6):
+        bearing = math.radians(60 * k)
+        dlat = math.degrees(ring * math.cos(bearing) / EARTH_RADIUS_M)
+        dlng = math.degrees(ring * math.sin(bearing) / EARTH_RADIUS_M) / max(math.cos(math.radians(lat)), 1e-6)
+        circles.append((lat + dlat, lng + dlng, radius_m / 2))
+    return circles
+
+
+class POIStore:
+    """
+    Places from earlier Nearby Search pulls, in SQLite with R*Tree indexes
+    over both the places and the circles that were fetched ("coverage").
+
+    A (category, keyword) query for a circle is answered from here when a
+    fresh coverage circle contains it. Otherwise `uncovered` says which part
+    still has to go upstream: the whole circle, or those of its seven
+    half-radius sub-circles that are not covered yet, whichever is estimated
+    to take fewer calls.
+
+    Nearby Search stops at MAX_RESULTS, the most prominent places rather
+    than the nearest, so a capped pull covers nothing: callers split its
+    circle (see `split`) until every part comes back under the cap.
+    """
+
+    def __init__(self, path=POI_STORE_PATH, ttl=POI_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS places (
+                id INTEGER PRIMARY KEY, place_id TEXT NOT NULL, category TEXT NOT NULL,
+                keyword TEXT NOT NULL, name TEXT, rating REAL, reviews INTEGER, address TEXT,
+                lat REAL NOT NULL, lng REAL NOT NULL, price_level INTEGER, photo_ref TEXT,
+                fetched_at REAL NOT NULL, UNIQUE (place_id, category, keyword));
+            CREATE VIRTUAL TABLE IF NOT EXISTS places_rtree USING rtree(id, min_lat, max_lat, min_lng, max_lng);
+            CREATE TABLE IF NOT EXISTS coverage (
+                id INTEGER PRIMARY KEY, category TEXT NOT NULL, keyword TEXT NOT NULL,
+                lat REAL NOT NULL, lng REAL NOT NULL, radius REAL NOT NULL, fetched_at REAL NOT NULL);
+            CREATE VIRTUAL TABLE IF NOT EXISTS coverage_rtree USING rtree(id, min_lat, max_lat, min_lng, max_lng);
+        """)
+        self._db.commit()
+
+    # ───────────────────────────────────────
+    # Coverage
+    # ───────────────────────────────────────
+    def _coverage_near(self, category, keyword, lat, lng, radius):
+        min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius)
+        return self._db.execute(
+            "SELECT c.lat, c.lng, c.radius FROM coverage_rtree r JOIN coverage c ON c.id = r.id"
+            " WHERE r.max_lat >= ? AND r.min_lat <= ? AND r.max_lng >= ? AND r.min_lng <= ?"
+            " AND c.category = ? AND c.keyword = ? AND c.fetched_at >= ?",
+            (min_lat, max_lat, min_lng, max_lng, category, keyword, time.time() - self.ttl),
+        ).fetchall()
+
+    @staticmethod
+    def _contained(circles, lat, lng, radius):
+        return any(haversine_m(c_lat, c_lng, lat, lng) + radius <= c_radius + 1.0
+                   for c_lat, c_lng, c_radius in circles)
+
+    def uncovered(self, category, keyword, lat, lng, radius):
+        """Circles (lat, lng, radius) that must be fetched upstream before `query` is complete."""
+        with self._lock:
+            near = self._coverage_near(category, keyword, lat, lng, radius)
+        if self._contained(near, lat, lng, radius):
+            return []
+        missing = [c for c in sub_circles(lat, lng, radius) if not self._contained(near, *c)]
+        if len(missing) == 7:
+            return [(lat, lng, radius)]
+        # Density from the places already stored, spread over the covered
+        # part; a sub-circle has a quarter of the full circle's area
+        expected = len(self.query(category, keyword, lat, lng, radius)) * 7 / (7 - len(missing))
+        if self.calls(expected, radius) <= len(missing) * self.calls(expected / 4, radius / 2):
+            return [(lat, lng, radius)]
+        return missing
+
+    @staticmethod
+    def split(radius):
+        """Whether a pull of this radius that hit MAX_RESULTS is redone as sub-circles."""
+        return radius / 2 >= MIN_SPLIT_RADIUS
+
+    @classmethod
+    def calls(cls, expected_places, radius):
+        """Nearby Search calls one query takes to cover a circle holding `expected_places`, splits included."""
+        pages = min(MAX_PAGES, max(1, math.ceil(expected_places / PAGE_SIZE)))
+        if expected_places < MAX_RESULTS or not cls.split(radius):
+            return pages
+        return pages + 7 * cls.calls(expected_places / 4, radius / 2)
+
+    def covered(self, category, keyword, lat, lng, radius):
+        return not self.uncovered(category, keyword, lat, lng, radius)
+
+    def cover(self, category, keyword, lat, lng, radius):
+        """Marks a circle fetched, e.g. once all the sub-circles of a capped pull are in."""
+        with self._lock:
+            self._cover(category, keyword, lat, lng, radius, time.time())
+            self._db.commit()
+
+    def _cover(self, category, keyword, lat, lng, radius, now):
+        rowid = self._db.execute(
+            "INSERT INTO coverage (category, keyword, lat, lng, radius, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (category, keyword, lat, lng, radius, now)).lastrowid
+        self._db.execute("INSERT INTO coverage_rtree VALUES (?, ?, ?, ?, ?)", (rowid, *bounding_box(lat, lng, radius)))
+
+    # ───────────────────────────────────────
+    # Places
+    # ───────────────────────────────────────
+    def add(self, category, keyword, lat, lng, radius, places, covered=True):
+        """Stores the raw results of one Nearby Search pull and, if `covered`, marks its circle fetched."""
+        now = time.time()
+        with self._lock:
+            for place in places:
+                location = place.get("geometry", {}).get("location") or {}
+                p_lat, p_lng = location.get("lat"), location.get("lng")
+                if p_lat is None or p_lng is None:
+                    continue
+                photos = place.get("photos")
+                row = (place.get("name"), place.get("rating", 0), place.get("user_ratings_total", 0),
+                       place.get("vicinity"), p_lat, p_lng, place.get("price_level"),
+                       photos[0].get("photo_reference") if photos else None, now)
+                key = (place.get("place_id") or place.get("name"), category, keyword)
+                found = self._db.execute(
+                    "SELECT id FROM places WHERE place_id = ? AND category = ? AND keyword = ?", key
+                ).fetchone()
+                if found:
+                    self._db.execute(
+                        "UPDATE places SET name = ?, rating = ?, reviews = ?, address = ?, lat = ?, lng = ?,"
+                        " price_level = ?, photo_ref = ?, fetched_at = ? WHERE id = ?", (*row, found[0]))
+                    self._db.execute("UPDATE places_rtree SET min_lat = ?, max_lat = ?, min_lng = ?, max_lng = ?"
+                                     " WHERE id = ?", (p_lat, p_lat, p_lng, p_lng, found[0]))
+                else:
+                    rowid = self._db.execute(
+                        "INSERT INTO places (place_id, category, keyword, name, rating, reviews, address, lat, lng,"
+                        " price_level, photo_ref, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (*key, *row)).lastrowid
+                    self._db.execute("INSERT INTO places_rtree VALUES (?, ?, ?, ?, ?)",
+                                     (rowid, p_lat, p_lat, p_lng, p_lng))
+            if covered:
+                self._cover(category, keyword, lat, lng, radius, now)
+            self._db.commit()
+
+    def query(self, category, keyword, lat, lng, radius):
+        """
+        Fresh places of a category within `radius` metres, shaped like Nearby
+        Search results so the place_records pipeline takes them unchanged.
+        """
+        min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT p.place_id, p.name, p.rating, p.reviews, p.address, p.lat, p.lng, p.price_level, p.photo_ref"
+                " FROM places_rtree r JOIN places p ON p.id = r.id"
+                " WHERE r.max_lat >= ? AND r.min_lat <= ? AND r.max_lng >= ? AND r.min_lng <= ?"
+                " AND p.category = ? AND p.keyword = ? AND p.fetched_at >= ?",
+                (min_lat, max_lat, min_lng, max_lng, category, keyword, time.time() - self.ttl),
+            ).fetchall()
+        places = []
+        for place_id, name, rating, reviews, address, p_lat, p_lng, price_level, photo_ref in rows:
+            if haversine_m(lat, lng, p_lat, p_lng) > radius:
+                continue
+            place = {
+                "place_id": place_id,
+                "name": name,
+                "rating": rating,
+                "user_ratings_total": reviews,
+                "vicinity": address,
+                "geometry": {"location": {"lat": p_lat, "lng": p_lng}},
+            }
+            if price_level is not None:
+                place["price_level"] = price_level
+            if photo_ref:
+                place["photos"] = [{"photo_reference": photo_ref}]
+            places.append(place)
+        return places
+
+    def prune(self):
+        """Drops expired places and coverage."""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            for table in ("places", "coverage"):
+                self._db.execute(f"DELETE FROM {table}_rtree WHERE id IN"
+                                 f" (SELECT id FROM {table} WHERE fetched_at < ?)", (cutoff,))
+                self._db.execute(f"DELETE FROM {table} WHERE fetched_at < ?", (cutoff,))
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_store = None
+
+
+def get_store():
+    """Process-wide store at POI_STORE_PATH; None when POI_STORE_PATH is set empty."""
+    global _store
+    if _store is None and POI_STORE_PATH:
+        _store = POIStore()
+    return _store
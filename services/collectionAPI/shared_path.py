@@ -0,0 +1,12 @@
+# Puts services/shared (http_client, geocode, distance_matrix, route_cache,
+# ...) on sys.path for the collectionAPI scripts. Import it before any of
+# those modules:
+#
+#     import shared_path  # noqa: F401
+
+import os
+import sys
+
+SHARED_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+if SHARED_DIR not in sys.path:
+    sys.path.append(SHARED_DIR)
@@ -1,9 +1,12 @@
-import requests
 import os
 import time
 from dotenv import load_dotenv
 from html import unescape
+import shared_path  # noqa: F401
+import http_client
 from utils import get_coordinates
+from distance_matrix import DistanceMatrix
+from route_cache import TRANSIT_FRESH_TTL, get_route_cache, route_key
 
 load_dotenv()
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
@@ -12,8 +15,59 @@ DIRECTIONS_URL = "https://maps.googleapis.com/maps/api/directions/json"
 GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
 
 
+_matrix = None
+
+def get_travel_matrix(origins, destinations=None, mode="driving"):
+    """
+    Distance (m) / duration (s) matrices between many origins and
+    destinations ("lat,lng" strings or (lat, lng)), fetched in batched,
+    concurrent Distance Matrix calls and cached per mode. Cells Google
+    cannot answer are estimated from the straight-line distance.
+
+    Returns:
+        dict: "distance_m", "duration_s" and "source" N x M arrays
+    """
+    global _matrix
+    if _matrix is None:
+        _matrix = DistanceMatrix(GOOGLE_API_KEY)
+    return _matrix.matrix(origins, origins if destinations is None else destinations, mode)
+
+def _compact_leg(leg):
+    """A Directions leg as stored in the route cache: steps as positional arrays."""
+    steps = []
+    for step in leg["steps"]:
+        if step["travel_mode"] == "TRANSIT":
+            transit = step["transit_details"]
+            line_info = transit.get("line", {})
+            steps.append([
+                "T",
+                line_info.get("vehicle", {}).get("type", "Transit"),
+                line_info.get("name") or line_info.get("short_name") or "Unknown Line",
+                transit["departure_stop"]["name"],
+                transit["departure_time"]["text"],
+                transit["arrival_stop"]["name"],
+                transit["arrival_time"]["text"],
+            ])
+        else:
+            steps.append(["W", unescape(step["html_instructions"]), step["distance"]["text"], step["duration"]["text"]])
+    return {"distance": leg["distance"]["text"], "duration": leg["duration"]["text"], "steps": steps}
+
+def _format_step(step):
+    if step[0] == "T":
+        _, vehicle, line_name, departure_stop, departure_time, arrival_stop, arrival_time = step
+        return (f"Take {vehicle} {line_name} from {departure_stop} at {departure_time} "
+                f"and get off at {arrival_stop} at {arrival_time}")
+    # Walking / Driving
+    _, instructions, distance, duration = step
+    return f"Walk/Drive: {instructions} ({distance}, {duration})"
+
 def get_directions(origin, destination, mode="transit", transit_type=None):
-    """Fetch directions from Google Directions API"""
+    """
+    Fetch directions from Google Directions API, through the persistent route
+    cache. Transit directions are only reused within their departure bucket,
+    as they give clock times. If Google fails, the last directions it gave
+    for the same trip are returned, if there are any.
+    """
     params = {
         "origin": origin,
         "destination": destination,
@@ -27,38 +81,33 @@ def get_directions(origin, destination, mode="transit", transit_type=None):
         params["transit_mode"] = transit_map.get(transit_type, "bus")
         params["departure_time"] = int(time.time())  # now
 
-    response = requests.get(DIRECTIONS_URL, params=params).json()
-    if response["status"] != "OK":
-        print(f"Could not fetch directions ({mode}):", response["status"])
-        return None
-
-    route = response["routes"][0]["legs"][0]
-    steps_info = []
-
-    for step in route["steps"]:
-        if step["travel_mode"] == "TRANSIT":
-            transit = step["transit_details"]
-            line_info = transit.get("line", {})
-            line_name = line_info.get("name") or line_info.get("short_name") or "Unknown Line"
-            vehicle = line_info.get("vehicle", {}).get("type", "Transit")
-            departure_stop = transit["departure_stop"]["name"]
-            arrival_stop = transit["arrival_stop"]["name"]
-            departure_time = transit["departure_time"]["text"]
-            arrival_time = transit["arrival_time"]["text"]
-            steps_info.append(
-                f"Take {vehicle} {line_name} from {departure_stop} at {departure_time} "
-                f"and get off at {arrival_stop} at {arrival_time}"
-            )
+    # Steps only make sense one way round, so the key is directional
+    key = route_key(origin, destination, mode, departure_time=params.get("departure_time", time.time()),
+                    variant=params.get("transit_mode", ""))
+    cache = get_route_cache()
+    leg = cache.get(key, ttl=TRANSIT_FRESH_TTL if mode == "transit" else None)
+    if leg is None:
+        try:
+            response = http_client.get_json(DIRECTIONS_URL, params=params)
+            status = response["status"]
+        except Exception as e:
+            response, status = None, str(e)
+        if status == "OK":
+            leg = _compact_leg(response["routes"][0]["legs"][0])
+            cache.put(key, leg)
         else:
-            # Walking / Driving
-            instructions = unescape(step["html_instructions"])
-            steps_info.append(f"Walk/Drive: {instructions} ({step['distance']['text']}, {step['duration']['text']})")
+            leg = cache.get_stale(key)
+            if leg is None:
+                print(f"Could not fetch directions ({mode}):", status)
+                return None
+            note = " (its times are from an earlier departure)" if mode == "transit" else ""
+            print(f"Could not fetch directions ({mode}): {status}; showing the last known route{note}")
 
     return {
         "mode": mode,
-        "distance": route["distance"]["text"],
-        "duration": route["duration"]["text"],
-        "steps": steps_info
+        "distance": leg["distance"],
+        "duration": leg["duration"],
+        "steps": [_format_step(step) for step in leg["steps"]]
     }
 
 if __name__ == "__main__":
@@ -1,23 +1,41 @@
-import requests
 import os
 from dotenv import load_dotenv
+import shared_path  # noqa: F401
+import http_client
+from geocode import Geocoder
 
 load_dotenv()
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
 
+def _google_geocode(place_name):
+    params = {"address": place_name, "key": GOOGLE_API_KEY}
+    response = http_client.get_json(GEOCODE_URL, params=params)
+
+    if response["status"] == "OK" and response.get("results"):
+        result = response["results"][0]
+        location = result["geometry"]["location"]
+        return location["lat"], location["lng"], result.get("formatted_address", place_name)
+    if response["status"] == "ZERO_RESULTS":
+        return None
+    # Quota and auth errors are not an answer about the place, so don't cache them
+    raise ValueError(f"Could not fetch coordinates for '{place_name}': {response['status']}")
+
+_geocoder = None
+
 def get_coordinates(place_name):
     """
     Convert a place name (city, area, landmark) to lat,lng coordinates.
+    Cities come from the offline gazetteer, anything else from the
+    on-disk geocode cache before the Google Geocoding API is called.
     
     Returns:
         str: "lat,lng"
     """
-    params = {"address": place_name, "key": GOOGLE_API_KEY}
-    response = requests.get(GEOCODE_URL, params=params).json()
-    
-    if response["status"] == "OK" and response.get("results"):
-        location = response["results"][0]["geometry"]["location"]
-        return f"{location['lat']},{location['lng']}"
-    else:
+    global _geocoder
+    if _geocoder is None:
+        _geocoder = Geocoder(_google_geocode)
+    place = _geocoder.geocode(place_name)
+    if place is None:
         raise ValueError(f"Could not fetch coordinates for '{place_name}'")
+    return f"{place[0]},{place[1]}"
@@ -0,0 +1,102 @@
+# services/shared/bench_http_client.py
+#
+# Per-call latency of bare `requests.get` (a new connection every call)
+# against the pooled keep-alive client, sync and async, on a local stub
+# server. Also checks that 503s are retried. Run from services/shared:
+#
+#     python bench_http_client.py --calls 500
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+
+import http_client
+
+BODY = json.dumps({"status": "OK", "results": [{"name": f"place {i}"} for i in range(20)]}).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+    flaky_calls = 0
+
+    def do_GET(self):
+        if self.path.startswith("/flaky"):
+            StubHandler.flaky_calls += 1
+            if StubHandler.flaky_calls % 3:
+                self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.send_header("Retry-After", "0")
+                self.end_headers()
+                return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def timed(fn, calls):
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return np.array(timings) * 1000
+
+
+async def async_timed(url, calls, concurrency):
+    async with http_client.AsyncHTTPClient() as client:
+        await client.get_json(url)
+        semaphore = asyncio.Semaphore(concurrency)
+        timings = []
+
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                await client.get_json(url)
+                timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(calls)))
+        return np.array(timings) * 1000, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pooled vs bare HTTP client latency")
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/places"
+
+    http_client.get(url)  # open the pooled connection
+    bare = timed(lambda: requests.get(url, timeout=10).json(), args.calls)
+    pooled = timed(lambda: http_client.get_json(url), args.calls)
+    concurrent, wall = asyncio.run(async_timed(url, args.calls, args.concurrency))
+
+    print(f"{'client':>16} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, timings in (("requests.get", bare), ("pooled sync", pooled), ("pooled async", concurrent)):
+        print(f"{name:>16} {np.percentile(timings, 50):>8.3f} {np.percentile(timings, 99):>8.3f}")
+    print(f"\nasync: {args.calls} calls at concurrency {args.concurrency} in {wall * 1000:.1f} ms")
+    print(f"pooled sync p50 is {np.percentile(bare, 50) / np.percentile(pooled, 50):.1f}x faster than requests.get")
+
+    StubHandler.flaky_calls = 0
+    status = http_client.get(url.replace("/places", "/flaky")).status_code
+    print(f"flaky endpoint: status {status} after {StubHandler.flaky_calls} attempts")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
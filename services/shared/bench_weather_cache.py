@@ -0,0 +1,148 @@
+# services/shared/bench_weather_cache.py
+#
+# Drives the weather cache against a local fake OpenWeather server: many
+# concurrent users asking about a handful of destinations, then the TTL
+# running out. Checks that upstream sees one call per grid cell per TTL
+# window, that stale entries are served while they refresh, and that an
+# upstream outage falls back to the stale entry. Run from services/shared:
+#
+#     python bench_weather_cache.py --users 200
+#
+# Exits non-zero if any check fails.
+
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from weather import WeatherCache, openweather_fetcher
+
+CITIES = {
+    "Paris": (48.8566, 2.3522),
+    "Tokyo": (35.6762, 139.6503),
+    "Lima": (-12.0464, -77.0428),
+    "Cairo": (30.0444, 31.2357),
+    "Oslo": (59.9139, 10.7522),
+}
+
+
+class FakeOpenWeather(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    calls = 0
+    latency = 0.05
+    down = False
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with FakeOpenWeather.lock:
+            FakeOpenWeather.calls += 1
+        time.sleep(FakeOpenWeather.latency)
+        if FakeOpenWeather.down:
+            self.send_response(500)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        query = parse_qs(urlparse(self.path).query)
+        lat, lon = float(query["lat"][0]), float(query["lon"][0])
+        body = json.dumps({
+            "coord": {"lat": lat, "lon": lon},
+            "main": {"temp": round(15 + lat / 10, 1), "humidity": 60},
+            "weather": [{"description": "scattered clouds"}],
+            "wind": {"speed": 3.2},
+            "dt": time.time(),
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def user_points(users, seed=0):
+    """`users` lookups spread over CITIES, each a few hundred metres off the centre."""
+    rng = random.Random(seed)
+    points = []
+    for _ in range(users):
+        lat, lon = rng.choice(list(CITIES.values()))
+        points.append((lat + rng.uniform(-0.003, 0.003), lon + rng.uniform(-0.003, 0.003)))
+    return points
+
+
+def ask(cache, points, threads):
+    def one(point):
+        start = time.perf_counter()
+        cache.get(*point)
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(threads) as pool:
+        return sorted(pool.map(one, points))
+
+
+def check(name, ok):
+    print(f"  [{'ok' if ok else 'FAIL'}] {name}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Weather cache against a fake OpenWeather server")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--ttl", type=float, default=0.5)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenWeather)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    fetch = openweather_fetcher("test-key", url=f"http://127.0.0.1:{server.server_port}/data/2.5/weather")
+    cache = WeatherCache(fetch, ttl=args.ttl, stale_ttl=args.ttl * 20)
+    points = user_points(args.users)
+    # a city near a cell edge spans two cells
+    cells = len({cache.cell(*point) for point in points})
+    ok = True
+
+    print(f"{args.users} users over {len(CITIES)} cities ({cells} cells), upstream latency "
+          f"{FakeOpenWeather.latency * 1000:.0f} ms, ttl {args.ttl}s")
+
+    timings = ask(cache, points, args.threads)
+    print(f"cold:  p50 {timings[len(timings) // 2] * 1000:.3f} ms  upstream calls {FakeOpenWeather.calls}")
+    ok &= check("one upstream call per cell when cold", FakeOpenWeather.calls == cells)
+
+    FakeOpenWeather.calls = 0
+    timings = ask(cache, points, args.threads)
+    print(f"warm:  p50 {timings[len(timings) // 2] * 1000:.3f} ms  upstream calls {FakeOpenWeather.calls}")
+    ok &= check("no upstream calls within the TTL", FakeOpenWeather.calls == 0)
+
+    time.sleep(args.ttl * 1.2)
+    FakeOpenWeather.calls = 0
+    timings = ask(cache, points, args.threads)
+    time.sleep(FakeOpenWeather.latency * 3)  # let the background refreshes land
+    print(f"stale: p50 {timings[len(timings) // 2] * 1000:.3f} ms  upstream calls {FakeOpenWeather.calls}")
+    ok &= check("stale entries served without waiting", timings[-1] < FakeOpenWeather.latency)
+    ok &= check("one background refresh per cell", FakeOpenWeather.calls == cells)
+
+    time.sleep(args.ttl * 1.2)
+    FakeOpenWeather.down = True
+    before = cache.metrics()["errors"]
+    data = cache.get(*CITIES["Paris"])
+    deadline = time.monotonic() + 15  # the refresh retries the 500s with backoff first
+    while cache.metrics()["errors"] == before and time.monotonic() < deadline:
+        time.sleep(0.1)
+    ok &= check("outage falls back to the stale entry",
+                "main" in data and cache.metrics()["errors"] == before + 1)
+    FakeOpenWeather.down = False
+
+    metrics = cache.metrics()
+    print("metrics:", {k: round(v, 3) if isinstance(v, float) else v for k, v in metrics.items()})
+    server.shutdown()
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
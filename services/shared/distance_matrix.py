@@ -0,0 +1,267 @@
+# services/shared/distance_matrix.py
+#
+# Travel distance/duration between N origins and M destinations in as few
+# Distance Matrix calls as the provider limits allow, instead of one
+# Directions call per pair:
+#
+#   - cells already known (in either direction, per travel mode) come from
+#     an in-process TTL cache;
+#   - the rest are grouped into blocks of at most 25 origins, 25
+#     destinations and 100 elements, fetched concurrently;
+#   - when the upstream is unavailable (no key, quota, network), cells get
+#     a haversine x detour / typical-speed estimate, marked as such and not
+#     cached.
+
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import http_client
+
+DISTANCE_MATRIX_URL = "https://maps.googleapis.com/maps/api/distancematrix/json"
+MATRIX_CACHE_TTL = float(os.getenv("MATRIX_CACHE_TTL", str(24 * 3600)))
+MAX_ORIGINS = 25
+MAX_DESTINATIONS = 25
+MAX_ELEMENTS = 100
+MAX_CONCURRENT_BLOCKS = 8
+
+EARTH_RADIUS_M = 6371000.0
+# Road distance is rarely the straight line; typical door-to-door speeds (km/h)
+DETOUR_FACTOR = 1.3
+MODE_SPEED_KMH = {"walking": 4.8, "bicycling": 15.0, "transit": 22.0, "driving": 40.0}
+HIGHWAY_SPEED_KMH = 80.0  # driving legs over HIGHWAY_FROM_KM
+HIGHWAY_FROM_KM = 60.0
+
+SOURCE_NONE, SOURCE_API, SOURCE_ESTIMATE = 0, 1, 2
+
+
+def location_key(location):
+    """Cache key for a location: "lat,lng" rounded to ~1 m, or the normalised text."""
+    if isinstance(location, (tuple, list)):
+        return f"{location[0]:.5f},{location[1]:.5f}"
+    parts = str(location).split(",")
+    if len(parts) == 2:
+        try:
+            return f"{float(parts[0]):.5f},{float(parts[1]):.5f}"
+        except ValueError:
+            pass
+    return " ".join(str(location).casefold().split())
+
+
+def as_param(location):
+    if isinstance(location, (tuple, list)):
+        return f"{location[0]},{location[1]}"
+    return str(location)
+
+
+def _latlng(location, geocode=None):
+    if isinstance(location, (tuple, list)):
+        return float(location[0]), float(location[1])
+    parts = str(location).split(",")
+    if len(parts) == 2:
+        try:
+            return float(parts[0]), float(parts[1])
+        except ValueError:
+            pass
+    place = geocode(location) if geocode else None
+    return (place[0], place[1]) if place else None
+
+
+def estimate(origin, destination, mode="driving"):
+    """(distance_m, duration_s) from the straight-line distance, or None without coordinates."""
+    (lat1, lng1), (lat2, lng2) = origin, destination
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((p2 - p1) / 2) ** 2
+         + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2)
+    distance = 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a))) * DETOUR_FACTOR
+    speed = MODE_SPEED_KMH.get(mode, MODE_SPEED_KMH["driving"])
+    if mode == "driving" and distance > HIGHWAY_FROM_KM * 1000:
+        speed = HIGHWAY_SPEED_KMH
+    return distance, distance / (speed / 3.6)
+
+
+class MatrixCache:
+    """(mode, a, b) -> (distance_m, duration_s) with a TTL; (a, b) and (b, a) share an entry."""
+
+    def __init__(self, ttl=MATRIX_CACHE_TTL):
+        self.ttl = ttl
+        self._cells = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(mode, a, b):
+        return (mode, a, b) if a <= b else (mode, b, a)
+
+    def get(self, mode, a, b):
+        """The cell, None for a cached "no route", or KeyError."""
+        with self._lock:
+            entry = self._cells.get(self.key(mode, a, b))
+        if entry is None or entry[0] < time.monotonic():
+            raise KeyError((mode, a, b))
+        return entry[1]
+
+    def put(self, mode, a, b, cell):
+        with self._lock:
+            self._cells[self.key(mode, a, b)] = (time.monotonic() + self.ttl, cell)
+
+
+def block_shape(n_origins, n_destinations):
+    """(origins, destinations) per request that covers the matrix in the fewest requests."""
+    best = None
+    for cols in range(1, min(n_destinations, MAX_DESTINATIONS) + 1):
+        rows = min(n_origins, MAX_ORIGINS, MAX_ELEMENTS // cols)
+        requests = math.ceil(n_origins / rows) * math.ceil(n_destinations / cols)
+        if best is None or requests < best[0]:
+            best = (requests, rows, cols)
+    return best[1], best[2]
+
+
+class DistanceMatrix:
+    """
+    Distance/duration matrices over Google's Distance Matrix API.
+
+        dm = DistanceMatrix(api_key)
+        result = dm.matrix(stops, stops, mode="walking")
+        result["duration_s"][i, j]
+    """
+
+    def __init__(self, api_key=None, cache=None, geocode=None, max_workers=MAX_CONCURRENT_BLOCKS):
+        """
+        Args:
+            api_key (str): Google key; without one every cell is estimated.
+            cache (MatrixCache): Shared cell cache; a private one by default.
+            geocode (callable): name -> (lat, lon, ...) or None, used to
+                place named locations for estimates.
+        """
+        self.api_key = api_key
+        self.cache = cache or MatrixCache()
+        self.geocode = geocode
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="matrix")
+        self.stats = {"cells": 0, "cached": 0, "fetched": 0, "estimated": 0, "requests": 0, "failed_requests": 0}
+
+    def _fetch_block(self, origins, destinations, mode):
+        """{(i, j): cell} for one block; raises when the whole request failed."""
+        params = {
+            "origins": "|".join(as_param(o) for o in origins),
+            "destinations": "|".join(as_param(d) for d in destinations),
+            "mode": mode,
+            "key": self.api_key,
+        }
+        data = http_client.get_json(DISTANCE_MATRIX_URL, params=params)
+        if data.get("status") != "OK":
+            raise RuntimeError(f"Distance Matrix status {data.get('status')}: {data.get('error_message', '')}")
+        cells = {}
+        for i, row in enumerate(data.get("rows", [])):
+            for j, element in enumerate(row.get("elements", [])):
+                if element.get("status") == "OK":
+                    cells[i, j] = (float(element["distance"]["value"]), float(element["duration"]["value"]))
+                elif element.get("status") == "ZERO_RESULTS":
+                    cells[i, j] = None  # no route in this mode
+        return cells
+
+    def matrix(self, origins, destinations, mode="driving"):
+        """
+        Returns:
+            dict: "distance_m" and "duration_s" (N x M float arrays, NaN
+            where there is no route or nothing could be estimated) and
+            "source" (N x M int8: SOURCE_API, SOURCE_ESTIMATE or SOURCE_NONE).
+        """
+        origins, destinations = list(origins), list(destinations)
+        n, m = len(origins), len(destinations)
+        distance = np.full((n, m), np.nan)
+        duration = np.full((n, m), np.nan)
+        source = np.zeros((n, m), dtype=np.int8)
+        o_keys = [location_key(o) for o in origins]
+        d_keys = [location_key(d) for d in destinations]
+
+        missing = []
+        for i in range(n):
+            for j in range(m):
+                if o_keys[i] == d_keys[j]:
+                    distance[i, j] = duration[i, j] = 0.0
+                    source[i, j] = SOURCE_API
+                    continue
+                try:
+                    cell = self.cache.get(mode, o_keys[i], d_keys[j])
+                except KeyError:
+                    missing.append((i, j))
+                    continue
+                self.stats["cached"] += 1
+                if cell is not None:
+                    distance[i, j], duration[i, j] = cell
+                    source[i, j] = SOURCE_API
+        self.stats["cells"] += n * m
+
+        if missing and self.api_key:
+            missing = self._fetch_missing(missing, origins, destinations, o_keys, d_keys, mode,
+                                          distance, duration, source)
+        if missing:
+            self._estimate(missing, origins, destinations, mode, distance, duration, source)
+        return {"distance_m": distance, "duration_s": duration, "source": source}
+
+    def _fetch_missing(self, missing, origins, destinations, o_keys, d_keys, mode, distance, duration, source):
+        """Fetches the missing cells block by block; returns those still missing."""
+        rows = sorted({i for i, _ in missing})
+        cols = sorted({j for _, j in missing})
+        rows_per, cols_per = block_shape(len(rows), len(cols))
+        blocks = [(rows[r:r + rows_per], cols[c:c + cols_per])
+                  for r in range(0, len(rows), rows_per) for c in range(0, len(cols), cols_per)]
+        futures = [self._executor.submit(self._fetch_block, [origins[i] for i in block_rows],
+                                         [destinations[j] for j in block_cols], mode)
+                   for block_rows, block_cols in blocks]
+
+        fetched = set()
+        for (block_rows, block_cols), future in zip(blocks, futures):
+            self.stats["requests"] += 1
+            try:
+                cells = future.result()
+            except Exception:
+                self.stats["failed_requests"] += 1
+                continue
+            for (bi, bj), cell in cells.items():
+                i, j = block_rows[bi], block_cols[bj]
+                self.cache.put(mode, o_keys[i], d_keys[j], cell)
+                fetched.add((i, j))
+                if cell is not None:
+                    distance[i, j], duration[i, j] = cell
+                    source[i, j] = SOURCE_API
+        self.stats["fetched"] += sum(1 for cell in missing if cell in fetched)
+        return [cell for cell in missing if cell not in fetched]
+
+    def _estimate(self, missing, origins, destinations, mode, distance, duration, source):
+        points = {}
+
+        def point(location):
+            key = location_key(location)
+            if key not in points:
+                points[key] = _latlng(location, self.geocode)
+            return points[key]
+
+        for i, j in missing:
+            a, b = point(origins[i]), point(destinations[j])
+            if a is None or b is None:
+                continue
+            distance[i, j], duration[i, j] = estimate(a, b, mode)
+            source[i, j] = SOURCE_ESTIMATE
+            self.stats["estimated"] += 1
+
+    def pair(self, origin, destination, mode="driving"):
+        """(distance_m, duration_s, source) for one pair; NaNs if unknown."""
+        result = self.matrix([origin], [destination], mode)
+        return result["distance_m"][0, 0], result["duration_s"][0, 0], int(result["source"][0, 0])
+
+
+def format_duration(seconds):
+    minutes = int(round(seconds / 60))
+    if minutes < 60:
+        return f"{minutes} mins"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours} hour{'s' if hours > 1 else ''} {minutes} mins" if minutes else f"{hours} hour{'s' if hours > 1 else ''}"
+
+
+def format_distance(metres):
+    return f"{metres / 1000:.1f} km" if metres >= 1000 else f"{int(round(metres))} m"
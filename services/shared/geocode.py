@@ -0,0 +1,204 @@
+# services/shared/geocode.py
+#
+# Place name -> coordinates, cheapest source first:
+#
+#   1. an offline gazetteer of the cities in data/open_travel_data.csv,
+#      held in a dict (microseconds);
+#   2. a persistent SQLite cache of earlier network answers, with TTL and
+#      LRU bounds, shared by every process on the machine;
+#   3. the network resolver (Google Geocoding, Nominatim, ...), whose answer
+#      is written back to the cache. Names it cannot resolve are cached too,
+#      for a shorter time, so a typo does not hit the API on every message.
+
+import csv
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+GAZETTEER_CSV = os.getenv("GAZETTEER_CSV", os.path.join(_ROOT, "data", "open_travel_data.csv"))
+GEOCODE_CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH", os.path.join(_ROOT, "data", "cache", "geocode.sqlite"))
+CACHE_TTL = float(os.getenv("GEOCODE_CACHE_TTL", str(30 * 24 * 3600)))
+NEGATIVE_TTL = 24 * 3600
+CACHE_MAX_ENTRIES = int(os.getenv("GEOCODE_CACHE_SIZE", "100000"))
+MEMORY_ENTRIES = 4096
+TOUCH_FLUSH = 256
+
+_SPACES_RE = re.compile(r"\s+")
+_PUNCT_RE = re.compile(r"[^\w\s,]")
+
+
+def normalize_place(name):
+    """Cache key for a place name: case-folded, punctuation dropped, "a ,b" -> "a, b"."""
+    name = _PUNCT_RE.sub(" ", name.casefold())
+    parts = [_SPACES_RE.sub(" ", part).strip() for part in name.split(",")]
+    return ", ".join(part for part in parts if part)
+
+
+class Gazetteer:
+    """
+    City coordinates from the airport list, keyed by "city" and
+    "city, country". Cities with several airports get their mean position;
+    a city name shared by several countries resolves to the one with the
+    most airports.
+    """
+
+    def __init__(self, places):
+        self.places = places
+
+    @classmethod
+    def load(cls, csv_path=GAZETTEER_CSV):
+        sums = {}
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                try:
+                    lat, lon = float(row["latitude"]), float(row["longitude"])
+                except (KeyError, ValueError):
+                    continue
+                city, country = row.get("city", "").strip(), row.get("country", "").strip()
+                if not city:
+                    continue
+                entry = sums.setdefault((city, country), [0.0, 0.0, 0])
+                entry[0] += lat
+                entry[1] += lon
+                entry[2] += 1
+
+        places = {}
+        by_city = {}
+        for (city, country), (lat, lon, n) in sums.items():
+            label = f"{city}, {country}" if country else city
+            places[normalize_place(label)] = (lat / n, lon / n, label)
+            best = by_city.get(normalize_place(city))
+            if best is None or n > best[0]:
+                by_city[normalize_place(city)] = (n, (lat / n, lon / n, label))
+        for key, (_, place) in by_city.items():
+            places.setdefault(key, place)
+        return cls(places)
+
+    def get(self, key):
+        return self.places.get(key)
+
+
+class GeocodeCache:
+    """
+    SQLite-backed cache of resolved names with TTL expiry and LRU eviction,
+    fronted by a small in-process LRU. Recency updates are written in
+    batches rather than one commit per lookup.
+    """
+
+    def __init__(self, path=GEOCODE_CACHE_PATH, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._touched = {}
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS geocode ("
+            " key TEXT PRIMARY KEY, lat REAL, lon REAL, address TEXT,"
+            " expires REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS geocode_last_used ON geocode (last_used)")
+        self._db.commit()
+
+    def get(self, key):
+        """
+        Returns (lat, lon, address), None for a cached miss, or raises
+        KeyError when the name is not cached (or has expired).
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                row = self._db.execute("SELECT lat, lon, address, expires FROM geocode WHERE key = ?",
+                                       (key,)).fetchone()
+                if row is None:
+                    raise KeyError(key)
+                entry = (None if row[0] is None else (row[0], row[1], row[2]), row[3])
+                self._remember(key, entry)
+            if entry[1] < now:
+                del self._memory[key]
+                raise KeyError(key)
+            self._memory.move_to_end(key)
+            self._touched[key] = now
+            if len(self._touched) >= TOUCH_FLUSH:
+                self._flush_touched()
+                self._db.commit()
+        return entry[0]
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        while len(self._memory) > MEMORY_ENTRIES:
+            self._memory.popitem(last=False)
+
+    def _flush_touched(self):
+        self._db.executemany("UPDATE geocode SET last_used = ? WHERE key = ?",
+                             [(t, key) for key, t in self._touched.items()])
+        self._touched.clear()
+
+    def put(self, key, place):
+        now = time.time()
+        lat, lon, address = place if place is not None else (None, None, None)
+        ttl = self.ttl if place is not None else min(self.ttl, NEGATIVE_TTL)
+        with self._lock:
+            self._remember(key, (place, now + ttl))
+            self._touched.pop(key, None)
+            self._flush_touched()
+            self._db.execute("INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?, ?, ?)",
+                             (key, lat, lon, address, now + ttl, now))
+            count = self._db.execute("SELECT COUNT(*) FROM geocode").fetchone()[0]
+            if count > self.max_entries:
+                self._db.execute("DELETE FROM geocode WHERE expires < ?", (now,))
+                self._db.execute(
+                    "DELETE FROM geocode WHERE key IN"
+                    " (SELECT key FROM geocode ORDER BY last_used LIMIT max(0, (SELECT COUNT(*) FROM geocode) - ?))",
+                    (self.max_entries,),
+                )
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._db.commit()
+            self._db.close()
+
+
+class Geocoder:
+    """
+    Resolves place names through the gazetteer, the cache and then
+    `resolver`, a callable name -> (lat, lon, address) or None.
+    """
+
+    def __init__(self, resolver, cache=None, gazetteer=None):
+        self.resolver = resolver
+        self.cache = cache if cache is not None else GeocodeCache()
+        if gazetteer is None:
+            gazetteer = Gazetteer.load() if os.path.exists(GAZETTEER_CSV) else Gazetteer({})
+        self.gazetteer = gazetteer
+        self.stats = {"gazetteer": 0, "cache": 0, "network": 0}
+
+    def geocode(self, name):
+        """Returns (lat, lon, address) for `name`, or None if it cannot be resolved."""
+        key = normalize_place(name)
+        if not key:
+            return None
+        place = self.gazetteer.get(key)
+        if place is not None:
+            self.stats["gazetteer"] += 1
+            return place
+        try:
+            place = self.cache.get(key)
+            self.stats["cache"] += 1
+            return place
+        except KeyError:
+            pass
+        self.stats["network"] += 1
+        place = self.resolver(name)
+        self.cache.put(key, place)
+        return place
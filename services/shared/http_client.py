@@ -0,0 +1,162 @@
+# services/shared/http_client.py
+#
+# One HTTP client for every outbound API call in services/: per-host
+# connection pools with keep-alive, default timeouts and retries with
+# exponential backoff on 429/5xx (honouring Retry-After). `get` / `get_json`
+# share a pooled requests.Session; `AsyncHTTPClient` is the aiohttp
+# equivalent for async callers.
+#
+# The collectionAPI scripts, the backend and the AI assistant live in
+# separate directories; collectionAPI/shared_path.py and
+# backend/src/utils/shared_path.py put services/shared on sys.path for
+# the first two, the standalone assistant app does it itself.
+
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) seconds
+DEFAULT_TIMEOUT = (float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05")), float(os.getenv("HTTP_READ_TIMEOUT", "10")))
+RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+BACKOFF = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+POOL_HOSTS = 32
+POOL_SIZE = 16
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _make_session():
+    retry = Retry(
+        total=RETRIES,
+        backoff_factor=BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def session():
+    """The process-wide pooled session; urllib3's pools are safe to share between threads."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _make_session()
+    return _session
+
+
+def get(url, params=None, headers=None, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """`requests.get` over the pooled session, with retries and a default timeout."""
+    return session().get(url, params=params, headers=headers, timeout=timeout, **kwargs)
+
+
+def get_json(url, params=None, headers=None, timeout=DEFAULT_TIMEOUT, **kwargs):
+    return get(url, params=params, headers=headers, timeout=timeout, **kwargs).json()
+
+
+# ───────────────────────────────────────
+# Async variant
+# ───────────────────────────────────────
+def _retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        delay = parsedate_to_datetime(value).timestamp() - time.time()
+        return max(delay, 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class AsyncHTTPClient:
+    """
+    aiohttp session with per-host connection limits, keep-alive, default
+    timeouts and the same retry policy as the sync client:
+
+        async with AsyncHTTPClient() as client:
+            data = await client.get_json(url, params=params)
+    """
+
+    def __init__(self, limit=100, limit_per_host=POOL_SIZE, timeout=DEFAULT_TIMEOUT, retries=RETRIES,
+                 backoff=BACKOFF):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._session = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def open(self):
+        import aiohttp
+
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host,
+                                             keepalive_timeout=30, ttl_dns_cache=300)
+            connect, read = self.timeout
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def get(self, url, params=None, headers=None):
+        """
+        GETs `url`, retrying connection errors and 429/5xx responses.
+
+        Returns:
+            tuple: (status, headers, body bytes)
+        """
+        import aiohttp
+
+        if isinstance(params, dict):
+            # requests drops None-valued params; aiohttp refuses them
+            params = {k: v for k, v in params.items() if v is not None}
+        session = await self.open()
+        for attempt in range(self.retries + 1):
+            delay = self.backoff * (2 ** attempt) * (0.5 + random.random() / 2)
+            try:
+                async with session.get(url, params=params, headers=headers) as response:
+                    body = await response.read()
+                    if response.status not in RETRY_STATUSES or attempt == self.retries:
+                        return response.status, response.headers, body
+                    retry_after = _retry_after(response.headers.get("Retry-After"))
+                    if retry_after is not None:
+                        delay = retry_after
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == self.retries:
+                    raise
+            await asyncio.sleep(delay)
+
+    async def get_json(self, url, params=None, headers=None):
+        _, _, body = await self.get(url, params=params, headers=headers)
+        return json.loads(body)
@@ -0,0 +1,139 @@
+# services/shared/route_cache.py
+#
+# Persistent cache of route lookups (Directions / Distance Matrix answers),
+# so the same city pair is not re-queried all day and an outage serves the
+# last answer Google gave rather than a made-up one.
+#
+#   - keys: normalised endpoints, travel mode, and for transit a departure
+#     bucket (weekday + 15-minute slot, as timetables repeat weekly);
+#     summary lookups can use symmetric keys (A->B == B->A), step-by-step
+#     ones cannot, as the steps only make sense in one direction;
+#   - entries are fresh for ROUTE_CACHE_TTL (transit legs, which carry
+#     absolute departure and arrival times, only for TRANSIT_FRESH_TTL) and
+#     kept as last-known-good for ROUTE_STALE_TTL beyond that, after which
+#     they are evicted;
+#   - payloads are compact JSON: steps as positional arrays, not dicts of
+#     repeated keys or pre-formatted sentences;
+#   - a small in-process LRU in front of SQLite makes repeat lookups
+#     sub-millisecond.
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from distance_matrix import location_key
+
+_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+ROUTE_CACHE_PATH = os.getenv("ROUTE_CACHE_PATH", os.path.join(_ROOT, "data", "cache", "routes.sqlite"))
+ROUTE_CACHE_TTL = float(os.getenv("ROUTE_CACHE_TTL", str(7 * 24 * 3600)))
+ROUTE_STALE_TTL = float(os.getenv("ROUTE_STALE_TTL", str(90 * 24 * 3600)))
+TRANSIT_BUCKET_MINUTES = 15
+# A transit answer lists clock times, so it is only current within its bucket
+TRANSIT_FRESH_TTL = TRANSIT_BUCKET_MINUTES * 60
+MEMORY_ENTRIES = 2048
+PRUNE_EVERY = 500  # puts between evictions of long-expired entries
+
+
+def departure_bucket(departure_time, minutes=TRANSIT_BUCKET_MINUTES):
+    """"weekday/slot" of a unix departure time, in local time."""
+    t = time.localtime(departure_time)
+    return f"{t.tm_wday}/{(t.tm_hour * 60 + t.tm_min) // minutes}"
+
+
+def route_key(origin, destination, mode, departure_time=None, variant="", symmetric=False):
+    """
+    Args:
+        departure_time (float): Unix time; only bucketed for transit.
+        variant (str): Anything else that changes the answer (e.g. transit_mode).
+        symmetric (bool): Treat A->B and B->A as the same route.
+    """
+    a, b = location_key(origin), location_key(destination)
+    if symmetric and b < a:
+        a, b = b, a
+    bucket = departure_bucket(departure_time) if mode == "transit" and departure_time else ""
+    return f"{mode}|{variant}|{bucket}|{a}|{b}"
+
+
+class RouteCache:
+    """key -> JSON-able route payload, with fresh and last-known-good lookups."""
+
+    def __init__(self, path=ROUTE_CACHE_PATH, ttl=ROUTE_CACHE_TTL, stale_ttl=ROUTE_STALE_TTL):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._puts = 0
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0}
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS routes (key TEXT PRIMARY KEY, payload TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS routes_fetched_at ON routes (fetched_at)")
+        self._db.commit()
+
+    def _load(self, key):
+        entry = self._memory.get(key)
+        if entry is None:
+            row = self._db.execute("SELECT payload, fetched_at FROM routes WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            entry = (json.loads(row[0]), row[1])
+            self._memory[key] = entry
+            while len(self._memory) > MEMORY_ENTRIES:
+                self._memory.popitem(last=False)
+        self._memory.move_to_end(key)
+        return entry
+
+    def get(self, key, ttl=None):
+        """The payload for `key` if younger than `ttl` (default: the cache's TTL), or None."""
+        with self._lock:
+            entry = self._load(key)
+        if entry is None or entry[1] < time.time() - (self.ttl if ttl is None else ttl):
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return entry[0]
+
+    def get_stale(self, key):
+        """The last payload stored for `key` however old (within the stale window), or None."""
+        with self._lock:
+            entry = self._load(key)
+        if entry is None or entry[1] < time.time() - self.ttl - self.stale_ttl:
+            return None
+        self.stats["stale_hits"] += 1
+        return entry[0]
+
+    def put(self, key, payload):
+        now = time.time()
+        with self._lock:
+            self._memory[key] = (payload, now)
+            self._memory.move_to_end(key)
+            while len(self._memory) > MEMORY_ENTRIES:
+                self._memory.popitem(last=False)
+            self._db.execute("INSERT OR REPLACE INTO routes VALUES (?, ?, ?)",
+                             (key, json.dumps(payload, separators=(",", ":"), ensure_ascii=False), now))
+            self._puts += 1
+            if self._puts % PRUNE_EVERY == 0:
+                self._db.execute("DELETE FROM routes WHERE fetched_at < ?", (now - self.ttl - self.stale_ttl,))
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_cache = None
+
+
+def get_route_cache():
+    """Process-wide cache at ROUTE_CACHE_PATH."""
+    global _cache
+    if _cache is None:
+        _cache = RouteCache()
+    return _cache
@@ -0,0 +1,120 @@
+# services/shared/weather.py
+#
+# Current-weather lookups through a TTL cache keyed by lat/lon grid cell.
+# Everyone asking about the same destination lands in the same cell, so
+# OpenWeather sees at most one call per cell per TTL window:
+#
+#   - fresh entry (younger than `ttl`)          -> served from memory;
+#   - stale entry (younger than `stale_ttl`)    -> served from memory while
+#     one background thread refreshes it;
+#   - no entry, or older than `stale_ttl`       -> fetched inline, with
+#     concurrent callers for the same cell waiting on that one fetch.
+#
+# A failed refresh keeps the stale entry, so an OpenWeather outage degrades
+# to slightly old weather rather than no weather.
+
+import os
+import threading
+import time
+
+import http_client
+
+OPENWEATHER_URL = os.getenv("OPENWEATHER_URL", "https://api.openweathermap.org/data/2.5/weather")
+WEATHER_TTL = float(os.getenv("WEATHER_CACHE_TTL", "600"))
+WEATHER_STALE_TTL = float(os.getenv("WEATHER_STALE_TTL", "3600"))
+# 0.1 degree is ~11 km north-south: one cell per city, several for a metropolis
+WEATHER_CELL_DEG = float(os.getenv("WEATHER_CELL_DEG", "0.1"))
+
+
+def openweather_fetcher(api_key, url=OPENWEATHER_URL, units="metric"):
+    """Returns fetch(lat, lon) -> OpenWeather's current-weather JSON."""
+
+    def fetch(lat, lon):
+        params = {"lat": lat, "lon": lon, "appid": api_key, "units": units}
+        response = http_client.get(url, params=params)
+        response.raise_for_status()
+        return response.json()
+
+    return fetch
+
+
+class WeatherCache:
+    """
+    Stale-while-revalidate cache in front of `fetch(lat, lon)`.
+
+    The upstream call is made for the centre of the cell, not the exact
+    point asked about, so every caller in a cell gets the same answer.
+    """
+
+    def __init__(self, fetch, ttl=WEATHER_TTL, stale_ttl=WEATHER_STALE_TTL, cell_deg=WEATHER_CELL_DEG):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.cell_deg = cell_deg
+        self._entries = {}  # cell -> (fetched_at, data)
+        self._inflight = {}  # cell -> threading.Event
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "upstream_calls": 0, "errors": 0}
+
+    def cell(self, lat, lon):
+        return round(lat / self.cell_deg), round(lon / self.cell_deg)
+
+    def _centre(self, cell):
+        return round(cell[0] * self.cell_deg, 6), round(cell[1] * self.cell_deg, 6)
+
+    def get(self, lat, lon):
+        """
+        Returns the cached (or freshly fetched) weather JSON for the cell
+        containing (lat, lon). Raises whatever `fetch` raises when there is
+        nothing to fall back on.
+        """
+        cell = self.cell(lat, lon)
+        while True:
+            with self._lock:
+                entry = self._entries.get(cell)
+                age = time.monotonic() - entry[0] if entry else None
+                if entry and age < self.ttl:
+                    self.stats["hits"] += 1
+                    return entry[1]
+                if entry and age < self.stale_ttl:
+                    self.stats["stale_hits"] += 1
+                    if cell not in self._inflight:
+                        self._inflight[cell] = threading.Event()
+                        threading.Thread(target=self._refresh, args=(cell,), daemon=True).start()
+                    return entry[1]
+                waiter = self._inflight.get(cell)
+                if waiter is None:
+                    self.stats["misses"] += 1
+                    self._inflight[cell] = threading.Event()
+                    break
+            # Someone else is fetching this cell: wait for it and look again
+            # (if their fetch failed, the next pass makes its own attempt)
+            waiter.wait()
+
+        self._refresh(cell, raise_errors=True)
+        with self._lock:
+            return self._entries[cell][1]
+
+    def _refresh(self, cell, raise_errors=False):
+        try:
+            with self._lock:
+                self.stats["upstream_calls"] += 1
+            data = self.fetch(*self._centre(cell))
+            with self._lock:
+                self._entries[cell] = (time.monotonic(), data)
+        except Exception:
+            with self._lock:
+                self.stats["errors"] += 1
+            if raise_errors:
+                raise
+        finally:
+            with self._lock:
+                self._inflight.pop(cell).set()
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["cells"] = len(self._entries)
+        served = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["stale_hits"]) / served if served else 0.0
+        return stats